@@ -1,44 +1,71 @@
 import os
 import sys
-import subprocess
-import shutil
-import time
 from datetime import datetime, timedelta
 
-from PyQt5.uic import loadUi
-from PyQt5.QtGui import QIcon, QTextCharFormat, QColor, QTextCursor, QDesktopServices
-from PyQt5.QtCore import QTimer, Qt, QUrl
-from PyQt5.QtWidgets import QMainWindow, QMessageBox, QFileDialog, QTableWidgetItem, QMenu, QAction, QInputDialog, QStatusBar
-import psutil
+from PyQt5.QtGui import QIcon, QDesktopServices
+from PyQt5.QtCore import QTimer, Qt, QUrl, QObject, pyqtSignal
+from PyQt5.QtWidgets import QMainWindow, QMessageBox, QFileDialog, QTableWidgetItem, QMenu, QAction, QActionGroup, QInputDialog, QStatusBar, \
+    QAbstractItemView
 import pyperclip
 
 from . import world_settings_activity
-from utils import json_operation, random_password, settings_file_operation, bili_authorization
-from utils.pal_restapi import PalRestAPI  # Import the new REST API client
+from utils import json_operation, random_password, ui_loader, console_log, event_log, server_instance, server_supervisor, platform_paths, metrics, \
+    player_moderation
 import setting
 
-# Import MOD manager
-from pal_mod_manager import ModManagerQt
+# 以下模块较重（requests、tkinter/ttkbootstrap/PIL/qrcode、MOD管理器），在首次使用时再导入，
+# 不影响主窗口的显示速度：
+#   utils.pal_restapi       -> server_instance.ServerInstance._create_api
+#   utils.daemon_client     -> 配置了后台服务（daemon_token）时连接
+#   utils.bili_authorization -> button_select_file_click
+#   pal_mod_manager         -> open_mod_manager
+
+
+# REST API 错误分类（utils.pal_restapi.ERROR_*）的显示名称
+API_ERROR_NAMES = {
+    "timeout": "超时",
+    "connection": "连接失败",
+    "unauthorized": "未授权(401)",
+    "bad_request": "请求错误(400)",
+    "server_error": "服务器错误(5xx)",
+    "other": "其他",
+}
+API_HEALTHY_SCORE = 90  # 健康度低于该值时提示连接不稳定
+
+
+class SupervisorBridge(QObject):
+    """把 server_supervisor 在工作线程中的回调转到界面线程"""
+    event = pyqtSignal(object, str, object)
 
 
 class Window(QMainWindow):
     def __init__(self):
         super().__init__()
         self.module_path = os.path.split(sys.modules[__name__].__file__)[0]
-        self.config_path = os.path.join(sys.argv[0], r"../config.json")
+        self.config_path = platform_paths.app_path("config.json")
         self.config = json_operation.load_json(self.config_path)
-        self.rest_api_connect_flag = False
-        self.pal_rest_api = None
-        self.server_run_flag = False
-        self.server_run_time = datetime.now()
-        self.last_auto_backup_time = datetime.now()
-        self.player_list = []
-        self.palserver_settings_path = None
-        self.option_settings_dict = {}
+        try:
+            self.event_log = event_log.EventLog()
+        except Exception:
+            self.event_log = None
+        # 所有服务器共用一个 supervisor（线程池 + 1秒调度），界面只显示当前选中的服务器 self.server；
+        # 后台服务（pal_daemon.py）在运行时连接它，界面只负责显示和转发操作
+        self.supervisor = None
+        if self.config.get("daemon_token"):
+            from utils import daemon_client
+            self.supervisor = daemon_client.RemoteSupervisor.attach(self.config, self.event_log)
+        self.daemon_attached = self.supervisor is not None
+        if self.supervisor is None:
+            self.supervisor = server_supervisor.ServerSupervisor(self.config, self.config_path, log=self.event_log)
+        self.server = self.supervisor.instances[0]
+        self.bridge = SupervisorBridge()
+        self.bridge.event.connect(self.server_event)
+        self.supervisor.add_listener(self.bridge.event.emit)
         self.initUi()
 
     def initUi(self):
-        loadUi(os.path.join(self.module_path, r"../ui/main.ui"), self)
+        ui_loader.load_ui("main", self)
+        self.console_log = console_log.ConsoleLog(self.text_browser_api_server)
         if setting.publicity_ad:
             self.setWindowTitle("帕鲁服务器管理工具                 By 怀沙2049" +  " - " + setting.publicity_ad)
         else:
@@ -49,222 +76,252 @@ class Window(QMainWindow):
         self.table_widget_player_list.setColumnWidth(1, 100)
         self.table_widget_player_list.setColumnWidth(2, 130)
 
+        # 支持 Ctrl/Shift 多选玩家批量操作
+        self.table_widget_player_list.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.table_widget_player_list.setSelectionMode(QAbstractItemView.ExtendedSelection)
+        self.player_list_menu = QMenu(self)
+        kick_action = QAction('踢出选中的玩家', self)
+        kick_action.triggered.connect(self.kick_player)
+        ban_action = QAction('封禁选中的玩家', self)
+        ban_action.triggered.connect(self.ban_player)
+        copy_uid_action = QAction('复制玩家UID', self)
+        copy_uid_action.triggered.connect(self.copy_uid)
+        copy_steamid_action = QAction('复制玩家StramID', self)
+        copy_steamid_action.triggered.connect(self.copy_steamid)
+        self.player_list_menu.addAction(kick_action)
+        self.player_list_menu.addAction(ban_action)
+        self.player_list_menu.addAction(copy_uid_action)
+        self.player_list_menu.addAction(copy_steamid_action)
+        self.player_list_menu.addSeparator()
+        batch_menu = self.player_list_menu.addMenu("按玩家ID批量操作")
+        for action, title in ((player_moderation.ACTION_KICK, "批量踢出..."), (player_moderation.ACTION_BAN, "批量封禁..."),
+                              (player_moderation.ACTION_UNBAN, "批量解封...")):
+            batch_action = QAction(title, self)
+            batch_action.triggered.connect(lambda checked, action=action: self.moderate_pasted_ids(action))
+            batch_menu.addAction(batch_action)
+        import_ban_list_action = QAction('导入封禁列表...', self)
+        import_ban_list_action.triggered.connect(self.import_ban_list)
+        export_ban_list_action = QAction('导出封禁列表...', self)
+        export_ban_list_action.triggered.connect(self.export_ban_list)
+        self.player_list_menu.addAction(import_ban_list_action)
+        self.player_list_menu.addAction(export_ban_list_action)
+        self.table_widget_player_list.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.table_widget_player_list.customContextMenuRequested.connect(self.show_player_list_menu)
+
         if setting.status_bar_show_flag:
             status_bar = QStatusBar()
             self.setStatusBar(status_bar)
             status_bar.showMessage(setting.status_bar_message)
 
+        if self.daemon_attached:
+            self.text_browser_api_server_notice("client_success", "已连接到后台服务，服务器由后台服务监控，关闭本窗口不影响运行")
+        elif self.config.get("metrics_port"):
+            # 连接后台服务时指标由后台服务提供
+            try:
+                metrics.serve("127.0.0.1", int(self.config["metrics_port"]))
+                self.text_browser_api_server_notice("client_success", f"指标接口已启动：http://127.0.0.1:{self.config['metrics_port']}/metrics")
+            except (OSError, ValueError) as e:
+                self.text_browser_api_server_notice("client_error", f"指标接口启动失败（端口 {self.config['metrics_port']}）: {e}")
+
+        # 其余服务器只检查路径并读取配置文件，当前服务器同时填充界面
+        for instance in self.supervisor.instances[1:]:
+            flag, message = instance.check_palserver_path()
+            if flag is False and "palserver_path" in instance.config:
+                self.server_event(instance, "notice", ("client_error", message))
+        self.load_server_ui()
+
+        # 所有服务器共用一个1秒定时器：supervisor 调度 + 刷新界面显示
+        self.timed_detection_timer_1000 = QTimer(self)
+        self.timed_detection_timer_1000.timeout.connect(self.timed_detection_1000)
+        self.timed_detection_timer_1000.start(1000)
+        
+        # 创建菜单栏并添加关于菜单项
+        self.create_menu_bar()
+
+    def load_server_ui(self):
+        """用当前服务器的配置填充界面"""
+        config = self.server.config
         # 不设置默认值，直接显示空
         self.text_edit_server_name.setText("")
         self.text_edit_server_description.setText("")
+        self.line_edit_palserver_path.setText("")
+        self.label_server_version.setText(self.server.server_version)
+        self.button_open_settings_dir.setEnabled(False)
+        self.button_get_api_config.setEnabled(False)
         
         # 添加调试信息，检查config中是否有palserver_path
-        if "palserver_path" in self.config:
-            self.text_browser_api_server_notice("client_message", f"检测到游戏服务安装路径: {self.config['palserver_path']}")
+        if "palserver_path" in config:
+            self.text_browser_api_server_notice("client_message", f"检测到游戏服务安装路径: {config['palserver_path']}")
         else:
             self.text_browser_api_server_notice("client_message", "请先设置好游戏路径")
         
         self.check_palserver_path()
 
-        if "game_port" in self.config:
-            self.line_edit_game_port.setText(str(self.config["game_port"]))
-        if "game_publicport" in self.config:
-            self.line_edit_game_publicport.setText(str(self.config["game_publicport"]))
-        if "game_player_limit" in self.config:
-            self.line_edit_game_player_limit.setText(str(self.config["game_player_limit"]))
+        self.line_edit_game_port.setText(str(config["game_port"]))
+        self.line_edit_game_publicport.setText(str(config["game_publicport"]))
+        self.line_edit_game_player_limit.setText(str(config["game_player_limit"]))
 
         # Update API settings from config, but prioritize RESTAPIPort from PalWorldSettings.ini if available
-        if "api_addr" in self.config:
-            self.line_edit_api_addr.setText(self.config["api_addr"])
+        self.line_edit_api_addr.setText(config["api_addr"])
         
         # Check if we have the actual RESTAPIPort from the server settings
-        if hasattr(self, 'option_settings_dict') and "RESTAPIPort" in self.option_settings_dict:
+        if "RESTAPIPort" in self.server.option_settings_dict:
             # Use the actual RESTAPIPort from PalWorldSettings.ini
-            actual_api_port = int(self.option_settings_dict["RESTAPIPort"])
+            actual_api_port = int(self.server.option_settings_dict["RESTAPIPort"])
             self.line_edit_api_port.setText(str(actual_api_port))
             # Update the config to use this port
-            self.config["api_port"] = actual_api_port
+            config["api_port"] = actual_api_port
             self.save_config_json()
-        elif "api_port" in self.config:
+        else:
             # Fall back to the saved config port if RESTAPIPort isn't available
-            self.line_edit_api_port.setText(str(self.config["api_port"]))
+            self.line_edit_api_port.setText(str(config["api_port"]))
             
-        if "api_password" in self.config:
-            self.line_edit_api_password.setText(self.config["api_password"])
-
-        if "crash_detection_flag" in self.config:
-            self.check_box_crash_detection.setChecked(self.config["crash_detection_flag"])
-            if self.config["crash_detection_flag"]:
-                self.check_box_crash_detection_click(True)
-        if "auto_restart_time_limit" in self.config:
-            self.line_edit_auto_restart_time_limit.setText(str(self.config["auto_restart_time_limit"]))
-        if "auto_restart_flag" in self.config:
-            self.check_box_auto_restart.setChecked(self.config["auto_restart_flag"])
-            if self.config["auto_restart_flag"]:
-                self.check_box_auto_restart_click(True)
-        if "auto_restart_player_limit" in self.config:
-            self.line_edit_auto_restart_player_limit.setText(str(self.config["auto_restart_player_limit"]))
-        if "auto_restart_player_flag" in self.config:
-            self.check_box_auto_restart_player.setChecked(self.config["auto_restart_player_flag"])
-            if self.config["auto_restart_player_flag"]:
-                self.check_box_auto_restart_player_click(True)
-
-        if "auto_backup_time_limit" in self.config:
-            self.line_edit_auto_backup_time_limit.setText(str(self.config["auto_backup_time_limit"]))
-        if "backup_dir_path" in self.config:
-            if os.path.isdir(self.config["backup_dir_path"]):
-                self.line_edit_backup_path.setText(self.config["backup_dir_path"])
+        self.line_edit_api_password.setText(config["api_password"])
+
+        self.check_box_crash_detection.setChecked(config["crash_detection_flag"])
+        self.line_edit_auto_restart_time_limit.setText(str(config["auto_restart_time_limit"]))
+        self.check_box_auto_restart.setChecked(config["auto_restart_flag"])
+        self.line_edit_auto_restart_time_limit.setEnabled(not config["auto_restart_flag"])
+        self.line_edit_auto_restart_player_limit.setText(str(config["auto_restart_player_limit"]))
+        self.check_box_auto_restart_player.setChecked(config["auto_restart_player_flag"])
+        self.line_edit_auto_restart_player_limit.setEnabled(not config["auto_restart_player_flag"])
+
+        self.line_edit_auto_backup_time_limit.setText(str(config["auto_backup_time_limit"]))
+        self.line_edit_backup_path.setText("")
+        self.check_box_auto_backup.setChecked(False)
+        self.check_box_auto_backup.setEnabled(False)
+        self.line_edit_auto_backup_time_limit.setEnabled(False)
+        if "backup_dir_path" in config:
+            if os.path.isdir(config["backup_dir_path"]):
+                self.line_edit_backup_path.setText(config["backup_dir_path"])
                 self.check_box_auto_backup.setEnabled(True)
-                self.line_edit_auto_backup_time_limit.setEnabled(True)
-                if "auto_backup_flag" in self.config:
-                    self.check_box_auto_backup.setChecked(self.config["auto_backup_flag"])
-                    if self.config["auto_backup_flag"]:
-                        self.check_box_auto_backup_click(True)
+                self.check_box_auto_backup.setChecked(config["auto_backup_flag"])
+                self.line_edit_auto_backup_time_limit.setEnabled(not config["auto_backup_flag"])
             else:
-                self.config.pop("backup_dir_path")
+                config.pop("backup_dir_path")
                 self.save_config_json()
 
-        if "launch_options_info" in self.config:
-            self.line_edit_launch_options.setText(self.config["launch_options_info"])
-        if "launch_options_flag" in self.config:
-            self.check_box_launch_options.setChecked(self.config["launch_options_flag"])
-            self.line_edit_launch_options.setEnabled(not self.config["launch_options_flag"])
-
-        self.timed_detection_timer_1000 = QTimer(self)
-        self.timed_detection_timer_1000.timeout.connect(self.timed_detection_1000)
-        self.timed_detection_timer_1000.start(1000)
-        self.timed_detection_timer_5000 = QTimer(self)
-        self.timed_detection_timer_5000.timeout.connect(self.timed_detection_5000)
-        self.timed_detection_timer_5000.start(5000)
-        self.player_list_timer = QTimer(self)
-        self.player_list_timer.timeout.connect(self.timed_detection_timer_60000)
-        self.player_list_timer.start(60000)
-        
-        # 创建菜单栏并添加关于菜单项
-        self.create_menu_bar()
+        self.line_edit_launch_options.setText(config["launch_options_info"])
+        self.check_box_launch_options.setChecked(config["launch_options_flag"])
+        self.line_edit_launch_options.setEnabled(not config["launch_options_flag"])
+        self.update_player_table()
+
+    def server_event(self, instance, event, data):
+        """supervisor 事件（在界面线程中执行）"""
+        if event == "notice":
+            message_type, message = data
+            if len(self.supervisor.instances) > 1:
+                message = f"[{instance.name}] {message}"
+            self.console_log.append(message_type, message)
+        elif event == "servers":
+            # 服务器列表变化（连接后台服务时可能由其他客户端修改）
+            if self.server not in self.supervisor.instances:
+                self.server = self.supervisor.instances[0]
+                self.load_server_ui()
+            self.update_server_menu()
+        elif instance is not self.server:
+            return
+        elif event == "players":
+            self.update_player_table()
+        elif event == "connected":
+            flag, api_result = data
+            if flag:
+                self.label_server_version.setText(instance.server_version)
+                self.line_edit_api_addr.setText(instance.config["api_addr"])
+                self.line_edit_api_port.setText(str(instance.config["api_port"]))
+                self.line_edit_api_password.setText(instance.config["api_password"])
+
+    def closeEvent(self, event):
+        # 停止定时器并关闭 supervisor（连接后台服务时会把尚未推送的配置修改推送出去）
+        self.timed_detection_timer_1000.stop()
+        self.supervisor.shutdown()
+        super().closeEvent(event)
 
     def timed_detection_1000(self):
-        if self.server_run_flag:
-            if "palserver_pid" in self.config:
-                if psutil.pid_exists(self.config["palserver_pid"]) is False:
-                    self.server_run_flag = False
-                    if self.config["crash_detection_flag"]:
-                        self.text_browser_api_server_notice("client_error", "检测到服务端崩溃，开始重启 ！")
-                        self.button_game_start_click()
-        else:
-            if "palserver_pid" in self.config:
-                if psutil.pid_exists(self.config["palserver_pid"]):
-                    self.server_run_flag = True
+        self.supervisor.tick()
 
-        if self.server_run_flag:
+        if self.server.server_run_flag:
             self.label_server_status.setText("正在运行")
             self.label_server_status.setStyleSheet("color:green")
         else:
             self.label_server_status.setText("已停止")
             self.label_server_status.setStyleSheet("color:red")
-        self.button_game_start.setEnabled(not self.server_run_flag)
-        self.button_game_stop.setEnabled(self.server_run_flag)
-        self.button_game_restart.setEnabled(self.server_run_flag)
-        self.button_game_kill.setEnabled(self.server_run_flag)
+        self.button_game_start.setEnabled(not self.server.server_run_flag)
+        self.button_game_stop.setEnabled(self.server.server_run_flag)
+        self.button_game_restart.setEnabled(self.server.server_run_flag)
+        self.button_game_kill.setEnabled(self.server.server_run_flag)
         # 服务器名称和描述设置为只读，总是从配置文件读取
         self.text_edit_server_name.setEnabled(False)
         self.text_edit_server_description.setEnabled(False)
         self.button_edit_server_name.setEnabled(False)
 
-        self.line_edit_command.setEnabled(self.rest_api_connect_flag)
-        self.button_send_command.setEnabled(self.rest_api_connect_flag)
-        self.button_countdown_stop.setEnabled(self.rest_api_connect_flag)
-        self.button_broadcast.setEnabled(self.rest_api_connect_flag)
-
-        if self.config["auto_restart_flag"] and self.server_run_flag:
-            if self.server_run_time + timedelta(seconds=self.config["auto_restart_time_limit"]) < datetime.now():
-                if self.config["auto_restart_player_flag"]:
-                    if len(self.player_list) <= self.config["auto_restart_player_limit"]:
-                        self.text_browser_api_server_notice("client_message", "检测到符合服务器自动重启条件，开始重启！")
-                        self.button_game_restart_click()
-                else:
-                    self.text_browser_api_server_notice("client_message", "检测到符合服务器自动重启条件，开始重启！")
-                    self.button_game_restart_click()
-
-        if self.config["auto_backup_flag"]:
-            if self.last_auto_backup_time + timedelta(seconds=self.config["auto_backup_time_limit"]) < datetime.now():
-                self.text_browser_api_server_notice("client_message", "检测到符合服务器自动备份标准，开始备份！")
-                old_dir_path = os.path.join(self.config["palserver_path"], r"../Pal/Saved/")
-                new_dir_path = os.path.join(self.config["backup_dir_path"], datetime.now().strftime("%Y%m%d %H-%M-%S"))
-                shutil.copytree(old_dir_path, new_dir_path)
-                self.text_browser_api_server_notice("client_success", "存档自动备份完成！备份路径：" + str(os.path.abspath(new_dir_path)))
-                self.last_auto_backup_time = datetime.now()
-
-    def timed_detection_5000(self):
-        try:
-            self.label_cpu_info.setText(str(psutil.cpu_percent(interval=0)) + " %")
-            self.label_mem_info.setText(str(round(psutil.virtual_memory().used / (1024 * 1024), 2)) + " MB / " + str(round(psutil.virtual_memory().total / (1024 * 1024), 2)) + " MB")
-            if self.server_run_flag:
-                mem_info = 0
-                psu_proc = psutil.Process(self.config["palserver_pid"])
-                pcs = psu_proc.children(recursive=True)
-                for proc in pcs:
-                    mem_info += proc.memory_full_info().rss
-                self.label_mem_info_2.setText(str(round(mem_info / (1024 * 1024), 2)) + " MB")
+        self.line_edit_command.setEnabled(self.server.rest_api_connect_flag)
+        self.button_send_command.setEnabled(self.server.rest_api_connect_flag)
+        self.button_countdown_stop.setEnabled(self.server.rest_api_connect_flag)
+        self.button_broadcast.setEnabled(self.server.rest_api_connect_flag)
+        if self.server.rest_api_connect_flag is False:
+            self.label_online_player.setText("未连接REST API")
+        self.update_resource_labels()
+        self.update_api_health()
+
+    def update_resource_labels(self):
+        """资源占用由 supervisor 每5秒在后台采集，这里只显示缓存的结果"""
+        system_stats = self.supervisor.system_stats
+        self.label_cpu_info.setText(str(system_stats["cpu"]) + " %")
+        if system_stats["memory_total"]:
+            self.label_mem_info.setText(str(round(system_stats["memory_used"] / (1024 * 1024), 2)) + " MB / " + str(round(system_stats["memory_total"] / (1024 * 1024), 2)) + " MB")
+        stats = self.server.stats
+        self.label_mem_info_2.setText(str(round(stats["memory"] / (1024 * 1024), 2)) + " MB")
+        for label, disk_usage in ((self.label_disk_info, stats["disk"]), (self.label_disk_info_2, stats["backup_disk"])):
+            if disk_usage is None:
+                label.setText("未设置")
             else:
-                self.label_mem_info_2.setText("0 MB")
-        except:
-            return
-
-        if "palserver_path" in self.config:
-            total, used, free = shutil.disk_usage(self.config["palserver_path"])
-            self.label_disk_info.setText(str(round(used / (1024 * 1024 * 1024), 2)) + " GB / " + str(round(total / (1024 * 1024 * 1024), 2)) + " GB")
-        else:
-            self.label_disk_info.setText("未设置")
-
-        if "backup_dir_path" in self.config:
-            total, used, free = shutil.disk_usage(self.config["backup_dir_path"])
-            self.label_disk_info_2.setText(str(round(used / (1024 * 1024 * 1024), 2)) + " GB / " + str(round(total / (1024 * 1024 * 1024), 2)) + " GB")
+                used, total = disk_usage
+                label.setText(str(round(used / (1024 * 1024 * 1024), 2)) + " GB / " + str(round(total / (1024 * 1024 * 1024), 2)) + " GB")
+
+    def update_api_health(self):
+        """REST API 连接健康度：服务器版本文字的颜色，详情显示在悬停提示中"""
+        health = self.server.api_health()
+        if health is None:
+            self.label_server_version.setStyleSheet("")
+            tooltip = "未连接REST API"
         else:
-            self.label_disk_info_2.setText("未设置")
+            if self.server.rest_api_connect_flag is False:
+                color = "red"
+            elif health["score"] < API_HEALTHY_SCORE:
+                color = "orange"
+            else:
+                color = "green"
+            self.label_server_version.setStyleSheet("color:" + color)
+            errors = "，".join(f"{API_ERROR_NAMES.get(name, name)} {count}" for name, count in health["errors"].items()) or "无"
+            tooltip = (f"REST API 健康度：{health['score']}%\n"
+                       f"平均耗时：{health['avg_latency'] * 1000:.0f} ms\n"
+                       f"连续失败：{health['consecutive_failures']} 次\n"
+                       f"错误统计：{errors}")
+            if health["last_error"]:
+                tooltip += "\n最近错误：" + health["last_error"]
+            if health.get("circuit") == "open":
+                tooltip += f"\n连续请求失败，{int(health['circuit_remaining']) + 1} 秒后自动探测"
+        self.label_server_version.setToolTip(tooltip)
+        self.label_online_player.setToolTip(tooltip)
 
     def timed_detection_timer_60000(self):
-        if self.rest_api_connect_flag is False:
+        """立即刷新当前服务器的玩家列表（定时刷新由 supervisor 负责）"""
+        if self.server.rest_api_connect_flag is False:
             self.label_online_player.setText("未连接REST API")
             return
+        self.supervisor.poll_players(self.server)
 
+    def update_player_table(self):
         self.table_widget_player_list.clearContents()
         self.table_widget_player_list.setRowCount(0)
-
-        self.player_list_menu = QMenu(self)
-        kick_action = QAction('踢出该玩家', self)
-        kick_action.triggered.connect(self.kick_player)
-        ban_action = QAction('封禁该玩家', self)
-        ban_action.triggered.connect(self.ban_player)
-        copy_uid_action = QAction('复制玩家UID', self)
-        copy_uid_action.triggered.connect(self.copy_uid)
-        copy_steamid_action = QAction('复制玩家StramID', self)
-        copy_steamid_action.triggered.connect(self.copy_steamid)
-        self.player_list_menu.addAction(kick_action)
-        self.player_list_menu.addAction(ban_action)
-        self.player_list_menu.addAction(copy_uid_action)
-        self.player_list_menu.addAction(copy_steamid_action)
-        self.table_widget_player_list.setContextMenuPolicy(Qt.CustomContextMenu)
-        self.table_widget_player_list.customContextMenuRequested.connect(self.show_player_list_menu)
-
-        flag, api_result = self.pal_rest_api.get_players()
-        if flag is False:
-            self.rest_api_connect_flag = False
-            self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-            return
-        player_list = api_result["players"] if "players" in api_result else []
         player_id = 0
-        self.player_list = []
-        for player in player_list:
-            if player == "":
-                continue
-            # player_info = player.split(",")  # Old RCON format
-            # if len(player_info) < 3:
-            #     continue
-            self.player_list.append(player)
+        for player in self.server.player_list:
             self.table_widget_player_list.insertRow(player_id)
             item = QTableWidgetItem(player["name"] if "name" in player else "")
             item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
+            # 行对应的玩家保存在单元格中：工作线程会先替换 player_list 再重绘表格，不能按行号回查 player_list
+            item.setData(Qt.UserRole, dict(player))
             self.table_widget_player_list.setItem(player_id, 0, item)
             item = QTableWidgetItem(str(player["level"]) if "level" in player else "")
             item.setTextAlignment(Qt.AlignHCenter | Qt.AlignVCenter)
@@ -274,173 +331,197 @@ class Window(QMainWindow):
             self.table_widget_player_list.setItem(player_id, 2, item)
             player_id += 1
 
-        self.label_online_player.setText(str(player_id) + "/" + str(self.config["game_player_limit"]))
+        if self.server.rest_api_connect_flag:
+            self.label_online_player.setText(str(player_id) + "/" + str(self.server.config["game_player_limit"]))
+        else:
+            self.label_online_player.setText("未连接REST API")
+
+    def selected_players(self):
+        """
+        选中的玩家（多选时按行号排序）
+
+        返回:
+            [(玩家ID, 名称), ...]
+        """
+        players = []
+        for player in self.selected_player_data():
+            if player.get("userId", ""):
+                players.append((player["userId"], player.get("name", "")))
+        return players
+
+    def selected_player_data(self):
+        """选中行保存的玩家信息（update_player_table 写入），按行号排序"""
+        rows = sorted({item.row() for item in self.table_widget_player_list.selectedItems()})
+        players = []
+        for row in rows:
+            item = self.table_widget_player_list.item(row, 0)
+            player = item.data(Qt.UserRole) if item is not None else None
+            if player:
+                players.append(player)
+        return players
+
+    def moderate_players(self, action, players, confirm=True):
+        """
+        批量踢出/封禁/解封，在工作线程中以有限并发执行，结果逐个输出到控制台，全部完成后刷新一次玩家列表
+
+        参数:
+            players: [(玩家ID, 名称), ...]
+            confirm: 多名玩家时是否先确认
+        """
+        if not players:
+            return
+        title = player_moderation.ACTIONS[action][2]
+        if self.server.rest_api_connect_flag is False:
+            self.text_browser_api_server_notice("client_error", "REST API 未连接，无法" + title + "玩家")
+            return
+        if confirm and len(players) > 1:
+            reply = QMessageBox.question(self, "批量" + title, f"确定要{title}以下 {len(players)} 名玩家吗？\n\n" +
+                                         "\n".join(f"{user_id}  {name}" for user_id, name in players[:20]) +
+                                         ("\n..." if len(players) > 20 else ""), QMessageBox.Yes | QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                return
+        self.text_browser_api_server_notice("client_command", f"{title}玩家: " + ", ".join(user_id for user_id, _ in players))
+        if not self.supervisor.moderate(self.server, action, players):
+            self.text_browser_api_server_notice("client_error", "上一批玩家操作还未完成，请稍后再试")
 
     def kick_player(self):
-        selected_items = self.table_widget_player_list.selectedItems()
-        if selected_items:
-            selected_row = selected_items[0].row()
-            player_user_id = self.player_list[selected_row].get("userId", "")
-            if player_user_id:
-                command = "踢出玩家: " + player_user_id
-                self.text_browser_api_server_notice("client_command", command)
-                flag, api_result = self.pal_rest_api.kick_player(player_user_id)
-                if flag:
-                    self.text_browser_api_server_notice("server_success", "玩家踢出成功")
-                else:
-                    self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-        self.timed_detection_timer_60000()
+        self.moderate_players(player_moderation.ACTION_KICK, self.selected_players())
 
     def ban_player(self):
-        selected_items = self.table_widget_player_list.selectedItems()
-        if selected_items:
-            selected_row = selected_items[0].row()
-            player_user_id = self.player_list[selected_row].get("userId", "")
-            if player_user_id:
-                command = "封禁玩家: " + player_user_id
-                self.text_browser_api_server_notice("client_command", command)
-                flag, api_result = self.pal_rest_api.ban_player(player_user_id)
-                if flag:
-                    self.text_browser_api_server_notice("server_success", "玩家封禁成功")
-                else:
-                    self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-        self.timed_detection_timer_60000()
+        self.moderate_players(player_moderation.ACTION_BAN, self.selected_players())
+
+    def moderate_pasted_ids(self, action):
+        title = player_moderation.ACTIONS[action][2]
+        text, flag = QInputDialog.getMultiLineText(self, "批量" + title, "粘贴玩家ID（steam_xxx 或 SteamID64，每行一个，也可以直接粘贴包含ID的文本）：")
+        if not flag:
+            return
+        user_ids = player_moderation.parse_user_ids(text)
+        if not user_ids:
+            QMessageBox.warning(self, "批量" + title, "没有找到玩家ID")
+            return
+        names = {player.get("userId"): player.get("name", "") for player in self.server.player_list}
+        self.moderate_players(action, [(user_id, names.get(user_id, "")) for user_id in user_ids])
+
+    def import_ban_list(self):
+        """导入封禁列表（导出的文件或其他服务器的 banlist.txt），批量封禁其中的玩家"""
+        path, _ = QFileDialog.getOpenFileName(self, "导入封禁列表", "", "封禁列表 (*.txt);;所有文件 (*)")
+        if not path:
+            return
+        try:
+            players = player_moderation.load_ban_list(path)
+        except (OSError, UnicodeDecodeError) as e:
+            QMessageBox.critical(self, "导入封禁列表", "读取文件失败：" + str(e))
+            return
+        if not players:
+            QMessageBox.warning(self, "导入封禁列表", "文件中没有玩家ID")
+            return
+        self.moderate_players(player_moderation.ACTION_BAN, players)
+
+    def export_ban_list(self):
+        """导出当前服务器由本工具封禁（且未解封）的玩家"""
+        if self.event_log is None:
+            QMessageBox.warning(self, "导出封禁列表", "事件日志不可用，无法导出封禁列表")
+            return
+        players = player_moderation.banned_players(self.event_log, self.server.name)
+        if not players:
+            QMessageBox.information(self, "导出封禁列表", "事件日志中没有该服务器封禁的玩家")
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "导出封禁列表", "banlist.txt", "封禁列表 (*.txt)")
+        if not path:
+            return
+        try:
+            player_moderation.save_ban_list(path, players, self.server.name)
+        except OSError as e:
+            QMessageBox.critical(self, "导出封禁列表", "保存文件失败：" + str(e))
+            return
+        self.text_browser_api_server_notice("client_success", f"已导出 {len(players)} 名封禁玩家：{path}")
 
     def copy_uid(self):
-        selected_items = self.table_widget_player_list.selectedItems()
-        if selected_items:
-            selected_row = selected_items[0].row()
-            player_uid = self.player_list[selected_row].get("userId", "")
-            pyperclip.copy(player_uid)
+        players = self.selected_players()
+        if players:
+            pyperclip.copy("\n".join(user_id for user_id, _ in players))
 
     def copy_steamid(self):
-        selected_items = self.table_widget_player_list.selectedItems()
-        if selected_items:
-            selected_row = selected_items[0].row()
+        players = self.selected_player_data()
+        if players:
             # 尝试获取SteamID，可能的字段名包括steamId、SteamID等
-            player_steamid = self.player_list[selected_row].get("steamId", "")
+            player_steamid = players[0].get("steamId", "")
             if not player_steamid:
-                player_steamid = self.player_list[selected_row].get("SteamID", "")
+                player_steamid = players[0].get("SteamID", "")
             pyperclip.copy(player_steamid)
 
     def text_browser_api_server_notice(self, message_type, message):
-        cursor = self.text_browser_api_server.textCursor()
-        cursor.movePosition(QTextCursor.End)
-        self.text_browser_api_server.setTextCursor(cursor)
-        black_format = QTextCharFormat()
-        black_format.setForeground(QColor("black"))
-        red_format = QTextCharFormat()
-        red_format.setForeground(QColor("red"))
-        green_format = QTextCharFormat()
-        green_format.setForeground(QColor("green"))
-        blue_format = QTextCharFormat()
-        blue_format.setForeground(QColor("blue"))
-        grey_format = QTextCharFormat()
-        grey_format.setForeground(QColor(190, 190, 190))
-        sky_blue_format = QTextCharFormat()
-        sky_blue_format.setForeground(QColor(135, 206, 235))
-        dark_violet_format = QTextCharFormat()
-        dark_violet_format.setForeground(QColor(148, 0, 211))
-        olive_drab_format = QTextCharFormat()
-        olive_drab_format.setForeground(QColor(105, 139, 34))
-        self.text_browser_api_server.setCurrentCharFormat(dark_violet_format)
-        self.text_browser_api_server.append(datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-        if message_type == "client_success":
-            self.text_browser_api_server.setCurrentCharFormat(sky_blue_format)
-            self.text_browser_api_server.insertPlainText("  CLIENT: ")
-            self.text_browser_api_server.setCurrentCharFormat(green_format)
-            self.text_browser_api_server.insertPlainText("[SUCCESS] ")
-        if message_type == "client_message":
-            self.text_browser_api_server.setCurrentCharFormat(sky_blue_format)
-            self.text_browser_api_server.insertPlainText("  CLIENT: ")
-            self.text_browser_api_server.setCurrentCharFormat(olive_drab_format)
-            self.text_browser_api_server.insertPlainText("[MESSAGE] ")
-        if message_type == "client_error":
-            self.text_browser_api_server.setCurrentCharFormat(sky_blue_format)
-            self.text_browser_api_server.insertPlainText("  CLIENT: ")
-            self.text_browser_api_server.setCurrentCharFormat(red_format)
-            self.text_browser_api_server.insertPlainText("  [ERROR] ")
-        if message_type == "client_command":
-            self.text_browser_api_server.setCurrentCharFormat(sky_blue_format)
-            self.text_browser_api_server.insertPlainText("  CLIENT: ")
-            self.text_browser_api_server.setCurrentCharFormat(blue_format)
-            self.text_browser_api_server.insertPlainText("[COMMAND] ")
-        if message_type == "server_success":
-            self.text_browser_api_server.setCurrentCharFormat(grey_format)
-            self.text_browser_api_server.insertPlainText("  SERVER: ")
-            self.text_browser_api_server.setCurrentCharFormat(green_format)
-            self.text_browser_api_server.insertPlainText("[SUCCESS] ")
-        self.text_browser_api_server.setCurrentCharFormat(black_format)
-        self.text_browser_api_server.insertPlainText(message)
-        self.text_browser_api_server.ensureCursorVisible()
+        self.console_log.append(message_type, message)
+
+    def record_event(self, event_type, message, **data):
+        """写入持久化事件日志（记录当前服务器名称），写入失败不影响界面操作"""
+        self.supervisor.record_event(self.server, event_type, message, **data)
 
     def save_config_json(self):
-        json_operation.save_json(self.config_path, self.config)
+        self.supervisor.save_config()
 
-    def check_palserver_path(self):
-        if "palserver_path" not in self.config:
+    def run_server_task(self, task_name, function, success_message=None, callback=None, message_type="server_success"):
+        """
+        在工作线程中执行当前服务器的操作，结果以控制台消息显示（连接后台服务时操作需要经过网络，不能在界面线程中等待）
+
+        参数:
+            function: 无参数的可调用对象，返回 (flag, 结果)
+            success_message / callback / message_type: 见 ServerSupervisor.perform
+
+        返回:
+            是否已提交（同一服务器的同名操作还在执行时不重复提交）
+        """
+        if not self.supervisor.perform(self.server, task_name, function, success_message, callback, message_type):
+            self.text_browser_api_server_notice("client_error", "上一个相同的操作还未完成，请稍后再试")
             return False
+        return True
 
-        if os.path.isfile(self.config["palserver_path"]) is False:
-            self.line_edit_palserver_path.setText("")
-            self.config.pop("palserver_path")
-            self.save_config_json()
-            self.text_browser_api_server_notice("client_error", "检测到 PalServer.exe 文件不存在，请重新选择！")
+    def check_palserver_path(self):
+        if "palserver_path" not in self.server.config:
             return False
 
-        self.palserver_settings_path = os.path.abspath(os.path.join(self.config["palserver_path"], r"../Pal/Saved/Config/WindowsServer/PalWorldSettings.ini"))
-        if os.path.isfile(self.palserver_settings_path) is False:
+        flag, message = self.server.check_palserver_path()
+        if flag is False:
             self.line_edit_palserver_path.setText("")
-            self.config.pop("palserver_path")
-            self.save_config_json()
-            self.text_browser_api_server_notice("client_error", "服务端路径下的 /Pal/Saved/Config/WindowsServer/PalWorldSettings.ini 配置文件不存在，请启动一次PalServer.exe，或检查服务端完整性！")
+            self.text_browser_api_server_notice("client_error", message)
             return False
 
-        self.line_edit_palserver_path.setText(self.config["palserver_path"])
-        if os.stat(self.palserver_settings_path).st_size < 10:
-            self.text_browser_api_server_notice("client_success", "检测到 服务端路径下的 /Pal/Saved/Config/WindowsServer/PalWorldSettings.ini 配置文件大小不正确，正在重新初始化。")
-            settings_file_operation.default_setting(self.palserver_settings_path)
-
-        self.save_config_json()
+        self.line_edit_palserver_path.setText(self.server.config["palserver_path"])
         self.button_open_settings_dir.setEnabled(True)
         # 启用获取REST API连接信息按钮
         self.button_get_api_config.setEnabled(True)
 
-        try:
-            self.option_settings_dict = settings_file_operation.load_setting(self.palserver_settings_path)
-        except Exception as e:
-            self.text_browser_api_server_notice("client_error", f"配置文件解析出错: {str(e)}，使用空配置继续")
-            self.option_settings_dict = {}
-
         # 获取ServerName和ServerDescription，没有默认值
-        server_name = self.option_settings_dict.get("ServerName", "")
-        server_description = self.option_settings_dict.get("ServerDescription", "")
+        server_name = self.server.option_settings_dict.get("ServerName", "")
+        server_description = self.server.option_settings_dict.get("ServerDescription", "")
         
         self.text_edit_server_name.setText(server_name)
         self.text_edit_server_description.setText(server_description)
+        return True
 
     def button_select_file_click(self):
-        """选择PalServer.exe文件按钮点击事件"""
+        """选择PalServer.exe（Linux 服务端为 PalServer.sh）文件按钮点击事件"""
         # 定义授权成功后的回调函数
         def authorize_success():
             """授权成功后执行的操作"""
-            qfile_dialog = QFileDialog.getOpenFileName(self, "选择文件", "/", "PalServer (PalServer.exe)")
-            self.config["palserver_path"] = qfile_dialog[0]
+            qfile_dialog = QFileDialog.getOpenFileName(self, "选择文件", "/", platform_paths.launcher_filter())
+            self.server.config["palserver_path"] = qfile_dialog[0]
             self.save_config_json()
-            self.text_browser_api_server_notice("client_success", "已获取PalServer.exe路径：" + qfile_dialog[0])
+            self.text_browser_api_server_notice("client_success", "已获取服务端启动文件路径：" + qfile_dialog[0])
             self.check_palserver_path()
         
         # 调用B站授权验证
+        from utils import bili_authorization
         bili_authorization.verify_bilibili_follow(callback=authorize_success, show_cache_message=False)
 
     def button_open_settings_dir_click(self):
-        os.system("explorer /select,\"" + str(os.path.abspath(self.palserver_settings_path)) + "\"")
+        platform_paths.open_in_file_manager(self.server.palserver_settings_path)
         self.text_browser_api_server_notice("client_success", "已打开 配置文件夹 目录，请修改REST API相关字段")
 
     def button_get_api_config_click(self):
         # Reload settings from file to ensure we're using the latest configuration
         try:
-            self.option_settings_dict = settings_file_operation.load_setting(self.palserver_settings_path)
+            self.server.load_settings()
         except Exception as e:
             self.text_browser_api_server_notice("client_error", f"重新加载配置文件出错: {str(e)}")
             return
@@ -450,74 +531,73 @@ class Window(QMainWindow):
         # So we no longer require RCONEnabled to be True for REST API functionality
         
         # 检查 REST API 是否已启用
-        if 'RESTAPIEnabled' not in self.option_settings_dict:
+        if 'RESTAPIEnabled' not in self.server.option_settings_dict:
             self.text_browser_api_server_notice("client_error", "配置文件中 RESTAPIEnabled 未配置，请修改为 True 或使用自动配置！")
             QMessageBox.critical(self, "错误", "配置文件中 RESTAPIEnabled 未配置，请修改为 True 或使用自动配置！")
             return
         
-        if self.option_settings_dict.get('RESTAPIEnabled') != "True":
+        if self.server.option_settings_dict.get('RESTAPIEnabled') != "True":
             self.text_browser_api_server_notice("client_error", "配置文件中 RESTAPIEnabled 未启用，请修改为 True 或使用自动配置！")
             QMessageBox.critical(self, "错误", "配置文件中 RESTAPIEnabled 未启用，请修改为 True 或使用自动配置！")
             return
         
         # 检查 AdminPassword 是否已配置
-        if 'AdminPassword' not in self.option_settings_dict:
+        if 'AdminPassword' not in self.server.option_settings_dict:
             self.text_browser_api_server_notice("client_error", "配置文件中 AdminPassword 未配置，请设置密码或使用自动配置！")
             QMessageBox.critical(self, "错误", "配置文件中 AdminPassword 未配置，请设置密码或使用自动配置！")
             return
         
-        admin_password = self.option_settings_dict.get('AdminPassword', '').replace('"', '')
+        admin_password = self.server.option_settings_dict.get('AdminPassword', '').replace('"', '')
         if not admin_password:
             self.text_browser_api_server_notice("client_error", "配置文件中 AdminPassword 为空，请设置密码或使用自动配置！")
             QMessageBox.critical(self, "错误", "配置文件中 AdminPassword 为空，请设置密码或使用自动配置！")
             return
         
-        self.config["api_addr"] = "127.0.0.1"
+        self.server.config["api_addr"] = "127.0.0.1"
         
         # Use RESTAPIPort if available, otherwise fall back to RCONPort for backward compatibility
-        if "RESTAPIPort" in self.option_settings_dict:
-            self.config["api_port"] = int(self.option_settings_dict["RESTAPIPort"])
+        if "RESTAPIPort" in self.server.option_settings_dict:
+            self.server.config["api_port"] = int(self.server.option_settings_dict["RESTAPIPort"])
         else:
-            self.config["api_port"] = int(self.option_settings_dict["RCONPort"])
+            self.server.config["api_port"] = int(self.server.option_settings_dict["RCONPort"])
             
-        self.config["api_password"] = self.option_settings_dict["AdminPassword"].replace("\"", "")
+        self.server.config["api_password"] = self.server.option_settings_dict["AdminPassword"].replace("\"", "")
         self.save_config_json()
         self.line_edit_api_addr.setText("127.0.0.1")
         
         # Update the UI with the correct port
-        if "RESTAPIPort" in self.option_settings_dict:
-            self.line_edit_api_port.setText(str(self.option_settings_dict["RESTAPIPort"]))
+        if "RESTAPIPort" in self.server.option_settings_dict:
+            self.line_edit_api_port.setText(str(self.server.option_settings_dict["RESTAPIPort"]))
         else:
-            self.line_edit_api_port.setText(str(self.option_settings_dict["RCONPort"]))
+            self.line_edit_api_port.setText(str(self.server.option_settings_dict["RCONPort"]))
             
-        self.line_edit_api_password.setText(self.option_settings_dict["AdminPassword"].replace("\"", ""))
+        self.line_edit_api_password.setText(self.server.option_settings_dict["AdminPassword"].replace("\"", ""))
         self.text_browser_api_server_notice("client_success", "已获取配置文件中的 REST API 连接信息")
 
     def button_automatic_api_click(self):
         # Enable both RCON and REST API
-        self.option_settings_dict['RCONEnabled'] = True
-        self.option_settings_dict['RCONPort'] = 25575
+        self.server.option_settings_dict['RCONEnabled'] = True
+        self.server.option_settings_dict['RCONPort'] = 25575
         
         # Enable REST API if supported
-        self.option_settings_dict['RESTAPIEnabled'] = True
+        self.server.option_settings_dict['RESTAPIEnabled'] = True
         
         # Use existing RESTAPIPort if it's already set in the file, otherwise use default 8211
-        if "RESTAPIPort" not in self.option_settings_dict:
-            self.option_settings_dict['RESTAPIPort'] = 8211
+        if "RESTAPIPort" not in self.server.option_settings_dict:
+            self.server.option_settings_dict['RESTAPIPort'] = 8211
             
         admin_password = random_password.random_string()
-        self.option_settings_dict['AdminPassword'] = "\"" + admin_password + "\""
-        new_option_settings = ','.join(f"{key}={value}" for key, value in self.option_settings_dict.items())
-        settings_file_operation.save_setting(self.palserver_settings_path, new_option_settings)
-        self.config["api_addr"] = "127.0.0.1"
+        self.server.option_settings_dict['AdminPassword'] = "\"" + admin_password + "\""
+        self.server.save_settings()
+        self.server.config["api_addr"] = "127.0.0.1"
         
         # Use the actual RESTAPIPort value from the settings
-        self.config["api_port"] = int(self.option_settings_dict['RESTAPIPort'])
-        self.config["api_password"] = admin_password
+        self.server.config["api_port"] = int(self.server.option_settings_dict['RESTAPIPort'])
+        self.server.config["api_password"] = admin_password
         self.save_config_json()
-        self.line_edit_api_addr.setText(self.config["api_addr"])
-        self.line_edit_api_port.setText(str(self.config["api_port"]))
-        self.line_edit_api_password.setText(self.config["api_password"])
+        self.line_edit_api_addr.setText(self.server.config["api_addr"])
+        self.line_edit_api_port.setText(str(self.server.config["api_port"]))
+        self.line_edit_api_password.setText(self.server.config["api_password"])
         self.text_browser_api_server_notice("client_success", "已自动配置 REST API 连接信息，已生成随机密码：" + admin_password)
 
     def line_edit_api_textchange(self):
@@ -537,147 +617,47 @@ class Window(QMainWindow):
             self.text_browser_api_server_notice("client_error", "REST API 端口需在1000~65534范围，请重新输入！")
             return
 
-        # 尝试使用用户提供的密码进行认证
-        self.pal_rest_api = PalRestAPI(api_addr, int(api_port), "admin", api_password)
-        flag, api_result = self.pal_rest_api.get_server_info()
-        
-        # 如果认证失败，尝试常见的默认密码
-        if flag is False and "Unauthorized" in api_result:
-            self.text_browser_api_server_notice("client_message", "尝试使用默认密码...")
-            # 尝试常见默认密码
-            default_passwords = ['123456', 'admin', 'password']
-            for pwd in default_passwords:
-                # 跳过用户已经尝试过的密码
-                if pwd == api_password:
-                    continue
-                    
-                self.pal_rest_api = PalRestAPI(api_addr, int(api_port), "admin", pwd)
-                flag, api_result = self.pal_rest_api.get_server_info()
-                if flag is True:
-                    # 使用成功的默认密码更新配置
-                    api_password = pwd
-                    self.line_edit_api_password.setText(pwd)
-                    self.text_browser_api_server_notice("client_message", f"使用默认密码 {pwd} 认证成功！")
-                    break
-        
-        if flag is False:
-            self.rest_api_connect_flag = False
-            self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-            return
-        
-        # Extract server version from the response
-        server_version = api_result["version"] if "version" in api_result else "Unknown"
-        self.label_server_version.setText(server_version)
-        self.config["api_addr"] = api_addr
-        self.config["api_port"] = int(api_port)
-        self.config["api_password"] = api_password
-        self.save_config_json()
-        self.rest_api_connect_flag = True
-        self.text_browser_api_server_notice("client_success", "REST API 服务器连接成功")
+        # 在共用线程池中连接（未授权时会尝试常见默认密码），结果以 connected 事件返回
+        self.text_browser_api_server_notice("client_message", "正在连接 REST API 服务器...")
+        self.supervisor.connect(self.server, api_addr, int(api_port), api_password)
 
     def check_box_launch_options_click(self, flag):
         self.line_edit_launch_options.setEnabled(not flag)
 
     def button_game_start_click(self):
-        if "palserver_path" not in self.config:
-            self.text_browser_api_server_notice("client_error", "请先选择PalServer.exe服务端文件！")
+        if "palserver_path" not in self.server.config:
+            self.text_browser_api_server_notice("client_error", "请先选择PalServer.exe / PalServer.sh服务端文件！")
             return
 
         game_port = self.line_edit_game_port.text()
         game_publicport = self.line_edit_game_publicport.text()
         game_player_limit = self.line_edit_game_player_limit.text()
-        if game_port.isdigit() is False:
-            self.text_browser_api_server_notice("client_error", "游戏 连接端口只能为数字，请重新输入！")
-            return
-        if int(game_port) < 1000 or int(game_port) > 65534:
-            self.text_browser_api_server_notice("client_error", "游戏 连接端口需在1000~65534范围，请重新输入！")
-            return
-        if game_publicport.isdigit() is False:
-            self.text_browser_api_server_notice("client_error", "游戏 查询端口只能为数字，请重新输入！")
-            return
-        if int(game_publicport) < 1000 or int(game_publicport) > 65534:
-            self.text_browser_api_server_notice("client_error", "游戏 查询端口需在1000~65534范围，请重新输入！")
-            return
-        if game_player_limit.isdigit() is False:
-            self.text_browser_api_server_notice("client_error", "游戏 人数上限只能为数字，请重新输入！")
-            return
-        if int(game_player_limit) < 2 or int(game_player_limit) > 128:
-            self.text_browser_api_server_notice("client_error", "游戏 人数上限需在2~128范围，请重新输入！")
+        flag, message = server_instance.validate_launch(game_port, game_publicport, game_player_limit)
+        if flag is False:
+            self.text_browser_api_server_notice("client_error", message)
             return
 
-        self.config["launch_options_flag"] = self.check_box_launch_options.isChecked()
-        self.config["launch_options_info"] = self.line_edit_launch_options.text()
-        command = self.config["palserver_path"] + " -port=" + game_port + " -players=" + game_player_limit + " -publicip 0.0.0.0 -publicport " + game_publicport
-        if self.config["launch_options_flag"]:
-            command += " " + self.config["launch_options_info"]
-        process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=False)
-        self.config["game_port"] = int(game_port)
-        self.config["game_publicport"] = int(game_publicport)
-        self.config["game_player_limit"] = int(game_player_limit)
-        self.config["palserver_pid"] = process.pid
-        self.save_config_json()
-        self.text_browser_api_server_notice("client_success", "PalServer 服务器已启动，获取到进程PID：" + str(process.pid))
-        self.server_run_flag = True
-        self.server_run_time = datetime.now()
+        self.server.config["launch_options_flag"] = self.check_box_launch_options.isChecked()
+        self.server.config["launch_options_info"] = self.line_edit_launch_options.text()
+        instance = self.server
+        self.run_server_task("start", lambda: instance.start(game_port, game_publicport, game_player_limit),
+                             lambda pid: "PalServer 服务器已启动，获取到进程PID：" + str(pid), message_type="client_success")
 
     def button_game_stop_click(self):
-        if self.rest_api_connect_flag is False:
+        if self.server.rest_api_connect_flag is False:
             self.text_browser_api_server_notice("client_error", "请先连接REST API ！")
             return
         command = "停止 游戏服务器"
         self.text_browser_api_server_notice("client_command", command)
-        flag, api_result = self.pal_rest_api.shutdown_server(1, "服务器将在1秒后停止!!!")
-        if flag is False:
-            self.rest_api_connect_flag = False
-            self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-            return
-        self.text_browser_api_server_notice("server_success", "服务器关闭命令发送成功")
-        self.server_run_flag = False
+        self.run_server_task("stop", self.server.stop, "服务器关闭命令发送成功")
 
     def button_game_restart_click(self):
-        if self.rest_api_connect_flag is False:
-            self.text_browser_api_server_notice("client_error", "请先连接 REST API ！")
-            return
-        self.server_run_flag = False
-        self.stop_countdown = 11
-        self.stop_timer = QTimer(self)
-        self.stop_timer.timeout.connect(self.broadcast_restart)
-        self.stop_timer.start(1000)
-
-    def broadcast_restart(self):
-        self.stop_countdown -= 1
-        if self.stop_countdown > 0:
-            command = "广播 服务器将在 " + str(int(self.stop_countdown)) + " 秒后重启!!!"
-            self.text_browser_api_server_notice("client_command", command)
-            flag, api_result = self.pal_rest_api.announce_message("服务器将在 " + str(int(self.stop_countdown)) + " 秒后重启!!!")
-            if flag is False:
-                self.rest_api_connect_flag = False
-                self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-                return
-            self.text_browser_api_server_notice("server_success", "消息广播成功")
-        elif self.stop_countdown == 0:
-            command = "停止游戏服务器"
-            self.text_browser_api_server_notice("client_command", command)
-            flag, api_result = self.pal_rest_api.shutdown_server(1, "服务器将在0秒后重启!!!")
-            if flag is False:
-                self.rest_api_connect_flag = False
-                self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-                return
-            self.server_run_flag = False
-            self.text_browser_api_server_notice("server_success", "服务器关闭命令发送成功")
-        elif self.stop_countdown == -10:
-            self.button_game_start_click()
-        elif self.stop_countdown == -20:
-            self.stop_timer.stop()
-            self.button_test_connect_click()
+        # 倒计时广播、关服、启动、重新连接由 supervisor 每秒推进
+        instance = self.server
+        self.run_server_task("begin_countdown", lambda: instance.begin_countdown(server_instance.COUNTDOWN_RESTART, 10))
 
     def button_game_kill_click(self):
-        self.server_run_flag = False
-        psu_proc = psutil.Process(self.config["palserver_pid"])
-        pcs = psu_proc.children(recursive=True)
-        for proc in pcs:
-            os.kill(proc.pid, 9)
-        self.text_browser_api_server_notice("client_success", "已强制停止服务端")
+        self.run_server_task("kill", self.server.kill, "已强制停止服务端", message_type="client_success")
 
     def button_send_command_click(self):
         command = self.line_edit_command.text()
@@ -685,79 +665,68 @@ class Window(QMainWindow):
             return
         self.text_browser_api_server_notice("client_command", command.replace("\n", ""))
         # For now, we'll map some common RCON commands to REST API equivalents
+        instance = self.server
+        moderation_action = None  # 踢出/封禁命令另外记录为对应的事件，与右键菜单的操作一致
+        user_id = ""
         if command.lower().startswith("broadcast "):
             message = command[10:]  # Extract message after "broadcast "
-            flag, api_result = self.pal_rest_api.announce_message(message)
+            api_call = ("announce_message", message)
         elif command.lower().startswith("kickplayer "):
-            user_id = command[11:]  # Extract user ID after "kickplayer "
-            flag, api_result = self.pal_rest_api.kick_player(user_id)
+            user_id = command[11:].strip()  # Extract user ID after "kickplayer "
+            moderation_action = player_moderation.ACTION_KICK
+            api_call = ("kick_player", user_id)
         elif command.lower().startswith("banplayer "):
-            user_id = command[10:]  # Extract user ID after "banplayer "
-            flag, api_result = self.pal_rest_api.ban_player(user_id)
+            user_id = command[10:].strip()  # Extract user ID after "banplayer "
+            moderation_action = player_moderation.ACTION_BAN
+            api_call = ("ban_player", user_id)
         elif command.lower() == "shutdown":
-            flag, api_result = self.pal_rest_api.shutdown_server(1, "服务器将在1秒后关闭!!!")
+            api_call = ("shutdown_server", 1, "服务器将在1秒后关闭!!!")
         else:
             # For unrecognized commands, show a message indicating REST API should be used
             self.text_browser_api_server_notice("client_error", "命令不支持通过REST API执行。请使用特定的UI按钮或检查REST API文档。")
             return
-            
-        if flag is False:
-            self.rest_api_connect_flag = False
-            self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-            return
-        self.text_browser_api_server_notice("server_success", "命令执行成功")
-        self.line_edit_command.setText("")
+
+        names = {player.get("userId"): player.get("name", "") for player in instance.player_list}
+
+        def record(api_result):
+            instance.record_event(event_log.EVENT_COMMAND, command.replace("\n", ""))
+            if moderation_action is not None:
+                _, event_type, title = player_moderation.ACTIONS[moderation_action]
+                instance.record_event(event_type, f"{title}玩家: {user_id}", user_id=user_id, name=names.get(user_id, ""))
+
+        if self.run_server_task("command", lambda: instance.call_api(*api_call), "命令执行成功", record):
+            self.line_edit_command.setText("")
 
     def show_player_list_menu(self, position):
         self.player_list_menu.exec_(self.table_widget_player_list.mapToGlobal(position))
 
     def button_countdown_stop_click(self):
-        if self.rest_api_connect_flag is False:
+        if self.server.rest_api_connect_flag is False:
             self.text_browser_api_server_notice("client_error", "请先连接 REST API ！")
             return
         value, flag = QInputDialog.getInt(self, "倒计时关服并广播", "设置多少时间后关服(秒)：", 60, 10, 999, 2)
         if flag:
-            self.stop_countdown = value + 1
-            self.stop_timer = QTimer(self)
-            self.stop_timer.timeout.connect(self.broadcast_stop)
-            self.stop_timer.start(1000)
-
-    def broadcast_stop(self):
-        self.stop_countdown -= 1
-        if self.stop_countdown > 0:
-            command = "广播 服务器将在 " + str(int(self.stop_countdown)) + " 秒后关闭!!!"
-            self.text_browser_api_server_notice("client_command", command)
-            flag, api_result = self.pal_rest_api.announce_message("服务器将在 " + str(int(self.stop_countdown)) + " 秒后关闭!!!")
-            if flag is False:
-                self.rest_api_connect_flag = False
-                self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-                return
-            self.text_browser_api_server_notice("server_success", "消息广播成功")
-        elif self.stop_countdown == 0:
-            self.button_game_stop_click()
-            self.stop_timer.stop()
+            instance = self.server
+            self.run_server_task("begin_countdown", lambda: instance.begin_countdown(server_instance.COUNTDOWN_STOP, value))
 
     def button_broadcast_click(self):
         value, flag = QInputDialog.getText(self, "广播", "请输入需要全服广播的内容：")
         if flag:
             command = "Broadcast " + value
             self.text_browser_api_server_notice("client_command", command)
-            flag, api_result = self.pal_rest_api.announce_message(value)
-            if flag is False:
-                self.rest_api_connect_flag = False
-                self.text_browser_api_server_notice("client_error", api_result.replace("\n", ""))
-                return
-            self.text_browser_api_server_notice("server_success", "消息广播成功")
+            instance = self.server
+            self.run_server_task("broadcast", lambda: instance.call_api("announce_message", value), "消息广播成功",
+                                 lambda api_result: instance.record_event(event_log.EVENT_BROADCAST, value))
 
     def check_box_crash_detection_click(self, flag):
-        self.config["crash_detection_flag"] = flag
+        self.server.config["crash_detection_flag"] = flag
         self.save_config_json()
 
     def check_box_auto_restart_click(self, flag):
-        self.config["auto_restart_flag"] = flag
+        self.server.config["auto_restart_flag"] = flag
         self.line_edit_auto_restart_time_limit.setEnabled(not flag)
         if flag:
-            self.config["auto_restart_time_limit"] = int(self.line_edit_auto_restart_time_limit.text())
+            self.server.config["auto_restart_time_limit"] = int(self.line_edit_auto_restart_time_limit.text())
         self.save_config_json()
 
     def line_edit_auto_restart_time_limit_textchange(self):
@@ -768,7 +737,7 @@ class Window(QMainWindow):
         if int(auto_restart_time_limit) < 600 or int(auto_restart_time_limit) > 86400:
             self.text_browser_api_server_notice("client_error", "重启时间 需在600~86400范围，请重新输入！")
             return
-        self.config["auto_restart_time_limit"] = int(auto_restart_time_limit)
+        self.server.config["auto_restart_time_limit"] = int(auto_restart_time_limit)
         self.save_config_json()
 
     def create_menu_bar(self):
@@ -776,11 +745,20 @@ class Window(QMainWindow):
         # 创建菜单栏
         menu_bar = self.menuBar()
         
+        # 服务器切换菜单：同一进程管理多个服务器，界面显示当前选中的服务器
+        self.server_menu = menu_bar.addMenu("")
+        self.update_server_menu()
+        
         # 直接将MOD管理作为菜单项添加到菜单栏（不是子菜单）
         mod_action = QAction("MOD管理", self)
         mod_action.triggered.connect(self.open_mod_manager)
         menu_bar.addAction(mod_action)
         
+        # 事件日志查询
+        event_log_action = QAction("事件日志", self)
+        event_log_action.triggered.connect(self.open_event_log)
+        menu_bar.addAction(event_log_action)
+        
         # 创建使用帮助菜单项
         help_action = QAction("使用帮助", self)
         help_action.triggered.connect(lambda: QDesktopServices.openUrl(QUrl("https://www.bilibili.com/video/BV1z6vzBwEgc/")))
@@ -791,6 +769,67 @@ class Window(QMainWindow):
         about_action.triggered.connect(self.about_clicked)
         menu_bar.addAction(about_action)
 
+    def update_server_menu(self):
+        """重建服务器切换菜单"""
+        self.server_menu.clear()
+        self.server_menu.setTitle("服务器: " + self.server.name)
+        action_group = QActionGroup(self.server_menu)
+        for instance in self.supervisor.instances:
+            action = QAction(instance.name, self.server_menu, checkable=True)
+            action.setChecked(instance is self.server)
+            action.triggered.connect(lambda checked, instance=instance: self.switch_server(instance))
+            action_group.addAction(action)
+            self.server_menu.addAction(action)
+        self.server_menu.addSeparator()
+        add_action = QAction("添加服务器", self.server_menu)
+        add_action.triggered.connect(self.add_server)
+        self.server_menu.addAction(add_action)
+        rename_action = QAction("重命名当前服务器", self.server_menu)
+        rename_action.triggered.connect(self.rename_server)
+        self.server_menu.addAction(rename_action)
+        remove_action = QAction("删除当前服务器", self.server_menu)
+        remove_action.triggered.connect(self.remove_server)
+        remove_action.setEnabled(self.server is not self.supervisor.instances[0])
+        self.server_menu.addAction(remove_action)
+
+    def switch_server(self, instance):
+        """切换界面显示的服务器；其他服务器的监控、定时任务不受影响"""
+        if instance is self.server:
+            return
+        self.server = instance
+        self.load_server_ui()
+        self.update_server_menu()
+        self.text_browser_api_server_notice("client_message", "已切换到服务器: " + instance.name)
+
+    def add_server(self):
+        name, flag = QInputDialog.getText(self, "添加服务器", "服务器名称：")
+        if not flag:
+            return
+        flag, result = self.supervisor.add_instance(name)
+        if flag is False:
+            QMessageBox.critical(self, "错误", result)
+            return
+        self.switch_server(result)
+
+    def rename_server(self):
+        name, flag = QInputDialog.getText(self, "重命名服务器", "服务器名称：", text=self.server.name)
+        if not flag:
+            return
+        flag, result = self.supervisor.rename_instance(self.server, name)
+        if flag is False:
+            QMessageBox.critical(self, "错误", result)
+            return
+        self.update_server_menu()
+
+    def remove_server(self):
+        if QMessageBox.question(self, "删除服务器", f"确定从管理工具中删除服务器 {self.server.name} 吗？（不会删除服务端文件）") != QMessageBox.Yes:
+            return
+        flag, result = self.supervisor.remove_instance(self.server)
+        if flag is False:
+            QMessageBox.critical(self, "错误", result)
+            return
+        self.switch_server(self.supervisor.instances[0])
+
     def about_clicked(self):
         """关于菜单项点击事件"""
         from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QPushButton, QHBoxLayout
@@ -885,11 +924,74 @@ class Window(QMainWindow):
     def open_mod_manager(self):
         """打开MOD管理器窗口"""
         try:
-            self.mod_manager_window = ModManagerQt()
+            from pal_mod_manager import ModManagerQt
+            self.mod_manager_window = ModManagerQt(self.server.palserver_path)
             self.mod_manager_window.show()
         except Exception as e:
             self.text_browser_api_server_notice("client_error", f"打开MOD管理器失败: {str(e)}")
 
+    def open_event_log(self):
+        """事件日志查询对话框"""
+        from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QComboBox, QSpinBox, QLineEdit, QPushButton, QTableWidget, QLabel
+
+        if self.event_log is None:
+            QMessageBox.critical(self, "错误", "事件日志不可用")
+            return
+        # 查询只使用只读连接，不会轮转正在写入的数据库
+        reader = event_log.EventLog(self.event_log.log_dir, readonly=True)
+
+        dialog = QDialog(self)
+        dialog.setWindowTitle("事件日志")
+        dialog.resize(900, 560)
+        layout = QVBoxLayout(dialog)
+
+        filter_layout = QHBoxLayout()
+        type_combo = QComboBox()
+        type_combo.addItem("全部类型", None)
+        for event_type, event_name in event_log.EVENT_TYPES.items():
+            type_combo.addItem(event_name, event_type)
+        days_spin = QSpinBox()
+        days_spin.setRange(1, 3650)
+        days_spin.setValue(30)
+        days_spin.setSuffix(" 天内")
+        keyword_edit = QLineEdit()
+        keyword_edit.setPlaceholderText("关键字")
+        search_button = QPushButton("查询")
+        filter_layout.addWidget(type_combo)
+        filter_layout.addWidget(days_spin)
+        filter_layout.addWidget(keyword_edit)
+        filter_layout.addWidget(search_button)
+        layout.addLayout(filter_layout)
+
+        result_table = QTableWidget(0, 3)
+        result_table.setHorizontalHeaderLabels(["时间", "类型", "描述"])
+        result_table.setColumnWidth(0, 150)
+        result_table.setColumnWidth(1, 80)
+        result_table.horizontalHeader().setStretchLastSection(True)
+        result_table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(result_table)
+        count_label = QLabel()
+        layout.addWidget(count_label)
+
+        def search():
+            event_type = type_combo.currentData()
+            events = list(reader.search(
+                [event_type] if event_type else None,
+                since=datetime.now() - timedelta(days=days_spin.value()),
+                text=keyword_edit.text().strip() or None,
+                limit=1000))
+            result_table.setRowCount(len(events))
+            for row, event in enumerate(events):
+                result_table.setItem(row, 0, QTableWidgetItem(event["time"].strftime("%Y-%m-%d %H:%M:%S")))
+                result_table.setItem(row, 1, QTableWidgetItem(event_log.EVENT_TYPES.get(event["event_type"], event["event_type"])))
+                result_table.setItem(row, 2, QTableWidgetItem(event["message"]))
+            count_label.setText(f"共 {len(events)} 条（最多显示1000条）")
+
+        search_button.clicked.connect(search)
+        keyword_edit.returnPressed.connect(search)
+        search()
+        dialog.exec_()
+
     def show_update_notes(self):
         """显示更新说明"""
         from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTextEdit, QPushButton, QHBoxLayout
@@ -932,10 +1034,10 @@ class Window(QMainWindow):
         dialog.exec_()
 
     def check_box_auto_restart_player_click(self, flag):
-        self.config["auto_restart_player_flag"] = flag
+        self.server.config["auto_restart_player_flag"] = flag
         self.line_edit_auto_restart_player_limit.setEnabled(not flag)
         if flag:
-            self.config["auto_restart_player_limit"] = int(self.line_edit_auto_restart_player_limit.text())
+            self.server.config["auto_restart_player_limit"] = int(self.line_edit_auto_restart_player_limit.text())
         self.save_config_json()
 
     def line_edit_auto_restart_player_limit_textchange(self):
@@ -948,10 +1050,10 @@ class Window(QMainWindow):
             return
 
     def check_box_auto_backup_click(self, flag):
-        self.config["auto_backup_flag"] = flag
+        self.server.config["auto_backup_flag"] = flag
         self.line_edit_auto_backup_time_limit.setEnabled(not flag)
         if flag:
-            self.config["auto_backup_time_limit"] = int(self.line_edit_auto_backup_time_limit.text())
+            self.server.config["auto_backup_time_limit"] = int(self.line_edit_auto_backup_time_limit.text())
         self.save_config_json()
 
     def line_edit_auto_backup_time_limit_textchange(self):
@@ -967,28 +1069,27 @@ class Window(QMainWindow):
         qfile_dialog = QFileDialog.getExistingDirectory(self, "选择文件夹", None)
         if os.path.isdir(qfile_dialog):
             self.line_edit_backup_path.setText(qfile_dialog)
-            self.config["backup_dir_path"] = qfile_dialog
+            self.server.config["backup_dir_path"] = qfile_dialog
             self.save_config_json()
             self.check_box_auto_backup.setEnabled(True)
             self.line_edit_auto_backup_time_limit.setEnabled(True)
 
     def button_edit_settings_click(self):
-        if "palserver_path" in self.config is False:
+        if "palserver_path" in self.server.config is False:
             QMessageBox.critical(self, "错误", "请先配置 PalServer.exe 路径，再修改配置文件！")
             return
-        if self.palserver_settings_path is None:
+        if self.server.palserver_settings_path is None:
             QMessageBox.critical(self, "错误", "请先配置 PalServer.exe 路径，再修改配置文件！")
             return
-        if os.path.isfile(self.palserver_settings_path) is False:
-            QMessageBox.critical(self, "错误", "服务端路径下的 /Pal/Saved/Config/WindowsServer/PalWorldSettings.ini 配置文件不存在，请启动一次PalServer.exe，或检查服务端完整性！")
+        if os.path.isfile(self.server.palserver_settings_path) is False:
+            QMessageBox.critical(self, "错误", "配置文件 " + self.server.palserver_settings_path + " 不存在，请启动一次服务端，或检查服务端完整性！")
             return
 
-        self.world_settings_window = world_settings_activity.Window()
+        self.world_settings_window = world_settings_activity.Window(self.server.palserver_settings_path)
         self.world_settings_window.show()
 
     def button_edit_server_name_click(self):
-        self.option_settings_dict["ServerName"] = "\"" + self.text_edit_server_name.toPlainText().replace("\n", "") + "\""
-        self.option_settings_dict["ServerDescription"] = "\"" + self.text_edit_server_description.toPlainText().replace("\n", "") + "\""
-        new_option_settings = ','.join(f"{key}={value}" for key, value in self.option_settings_dict.items())
-        settings_file_operation.save_setting(self.palserver_settings_path, new_option_settings)
+        self.server.option_settings_dict["ServerName"] = "\"" + self.text_edit_server_name.toPlainText().replace("\n", "") + "\""
+        self.server.option_settings_dict["ServerDescription"] = "\"" + self.text_edit_server_description.toPlainText().replace("\n", "") + "\""
+        self.server.save_settings()
         self.text_browser_api_server_notice("client_success", "服务器名称或服务器描述已修改成功，现可启动服务器查看。")
@@ -9,16 +9,17 @@ from PyQt5.uic import loadUi
 from PyQt5.QtGui import QIcon
 from PyQt5.QtWidgets import QMainWindow, QMessageBox, QTextEdit, QWidget, QVBoxLayout, QHBoxLayout, QPushButton
 
-from utils import json_operation, settings_file_operation
+from utils import json_operation, settings_file_operation, platform_paths
 
 
 class Window(QMainWindow):
-    def __init__(self):
+    def __init__(self, palserver_settings_path=None):
         super().__init__()
         self.module_path = os.path.split(sys.modules[__name__].__file__)[0] if sys.modules[__name__].__file__ else ""
-        self.config_path = os.path.join(sys.argv[0], r"../config.json")
+        self.config_path = platform_paths.app_path("config.json")
         self.config = json_operation.load_json(self.config_path)
-        self.palserver_settings_path = None
+        # 多服务器时由主窗口传入当前服务器的配置文件路径
+        self.palserver_settings_path = palserver_settings_path
         self.initUi()
 
     def initUi(self):
@@ -26,7 +27,8 @@ class Window(QMainWindow):
         self.setWindowTitle("修改服务器配置文件")
         self.setFixedSize(880, 680)
         self.setWindowIcon(QIcon(os.path.join(self.module_path, r"../resource/favicon.ico")))
-        self.palserver_settings_path = os.path.join(self.config["palserver_path"], r"../Pal/Saved/Config/WindowsServer/PalWorldSettings.ini")
+        if self.palserver_settings_path is None:
+            self.palserver_settings_path = platform_paths.settings_path(self.config["palserver_path"])
         
         # Create central widget and layout
         central_widget = QWidget()
@@ -2,34 +2,30 @@
 # -*- coding:utf-8 -*-
 import sys
 import os
+import time
+
+# 记录进程启动时间，用于统计首帧耗时
+STARTUP_TIME = time.perf_counter()
 
-from activity import main_activity
 from utils import json_operation
-from utils import update_checker
+from utils import startup_profiler
+from utils import platform_paths
+
+if __name__ == '__main__' and startup_profiler.PROFILE_FLAG in sys.argv:
+    # 启动耗时分析模式：以 -X importtime 重新启动一次程序并输出报告
+    record_path = platform_paths.app_path("startup_profile.json")
+    sys.exit(startup_profiler.run_profile(os.path.abspath(__file__), record_path))
+
+from activity import main_activity
 
 from PyQt5.QtWidgets import QApplication
 from PyQt5 import QtCore, QtGui
 
 if __name__ == '__main__':
-    config_path = os.path.join(sys.argv[0], r"../config.json")
+    config_path = platform_paths.app_path("config.json")
     if os.path.isfile(config_path) is False:
-        default_config = {
-            "game_port": 8211,  # 游戏端口
-            "game_publicport": 25575,  # 游戏查询端口
-            "game_player_limit": 32,  # 游戏玩家数上限
-            "api_addr": "127.0.0.1",  # API 服务器地址
-            "api_port": 8212,  # REST API 服务器端口
-            "api_password": "",  # 管理员密码
-            "crash_detection_flag": False,  # 是否开启崩溃检测
-            "auto_restart_flag": False,  # 是否开启自动重启
-            "auto_restart_time_limit": 7200,  # 自动重启时间间隔(秒)
-            "auto_restart_player_flag": False,  # 自动重启是否判断玩家数
-            "auto_restart_player_limit": 0,  # 仅在玩家数小于该值时自动重启
-            "launch_options_flag": False,  # 是否开启自定义启动项
-            "launch_options_info": "",  # 自定义启动项信息
-            "auto_backup_flag": False,  # 是否开启自动备份
-            "auto_backup_time_limit": 3600  # 自动备份时间间隔(秒)
-        }
+        from utils.server_instance import DEFAULT_CONFIG
+        default_config = dict(DEFAULT_CONFIG)
         json_operation.save_json(config_path, default_config)
 
     # 适应高DPI设备
@@ -41,6 +37,14 @@ if __name__ == '__main__':
     
     # 创建对象
     main_window = main_activity.Window()
+
+    if startup_profiler.is_child():
+        # 分析子进程：首次绘制后输出耗时并退出
+        def first_paint(elapsed_ms):
+            startup_profiler.report_first_paint(elapsed_ms)
+            QtCore.QTimer.singleShot(0, app.quit)
+        startup_profiler.watch_first_paint(main_window, STARTUP_TIME, first_paint)
+
     # 创建窗口
     main_window.show()
     
@@ -48,13 +52,33 @@ if __name__ == '__main__':
     from PyQt5.QtCore import QTimer
     
     def delayed_version_check():
-        """延迟执行版本检查的函数"""
+        """延迟执行版本检查和公告获取（后台线程执行，结果带本地缓存，离线时不阻塞界面）"""
+        # 更新检查在首次使用时再导入，避免拖慢启动
+        from utils import update_checker
+        import setting
         local_version = "2025.12.29.1"  # 当前程序版本号
         tool_name = "PalServerManager"    # 每一个版本的api接口信息
-        update_checker.check_updates(tool_name, local_version)
+        announcement_url = setting.announcement_url if setting.announcement_show_flag else None
+
+        def update_checked(flag, result):
+            if flag:
+                update_checker.show_update_prompt(result)
+            else:
+                main_window.text_browser_api_server_notice("client_error", f"无法检查更新：{result}")
+
+        def announcement_received(content):
+            for line in content.splitlines():
+                if line.strip():
+                    main_window.text_browser_api_server_notice("client_message", line.strip())
+
+        main_window.update_check_thread = update_checker.UpdateCheckThread(tool_name, local_version, announcement_url)
+        main_window.update_check_thread.update_signal.connect(update_checked)
+        main_window.update_check_thread.announcement_signal.connect(announcement_received)
+        main_window.update_check_thread.start()
     
     # 设置500毫秒延迟，让主窗口有足够时间渲染
-    QTimer.singleShot(500, delayed_version_check)
+    if not startup_profiler.is_child():
+        QTimer.singleShot(500, delayed_version_check)
     
     # 进入程序的主循环，并通过exit函数确保主循环安全结束(该释放资源的一定要释放)
     sys.exit(app.exec_())
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import sys
+import json
+import time
+import signal
+import secrets
+import logging
+import argparse
+import threading
+
+from utils import json_operation, event_log, server_supervisor, daemon_api, platform_paths, metrics
+
+"""
+    模块功能：
+    后台服务（不需要图形界面，注销桌面或在没有显示器的 Linux 主机上也能运行）
+    1. 与图形界面共用 utils/server_supervisor.py：崩溃重启、定时重启、定时备份、玩家列表轮询
+    2. 在本机提供 HTTP/JSON 控制接口（utils/daemon_api.py），图形界面启动时检测到后台服务会自动连接，
+       作为它的显示和操作界面；脚本也可以直接调用
+    3. 访问令牌保存在 config.json 的 daemon_token 中（首次启动时生成），端口为 daemon_port
+    4. 启动时自动连接已配置 REST API 的服务器（--no-connect 关闭）
+    5. --metrics-port（或 config.json 的 metrics_port）开启 Prometheus/OpenMetrics 指标接口 /metrics，不需要令牌
+
+    示例：
+    python pal_daemon.py
+    python pal_daemon.py --config /srv/pal/config.json --port 8765 -v
+    python pal_daemon.py --metrics-port 9877
+    curl -H "Authorization: Bearer <token>" http://127.0.0.1:8765/api/state
+"""
+
+TICK_INTERVAL = 1  # 调度间隔(秒)，与界面的1秒定时器一致
+
+logger = logging.getLogger("pal_daemon")
+
+
+def load_config(config_path):
+    """读取 config.json，不存在时返回空配置"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def log_notice(instance, event, data):
+    """控制台消息写入日志"""
+    if event != "notice":
+        return
+    message_type, message = data
+    level = logging.ERROR if message_type == "client_error" else logging.INFO
+    logger.log(level, f"[{instance.name}] {message}")
+
+
+def run(supervisor, stop_event):
+    """调度循环，直到 stop_event 被设置"""
+    next_tick = time.monotonic()
+    while not stop_event.is_set():
+        try:
+            supervisor.tick()
+        except Exception:
+            logger.exception("调度失败")
+        next_tick += TICK_INTERVAL
+        stop_event.wait(max(0, next_tick - time.monotonic()))
+
+
+def main(argv=None):
+    """以后台服务方式运行服务器监控"""
+    parser = argparse.ArgumentParser(description="帕鲁服务器管理后台服务（无界面）")
+    parser.add_argument("--config", default=platform_paths.app_path("config.json"),
+                        help="配置文件（与图形界面相同）")
+    parser.add_argument("--host", default="127.0.0.1", help="控制接口监听地址，默认只允许本机访问")
+    parser.add_argument("--port", type=int, help=f"控制接口端口，默认使用 config.json 中的 daemon_port 或 {daemon_api.DEFAULT_PORT}")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="指标接口监听地址")
+    parser.add_argument("--metrics-port", type=int,
+                        help="指标接口端口，默认使用 config.json 中的 metrics_port，为 0 或未设置时不开启")
+    parser.add_argument("--workers", type=int, default=server_supervisor.DEFAULT_WORKERS, help="共用线程池大小")
+    parser.add_argument("--no-connect", action="store_true", help="启动时不自动连接 REST API")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    config = load_config(args.config)
+    if args.port:
+        config["daemon_port"] = args.port
+    if args.metrics_port is not None:
+        config["metrics_port"] = args.metrics_port
+    config.setdefault("daemon_port", daemon_api.DEFAULT_PORT)
+    if not config.get("daemon_token"):
+        config["daemon_token"] = secrets.token_urlsafe(24)
+    json_operation.save_json(args.config, config)
+
+    try:
+        log = event_log.EventLog()
+    except Exception as e:
+        logger.warning(f"事件日志不可用: {e}")
+        log = None
+    supervisor = server_supervisor.ServerSupervisor(config, args.config, max_workers=args.workers, log=log)
+    supervisor.add_listener(log_notice)
+    for instance in supervisor.instances:
+        flag, message = instance.check_palserver_path()
+        if flag is False:
+            logger.warning(f"[{instance.name}] {message}")
+        elif not args.no_connect and instance.config.get("api_password"):
+            supervisor.connect(instance)
+
+    try:
+        httpd = daemon_api.serve(supervisor, config["daemon_token"], args.host, config["daemon_port"])
+    except OSError as e:
+        logger.error(f"控制接口启动失败（端口 {config['daemon_port']}）: {e}")
+        return 1
+    metrics_httpd = None
+    if config.get("metrics_port"):
+        try:
+            metrics_httpd = metrics.serve(args.metrics_host, config["metrics_port"])
+            logger.info(f"指标接口 http://{args.metrics_host}:{config['metrics_port']}/metrics")
+        except OSError as e:
+            logger.error(f"指标接口启动失败（端口 {config['metrics_port']}）: {e}")
+    logger.info(f"后台服务已启动，管理 {len(supervisor.instances)} 个服务器，控制接口 http://{args.host}:{config['daemon_port']}/api")
+
+    stop_event = threading.Event()
+    for signal_name in ("SIGINT", "SIGTERM", "SIGBREAK"):
+        if hasattr(signal, signal_name):
+            signal.signal(getattr(signal, signal_name), lambda signum, frame: stop_event.set())
+    run(supervisor, stop_event)
+
+    logger.info("后台服务正在退出")
+    httpd.shutdown()
+    if metrics_httpd is not None:
+        metrics_httpd.shutdown()
+    supervisor.shutdown()
+    if log is not None:
+        log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
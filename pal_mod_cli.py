@@ -0,0 +1,358 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import mod_catalog, mod_downloader, mod_operations, mod_profiles, platform_paths
+
+"""
+    模块功能：
+    MOD管理命令行工具（不需要图形界面，用于批量部署服务器）
+    1. 与图形界面共用 utils/mod_operations.py 中的安装、卸载、UE4SS安装逻辑
+    2. 可同时操作多个服务端（-g 可重复指定，或 --servers 文件每行一个路径），不同服务端并行执行，
+       同一服务端的操作按顺序执行，某个操作失败后跳过该服务端剩余的操作
+    3. batch 命令从文件（- 表示标准输入）读取操作，每行一个JSON对象：
+       {"action": "install", "mods": ["ModA", "ModB"], "game": "可选，只对该服务端执行"}
+       action 可选 install / uninstall / verify / switch（"profile": 方案名称）/ ue4ss（"remove": true 表示卸载）
+    4. --json 输出结果，退出码见 EXIT_*
+
+    示例：
+    python pal_mod_cli.py -g D:\\PalServer1 -g D:\\PalServer2 install ModA ModB
+    python pal_mod_cli.py --servers servers.txt --json batch ops.jsonl
+"""
+
+EXIT_OK = 0
+EXIT_FAILED = 1  # 操作失败（游戏目录已恢复到操作前的状态）
+EXIT_USAGE = 2  # 参数错误（与 argparse 一致）
+EXIT_CATALOG = 3  # 无法获取MOD列表
+EXIT_PLAN = 4  # MOD不存在，或依赖、冲突无法满足，未执行
+EXIT_DRIFT = 5  # verify 发现MOD文件被删除或修改
+# 多个服务端结果不同时，按此顺序取最严重的退出码
+EXIT_PRIORITY = [EXIT_FAILED, EXIT_PLAN, EXIT_CATALOG, EXIT_DRIFT]
+
+ACTIONS = ("install", "uninstall", "verify", "switch", "ue4ss")
+CATALOG_ACTIONS = ("install", "uninstall", "switch", "list")  # 需要MOD列表的操作
+
+logger = logging.getLogger("pal_mod_cli")
+
+
+def load_config(config_path):
+    """读取主程序的 config.json，不存在时返回空配置"""
+    try:
+        with open(config_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def read_lines(path):
+    """读取文件（- 表示标准输入）中的非空行，忽略 # 开头的注释"""
+    if path == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            lines = f.read().splitlines()
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith("#")]
+
+
+def read_batch(path):
+    """
+    读取批量操作文件
+
+    返回:
+        [{"action", "mods", "profile", "game"}]，格式错误时抛出 ValueError
+    """
+    operations = []
+    for line_number, line in enumerate(read_lines(path), 1):
+        try:
+            operation = json.loads(line)
+        except ValueError as e:
+            raise ValueError(f"第 {line_number} 行不是有效的JSON: {e}")
+        if not isinstance(operation, dict) or operation.get("action") not in ACTIONS:
+            raise ValueError(f"第 {line_number} 行的 action 必须是 {' / '.join(ACTIONS)} 之一")
+        mods = operation.get("mods", [])
+        operations.append({
+            "action": operation["action"],
+            "mods": [mods] if isinstance(mods, str) else list(mods),
+            "profile": operation.get("profile"),
+            "full": bool(operation.get("full", False)),
+            "remove": bool(operation.get("remove", False)),
+            "zip": operation.get("zip"),
+            "game": platform_paths.server_dir(operation["game"]) if operation.get("game") else None,
+        })
+    return operations
+
+
+def describe_steps(plan):
+    return [{"action": action, "mod": mod.get("ModName", ""), "name": mod.get("DisplayName", ""), "reason": reason}
+            for action, mod, reason in plan.steps]
+
+
+def run_plan(ops, plan, dry_run, prefer_cached=False):
+    """执行安装计划，返回 (退出码, 提示信息, 步骤)"""
+    steps = describe_steps(plan)
+    if plan.errors:
+        return EXIT_PLAN, "\n".join(plan.errors), steps
+    if not plan.steps:
+        return EXIT_OK, "无需操作", steps
+    if dry_run:
+        return EXIT_OK, f"预演：共 {len(plan.steps)} 个操作，未修改游戏目录", steps
+    flag, message = ops.install_batch(ops.plan_items(plan), prefer_cached)
+    ops.check_installed_mods()
+    return (EXIT_OK if flag else EXIT_FAILED), message, steps
+
+
+def run_operation(ops, operation, dry_run):
+    """
+    在一个服务端上执行一个操作
+
+    返回:
+        {"action", "exit_code", "message", "steps", "drift"}
+    """
+    action = operation["action"]
+    result = {"action": action, "mods": operation["mods"], "exit_code": EXIT_OK, "message": "", "steps": [], "drift": {}}
+
+    if action == "ue4ss":
+        if dry_run:
+            status = ops.ue4ss_status(operation.get("zip") or mod_operations.UE4SS_ZIP_PATH)
+            result["message"] = (f"预演：当前 {status['version'] or ('已安装' if status['installed'] else '未安装')}，"
+                                 f"{'将卸载' if operation.get('remove') else '安装包版本 ' + str(status['package_version'])}")
+        elif operation.get("remove"):
+            flag, result["message"] = ops.uninstall_ue4ss()
+            result["exit_code"] = EXIT_OK if flag else EXIT_FAILED
+        else:
+            flag, result["message"] = ops.install_ue4ss(operation.get("zip") or mod_operations.UE4SS_ZIP_PATH)
+            result["exit_code"] = EXIT_OK if flag else EXIT_FAILED
+        return result
+
+    if action == "verify":
+        mod_names = operation["mods"] or None
+        if mod_names:
+            unknown = [mod_name for mod_name in mod_names if not ops.load_manifest().is_installed(mod_name)]
+            if unknown:
+                result.update(exit_code=EXIT_PLAN, message=f"以下MOD未安装: {', '.join(unknown)}")
+                return result
+        result["drift"] = ops.verify(mod_names, full=operation.get("full", False))
+        checked_count = len(mod_names or ops.load_manifest().mods)
+        if result["drift"]:
+            result.update(exit_code=EXIT_DRIFT, message=f"{len(result['drift'])}/{checked_count} 个MOD的文件被删除或修改")
+        else:
+            result["message"] = f"{checked_count} 个MOD的文件均与安装时一致"
+        return result
+
+    if action == "switch":
+        profile_mods = mod_profiles.ModProfiles(ops.game_path).get(operation.get("profile") or "")
+        if profile_mods is None:
+            result.update(exit_code=EXIT_PLAN, message=f"MOD方案不存在: {operation.get('profile')}")
+            return result
+        plan = ops.plan_switch(profile_mods)
+        result["exit_code"], result["message"], result["steps"] = run_plan(ops, plan, dry_run, prefer_cached=True)
+        if result["exit_code"] == EXIT_OK and not dry_run:
+            mod_profiles.ModProfiles(ops.game_path).set_active(operation["profile"])
+        return result
+
+    mods, unknown = ops.find_mods(operation["mods"])
+    if unknown:
+        result.update(exit_code=EXIT_PLAN, message=f"MOD不在列表中: {', '.join(unknown)}")
+        return result
+    if not mods:
+        result.update(exit_code=EXIT_PLAN, message="没有指定MOD")
+        return result
+    if action == "install":
+        plan = ops.plan_install(mods)
+    else:
+        installed_names = ops.load_manifest().mods
+        plan = ops.plan_uninstall([mod for mod in mods if mod.get("ModName", "") in installed_names])
+    result["exit_code"], result["message"], result["steps"] = run_plan(ops, plan, dry_run)
+    return result
+
+
+def run_server(game_path, operations, mods_list, catalog, scheduler, dry_run):
+    """在一个服务端上按顺序执行操作，某个操作失败后跳过剩余的操作"""
+    start_time = time.perf_counter()
+    server = {"game": game_path, "exit_code": EXIT_OK, "results": []}
+    if not os.path.isdir(game_path) or not platform_paths.find_launcher(game_path):
+        server.update(exit_code=EXIT_FAILED, error="未找到PalServer.exe / PalServer.sh，请检查路径")
+        return server
+
+    ops = mod_operations.ModOperations(game_path, catalog, scheduler=scheduler)
+    # 每个服务端使用独立的MOD信息副本（安装状态记录在MOD信息中）
+    ops.mods_list = [dict(mod) for mod in mods_list]
+    recovered_count = ops.recover()
+    if recovered_count:
+        logger.warning(f"{game_path}: 已回滚 {recovered_count} 个未完成的MOD安装")
+    ops.check_installed_mods()
+
+    for operation in operations:
+        if operation["game"] and os.path.normcase(os.path.abspath(operation["game"])) != os.path.normcase(os.path.abspath(game_path)):
+            continue
+        if server["exit_code"] != EXIT_OK and server["exit_code"] != EXIT_DRIFT:
+            server["results"].append({"action": operation["action"], "mods": operation["mods"], "exit_code": EXIT_FAILED,
+                                      "message": "前面的操作失败，已跳过", "steps": [], "drift": {}})
+            continue
+        try:
+            result = run_operation(ops, operation, dry_run)
+        except Exception as e:
+            logger.exception(f"{game_path}: {operation['action']} 失败")
+            result = {"action": operation["action"], "mods": operation["mods"], "exit_code": EXIT_FAILED,
+                      "message": str(e), "steps": [], "drift": {}}
+        server["results"].append(result)
+        if result["exit_code"] != EXIT_OK:
+            server["exit_code"] = worst_exit_code([server["exit_code"], result["exit_code"]])
+
+    server["installed"] = sorted(ops.load_manifest().mods)
+    server["elapsed"] = round(time.perf_counter() - start_time, 3)
+    return server
+
+
+def worst_exit_code(exit_codes):
+    for exit_code in EXIT_PRIORITY:
+        if exit_code in exit_codes:
+            return exit_code
+    return max(exit_codes) if exit_codes else EXIT_OK
+
+
+def print_server(server):
+    print(f"[{server['game']}]")
+    if server.get("error"):
+        print(f"  错误: {server['error']}")
+        return
+    for result in server["results"]:
+        status = "成功" if result["exit_code"] == EXIT_OK else "失败"
+        message = result["message"].replace("\n\n", "\n").replace("\n", "\n      ")
+        print(f"  {' '.join([result['action']] + result['mods'])}: {status}  {message}")
+        for step in result["steps"]:
+            reason = f"（{step['reason']}）" if step["reason"] else ""
+            print(f"    {'+' if step['action'] == 'install' else '-'} {step['name'] or step['mod']}{reason}")
+        for mod_name, changes in result["drift"].items():
+            print(f"    {mod_name}: 丢失 {len(changes['missing'])} 个文件，修改 {len(changes['modified'])} 个文件")
+
+
+def main(argv=None):
+    """命令行安装、卸载、校验MOD"""
+    parser = argparse.ArgumentParser(description="帕鲁服务器MOD管理（命令行）",
+                                     epilog="退出码: 0 成功, 1 操作失败(已回滚), 2 参数错误, 3 无法获取MOD列表, "
+                                            "4 MOD不存在或依赖冲突, 5 校验发现文件被修改")
+    parser.add_argument("-g", "--game", dest="games", action="append", default=[],
+                        help="服务端目录或PalServer.exe / PalServer.sh路径，可重复指定；默认使用 config.json 中的 palserver_path")
+    parser.add_argument("--servers", help="服务端列表文件，每行一个路径")
+    parser.add_argument("--config", default=platform_paths.app_path("config.json"),
+                        help="配置文件（读取 palserver_path、mod_catalog_url、mod_offline、下载并发设置）")
+    parser.add_argument("--catalog", help="MOD列表地址（http/https、file:// 或本地路径）")
+    parser.add_argument("--offline", action="store_true", help="离线模式，只使用本地缓存")
+    parser.add_argument("--refresh", action="store_true", help="忽略MOD列表缓存有效期，向服务器确认是否有更新")
+    parser.add_argument("--prefer-cache", action="store_true", help="已缓存的MOD压缩包直接使用，不检查更新")
+    parser.add_argument("-j", "--jobs", type=int, default=4, help="同时操作的服务端数量")
+    parser.add_argument("--dry-run", action="store_true", help="只输出操作步骤，不修改游戏目录")
+    parser.add_argument("--json", action="store_true", help="以JSON格式输出结果")
+    parser.add_argument("-v", "--verbose", action="store_true", help="输出详细日志")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="列出MOD及安装状态").add_argument("--installed", action="store_true", help="只列出已安装的MOD")
+    for command, help_text in (("install", "安装MOD（自动安装依赖、卸载同分组或冲突的MOD）"),
+                               ("uninstall", "卸载MOD（依赖它的MOD一并卸载）")):
+        subparsers.add_parser(command, help=help_text).add_argument("mods", nargs="+", help="ModName 或 MOD名称")
+    verify_parser = subparsers.add_parser("verify", help="检查已安装MOD的文件是否被删除或修改")
+    verify_parser.add_argument("mods", nargs="*", help="ModName，默认检查全部已安装的MOD")
+    verify_parser.add_argument("--full", action="store_true", help="重新计算文件哈希（较慢）")
+    subparsers.add_parser("switch", help="切换到MOD方案").add_argument("profile", help="方案名称")
+    ue4ss_parser = subparsers.add_parser("ue4ss", help="安装或升级UE4SS（只写入有变化的文件，合并已修改的配置）")
+    ue4ss_parser.add_argument("--zip", help="UE4SS压缩包，默认 resource/UE4SS.zip")
+    ue4ss_parser.add_argument("--remove", action="store_true", help="卸载UE4SS（保留已修改的配置文件）")
+    subparsers.add_parser("batch", help="从文件读取操作，每行一个JSON对象").add_argument("file", help="操作文件，- 表示标准输入")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    config = load_config(args.config)
+
+    # 服务端列表
+    games = [platform_paths.server_dir(game) for game in args.games]
+    try:
+        if args.servers:
+            games.extend(platform_paths.server_dir(line) for line in read_lines(args.servers))
+        if args.command == "batch":
+            operations = read_batch(args.file)
+        elif args.command == "list":
+            operations = []
+        else:
+            operations = [{"action": args.command, "mods": getattr(args, "mods", []), "profile": getattr(args, "profile", None),
+                           "full": getattr(args, "full", False), "remove": getattr(args, "remove", False),
+                           "zip": getattr(args, "zip", None), "game": None}]
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    if not games:
+        games = [operation["game"] for operation in operations if operation["game"]]
+    if not games and config.get("palserver_path"):
+        games = [platform_paths.server_dir(config["palserver_path"])]
+    games = list(dict.fromkeys(os.path.abspath(game) for game in games))
+    if not games:
+        print("错误: 请使用 -g 或 --servers 指定服务端目录", file=sys.stderr)
+        return EXIT_USAGE
+
+    # MOD列表只获取一次，所有服务端共用
+    catalog = mod_catalog.ModCatalog(args.catalog or config.get("mod_catalog_url"), args.offline or config.get("mod_offline", False))
+    mods_list = []
+    if args.command in CATALOG_ACTIONS or any(operation["action"] in CATALOG_ACTIONS for operation in operations):
+        flag, result = catalog.fetch(force=args.refresh)
+        if flag is False:
+            if args.json:
+                print(json.dumps({"exit_code": EXIT_CATALOG, "error": result}, ensure_ascii=False))
+            else:
+                print(f"错误: {result}", file=sys.stderr)
+            return EXIT_CATALOG
+        if result["stale"]:
+            logger.warning(f"无法连接 {mod_catalog.describe_source(catalog)}，使用本地缓存的MOD列表")
+        mods_list = result["catalog"].get("Platform", [])
+
+    if args.command == "list":
+        return list_mods(games, mods_list, catalog, args)
+
+    # 所有服务端共用一个下载调度器：相同的压缩包只下载一次，总连接数受限
+    scheduler = mod_downloader.DownloadScheduler(
+        config.get("mod_download_workers", mod_downloader.DEFAULT_MAX_WORKERS),
+        config.get("mod_download_per_host", mod_downloader.DEFAULT_PER_HOST),
+        mod_downloader.ArtifactCache(offline=catalog.offline, prefer_cached=args.prefer_cache))
+    with ThreadPoolExecutor(max_workers=max(1, min(args.jobs, len(games)))) as executor:
+        futures = [executor.submit(run_server, game, operations, mods_list, catalog, scheduler, args.dry_run) for game in games]
+        servers = []
+        for future in futures:
+            servers.append(future.result())
+            if not args.json:
+                print_server(servers[-1])
+
+    exit_code = worst_exit_code([server["exit_code"] for server in servers if server["exit_code"] != EXIT_OK])
+    if args.json:
+        print(json.dumps({"exit_code": exit_code, "dry_run": args.dry_run, "servers": servers}, ensure_ascii=False, indent=1))
+    return exit_code
+
+
+def list_mods(games, mods_list, catalog, args):
+    """列出MOD及每个服务端的安装状态"""
+    servers = []
+    for game in games:
+        ops = mod_operations.ModOperations(game, catalog)
+        ops.mods_list = [dict(mod) for mod in mods_list]
+        ops.check_installed_mods()
+        servers.append({"game": game, "mods": [
+            {"mod": mod.get("ModName", ""), "name": mod.get("DisplayName", ""), "installed": mod["installed"],
+             "modified": mod.get("modified", False)}
+            for mod in ops.mods_list if mod["installed"] or not args.installed]})
+    if args.json:
+        print(json.dumps({"exit_code": EXIT_OK, "servers": servers}, ensure_ascii=False, indent=1))
+        return EXIT_OK
+    for server in servers:
+        print(f"[{server['game']}]")
+        for mod in server["mods"]:
+            status = ("已修改" if mod["modified"] else "已安装") if mod["installed"] else "未安装"
+            print(f"  {status}  {mod['mod']:<30} {mod['name']}")
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    sys.exit(main())
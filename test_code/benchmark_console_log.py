@@ -0,0 +1,45 @@
+import os
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication, QTextBrowser
+
+from utils.console_log import ConsoleLog
+
+BATCH = 120  # 一次60秒倒计时大约产生的消息数
+CHECKPOINTS = [0, 1200, 12000, 60000, 120000]
+MESSAGE_TYPES = ["client_command", "server_success", "client_error", "client_message", "client_success"]
+
+
+def append_batch(console, count):
+    for i in range(count):
+        console.append(MESSAGE_TYPES[i % len(MESSAGE_TYPES)], f"服务器将在 {i} 秒后重启!!!")
+    console.flush()
+
+
+def benchmark_console_log():
+    """在不同历史消息数量下测量单条消息的追加耗时"""
+    print("=== 控制台日志追加耗时 ===")
+    text_browser = QTextBrowser()
+    console = ConsoleLog(text_browser)
+    written = 0
+    for checkpoint in CHECKPOINTS:
+        # 按倒计时的节奏分批写入历史消息
+        while written < checkpoint:
+            append_batch(console, BATCH)
+            written += BATCH
+
+        start_time = time.perf_counter()
+        append_batch(console, BATCH)
+        elapsed = time.perf_counter() - start_time
+        written += BATCH
+        print(f"   已有 {checkpoint:>6} 条消息: 每条 {elapsed / BATCH * 1e6:8.1f} us, "
+              f"文档行数 {text_browser.document().blockCount()}")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    benchmark_console_log()
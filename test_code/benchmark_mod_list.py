@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+import random
+import string
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication, QTableView
+
+from utils.mod_list_model import ModListModel, ModFilterProxyModel
+
+MOD_COUNT = 5000
+# 模拟逐字输入、删除搜索词
+KEYSTROKES = ["m", "mo", "mod", "moda", "modab", "moda", "mod", "mo", "m", "", "a", "ab", "a", ""]
+
+
+def make_mods(count):
+    random.seed(1)
+    return [{
+        "DisplayName": "Mod " + "".join(random.choices(string.ascii_letters, k=12)),
+        "Description": "".join(random.choices(string.ascii_letters + " ", k=80)),
+        "Author": "author",
+        "ModName": f"Mod{i}",
+        "installed": i % 7 == 0,
+    } for i in range(count)]
+
+
+def benchmark_mod_list(app):
+    """测量MOD列表加载和每次输入搜索词的耗时（含界面重绘）"""
+    print(f"=== MOD列表过滤耗时（{MOD_COUNT} 个MOD） ===")
+    model = ModListModel()
+    proxy = ModFilterProxyModel()
+    proxy.setSourceModel(model)
+    view = QTableView()
+    view.verticalHeader().hide()
+    view.setShowGrid(False)
+    view.setWordWrap(False)
+    view.setModel(proxy)
+    view.resize(1070, 340)
+    view.show()
+
+    start_time = time.perf_counter()
+    model.set_mods(make_mods(MOD_COUNT))
+    app.processEvents()
+    print(f"   加载列表: {(time.perf_counter() - start_time) * 1000:.1f} ms")
+
+    timings = []
+    for text in KEYSTROKES:
+        start_time = time.perf_counter()
+        proxy.set_filter(text, False)
+        app.processEvents()
+        timings.append((time.perf_counter() - start_time) * 1000)
+        print(f"   搜索 {text!r:<8} 显示 {proxy.rowCount():>5} 行: {timings[-1]:6.1f} ms")
+    timings.sort()
+    print(f"   中位数 {timings[len(timings) // 2]:.1f} ms, 最大 {timings[-1]:.1f} ms（一帧约16.7 ms）")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    benchmark_mod_list(app)
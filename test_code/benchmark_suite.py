@@ -0,0 +1,422 @@
+import os
+import sys
+import json
+import time
+import types
+import random
+import shutil
+import socket
+import zipfile
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from datetime import datetime
+
+# Add the project root to Python path
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT_DIR)
+
+from utils import settings_file_operation, mod_installer, mod_resolver
+from utils.pal_restapi import PalRestAPI
+from utils.server_instance import ServerInstance
+from fake_pal_server import FakePalServer
+
+"""
+    模块功能：
+    工具热点路径的基准测试，结果按提交保存，用于发现性能回退
+    1. 用例：配置文件解析（真实格式 / 合成的大文件）、REST API 请求吞吐（本地模拟服务器 fake_pal_server.py）、
+       玩家列表刷新（N 名玩家）、控制台日志追加、存档备份复制（生成的 Saved 目录）、MOD压缩包安装、MOD卸载规划（N 个已安装MOD）
+    2. 每个用例重复执行，记录中位数和最小值；数据在临时目录中生成，不依赖真实服务端和网络
+    3. 每次运行追加一行到 benchmark_results.jsonl（提交、是否有未提交修改、机器名、各用例结果）
+    4. --compare 与指定提交在同一台机器上最近一次的结果比较（默认为上一个不同提交），
+       中位数变慢超过 --threshold 时列出并返回退出码 1
+
+    示例：
+    python test_code/benchmark_suite.py
+    python test_code/benchmark_suite.py --only backup,rest_api --repeat 10
+    python test_code/benchmark_suite.py --compare HEAD~1 --threshold 0.2
+"""
+
+RESULTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results.jsonl")
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2  # 中位数变慢超过20%视为回退
+
+PLAYER_COUNTS = [32, 200, 500]
+SETTINGS_SYNTHETIC_KEYS = 2000
+REST_API_REQUESTS = 200
+CONSOLE_MESSAGES = 1000
+BACKUP_BYTES = 64 * 1024 * 1024
+BACKUP_FILES = 200
+MOD_FILES = 200
+MOD_BYTES = 16 * 1024 * 1024
+RESOLVER_MOD_COUNTS = [1000, 5000]
+RESOLVER_SELECTED = 50
+
+# 真实服务端配置中的常见选项（格式与 DefaultPalWorldSettings.ini 一致）
+REAL_OPTIONS = [
+    ("Difficulty", "None"), ("DayTimeSpeedRate", "1.000000"), ("NightTimeSpeedRate", "1.000000"),
+    ("ExpRate", "1.000000"), ("PalCaptureRate", "1.000000"), ("PalSpawnNumRate", "1.000000"),
+    ("PalDamageRateAttack", "1.000000"), ("PalDamageRateDefense", "1.000000"),
+    ("PlayerDamageRateAttack", "1.000000"), ("PlayerDamageRateDefense", "1.000000"),
+    ("PlayerStomachDecreaceRate", "1.000000"), ("PlayerStaminaDecreaceRate", "1.000000"),
+    ("PlayerAutoHPRegeneRate", "1.000000"), ("PlayerAutoHpRegeneRateInSleep", "1.000000"),
+    ("PalStomachDecreaceRate", "1.000000"), ("PalStaminaDecreaceRate", "1.000000"),
+    ("PalAutoHPRegeneRate", "1.000000"), ("PalAutoHpRegeneRateInSleep", "1.000000"),
+    ("BuildObjectDamageRate", "1.000000"), ("BuildObjectDeteriorationDamageRate", "1.000000"),
+    ("CollectionDropRate", "1.000000"), ("CollectionObjectHpRate", "1.000000"),
+    ("CollectionObjectRespawnSpeedRate", "1.000000"), ("EnemyDropItemRate", "1.000000"),
+    ("DeathPenalty", "All"), ("bEnablePlayerToPlayerDamage", "False"), ("bEnableFriendlyFire", "False"),
+    ("bEnableInvaderEnemy", "True"), ("bActiveUNKO", "False"), ("bEnableAimAssistPad", "True"),
+    ("bEnableAimAssistKeyboard", "False"), ("DropItemMaxNum", "3000"), ("DropItemMaxNum_UNKO", "100"),
+    ("BaseCampMaxNum", "128"), ("BaseCampWorkerMaxNum", "15"), ("DropItemAliveMaxHours", "1.000000"),
+    ("bAutoResetGuildNoOnlinePlayers", "False"), ("AutoResetGuildTimeNoOnlinePlayers", "72.000000"),
+    ("GuildPlayerMaxNum", "20"), ("BaseCampMaxNumInGuild", "4"), ("PalEggDefaultHatchingTime", "72.000000"),
+    ("WorkSpeedRate", "1.000000"), ("AutoSaveSpan", "30.000000"), ("bIsMultiplay", "False"),
+    ("bIsPvP", "False"), ("bCanPickupOtherGuildDeathPenaltyDrop", "False"),
+    ("bEnableNonLoginPenalty", "True"), ("bEnableFastTravel", "True"),
+    ("bIsStartLocationSelectByMap", "True"), ("bExistPlayerAfterLogout", "False"),
+    ("bEnableDefenseOtherGuildPlayer", "False"), ("bInvisibleOtherGuildBaseCampAreaFX", "False"),
+    ("CoopPlayerMaxNum", "4"), ("ServerPlayerMaxNum", "32"), ("ServerName", '"Default Palworld Server"'),
+    ("ServerDescription", '""'), ("AdminPassword", '""'), ("ServerPassword", '""'), ("PublicPort", "8211"),
+    ("PublicIP", '""'), ("RCONEnabled", "False"), ("RCONPort", "25575"), ("Region", '""'),
+    ("bUseAuth", "True"), ("BanListURL", '"https://api.palworldgame.com/api/banlist.txt"'),
+    ("RESTAPIEnabled", "False"), ("RESTAPIPort", "8212"), ("bShowPlayerList", "False"),
+    ("AllowConnectPlatform", "Steam"), ("bIsUseBackupSaveData", "True"), ("LogFormatType", "Text"),
+    ("SupplyDropSpan", "180"), ("CrossplayPlatforms", "(Steam,Xbox,PS5,Mac)"),
+]
+
+BENCHMARKS = {}  # 用例组名称 -> 函数(工作目录, 重复次数) -> {用例名称: 结果}
+
+
+def benchmark(name):
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+
+def measure(function, repeat, setup=None, amount=None, unit=None):
+    """
+    重复执行并计时
+
+    参数:
+        setup: 每次执行前调用，不计入耗时
+        amount / unit: 每次执行处理的数据量和单位，用于计算吞吐（如 200, "req"）
+
+    返回:
+        {"median", "min", "repeat"[, "throughput", "unit"]}，时间单位为秒
+    """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start_time = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start_time)
+    result = {"median": statistics.median(timings), "min": min(timings), "repeat": repeat}
+    if amount is not None:
+        result["throughput"] = amount / result["median"]
+        result["unit"] = unit + "/s"
+    return result
+
+
+def write_settings(path, options):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[/Script/Pal.PalGameWorldSettings]\nOptionSettings=(" +
+                ",".join(f"{key}={value}" for key, value in options) + ")\n")
+
+
+@benchmark("settings")
+def benchmark_settings(work_dir, repeat):
+    """settings_file_operation.load_setting"""
+    real_path = os.path.join(work_dir, "PalWorldSettings.ini")
+    write_settings(real_path, REAL_OPTIONS)
+    synthetic_path = os.path.join(work_dir, "PalWorldSettings_synthetic.ini")
+    rng = random.Random(1)
+    options = list(REAL_OPTIONS)
+    for index in range(SETTINGS_SYNTHETIC_KEYS):
+        value = rng.choice([f"{rng.random():.6f}", str(rng.randrange(10000)), "True", '"' + "x" * rng.randrange(40) + '"',
+                            "(" + ",".join(rng.choice(["Steam", "Xbox", "PS5", "Mac"]) for _ in range(3)) + ")"])
+        options.append((f"SyntheticOption{index}", value))
+    write_settings(synthetic_path, options)
+    # 解析一次的耗时太短，每次计时解析多遍
+    loops = 100
+    return {
+        "load_setting[real]": measure(lambda: [settings_file_operation.load_setting(real_path) for _ in range(loops)],
+                                      repeat, amount=loops, unit="file"),
+        f"load_setting[synthetic-{SETTINGS_SYNTHETIC_KEYS}]": measure(
+            lambda: [settings_file_operation.load_setting(synthetic_path) for _ in range(loops // 10)],
+            repeat, amount=loops // 10, unit="file"),
+    }
+
+
+@benchmark("rest_api")
+def benchmark_rest_api(work_dir, repeat):
+    """PalRestAPI 对本地模拟服务器的请求吞吐（串行，含指标记录）"""
+    results = {}
+    for player_count in PLAYER_COUNTS:
+        server = FakePalServer(players=player_count).start()
+        try:
+            api = PalRestAPI("127.0.0.1", server.port, "admin", server.password)
+            results[f"get_players[{player_count}]"] = measure(
+                lambda: [api.get_players() for _ in range(REST_API_REQUESTS)], repeat, amount=REST_API_REQUESTS, unit="req")
+        finally:
+            server.stop()
+    server = FakePalServer(players=0).start()
+    try:
+        api = PalRestAPI("127.0.0.1", server.port, "admin", server.password)
+        results["announce_message"] = measure(
+            lambda: [api.announce_message("benchmark") for _ in range(REST_API_REQUESTS)], repeat,
+            amount=REST_API_REQUESTS, unit="req")
+    finally:
+        server.stop()
+    return results
+
+
+_qt_application = None
+
+
+def qt_application():
+    """界面相关用例共用的 QApplication（保存引用，避免被回收）"""
+    global _qt_application
+    if _qt_application is None:
+        if sys.platform.startswith("linux") and not os.environ.get("DISPLAY"):
+            os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt5.QtWidgets import QApplication
+        _qt_application = QApplication.instance() or QApplication(sys.argv)
+    return _qt_application
+
+
+@benchmark("player_table")
+def benchmark_player_table(work_dir, repeat):
+    """主窗口 update_player_table 刷新 N 名玩家（直接调用界面代码）"""
+    app = qt_application()
+    from PyQt5.QtWidgets import QTableWidget, QLabel
+    from activity.main_activity import Window
+    from fake_pal_server import make_players
+
+    results = {}
+    for player_count in PLAYER_COUNTS:
+        table = QTableWidget(0, 3)
+        window = types.SimpleNamespace(
+            table_widget_player_list=table, label_online_player=QLabel(),
+            server=types.SimpleNamespace(player_list=make_players(player_count), rest_api_connect_flag=True,
+                                         config={"game_player_limit": 32}))
+
+        def refresh():
+            Window.update_player_table(window)
+            app.processEvents()
+        results[f"update_player_table[{player_count}]"] = measure(refresh, repeat, amount=player_count, unit="row")
+    return results
+
+
+@benchmark("console_log")
+def benchmark_console_log(work_dir, repeat):
+    """ConsoleLog 追加消息并写入控制台"""
+    qt_application()
+    from PyQt5.QtWidgets import QTextBrowser
+    from utils.console_log import ConsoleLog
+
+    message_types = ["client_command", "server_success", "client_error", "client_message", "client_success"]
+    console = ConsoleLog(QTextBrowser())
+
+    def append():
+        for i in range(CONSOLE_MESSAGES):
+            console.append(message_types[i % len(message_types)], f"服务器将在 {i} 秒后重启!!!")
+        console.flush()
+    return {"append": measure(append, repeat, amount=CONSOLE_MESSAGES, unit="msg")}
+
+
+@benchmark("backup")
+def benchmark_backup(work_dir, repeat):
+    """ServerInstance.backup 复制生成的 Saved 目录"""
+    game_dir = os.path.join(work_dir, "PalServer")
+    players_dir = os.path.join(game_dir, "Pal", "Saved", "SaveGames", "0", "0123456789ABCDEF", "Players")
+    os.makedirs(players_dir)
+    launcher = os.path.join(game_dir, "PalServer.exe")
+    open(launcher, "wb").close()
+    rng = random.Random(1)
+    file_size = BACKUP_BYTES // BACKUP_FILES
+    for index in range(BACKUP_FILES):
+        with open(os.path.join(players_dir, f"{index:032X}.sav"), "wb") as f:
+            f.write(rng.randbytes(file_size))
+    backup_dir = os.path.join(work_dir, "backup")
+    instance = ServerInstance({"palserver_path": launcher, "backup_dir_path": backup_dir})
+
+    def clean():
+        # 备份目录名精确到秒，每次执行前清空
+        shutil.rmtree(backup_dir, ignore_errors=True)
+        os.makedirs(backup_dir)
+
+    def backup():
+        flag, result = instance.backup()
+        if flag is False:
+            raise RuntimeError(result)
+    return {f"copy[{BACKUP_BYTES // (1024 * 1024)}MB]": measure(backup, repeat, setup=clean,
+                                                               amount=BACKUP_BYTES / (1024 * 1024), unit="MB")}
+
+
+@benchmark("mod_install")
+def benchmark_mod_install(work_dir, repeat):
+    """mod_installer.install_archive 安装生成的MOD压缩包"""
+    game_dir = os.path.join(work_dir, "PalServer")
+    install_dir = os.path.join(game_dir, "Pal", "Content", "Paks", "LogicMods")
+    os.makedirs(install_dir)
+    zip_path = os.path.join(work_dir, "BenchmarkMod.zip")
+    rng = random.Random(1)
+    file_size = MOD_BYTES // MOD_FILES
+    with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
+        for index in range(MOD_FILES):
+            # 一半可压缩、一半不可压缩的内容
+            data = rng.randbytes(file_size // 2) + bytes(file_size // 2)
+            archive.writestr(f"BenchmarkMod/Content/{index // 20}/file{index}.pak", data)
+
+    def clean():
+        shutil.rmtree(os.path.join(install_dir, "BenchmarkMod"), ignore_errors=True)
+    results = {f"install_archive[{MOD_FILES} files]": measure(
+        lambda: mod_installer.install_archive(zip_path, install_dir, game_dir), repeat, setup=clean,
+        amount=MOD_BYTES / (1024 * 1024), unit="MB")}
+
+    # 依赖链较长的MOD列表，全部已安装，卸载其中一部分
+    for count in RESOLVER_MOD_COUNTS:
+        mods = []
+        for index in range(count):
+            mod = {"ModName": f"Mod{index}"}
+            if index:
+                mod["Requires"] = [f"Mod{rng.randrange(index)}" for _ in range(rng.randint(1, 3))]
+            mods.append(mod)
+        resolver = mod_resolver.ModResolver(mods)
+        installed_names = {mod["ModName"] for mod in mods}
+        selected_mods = rng.sample(mods, RESOLVER_SELECTED)
+        results[f"plan_uninstall[{count} mods]"] = measure(
+            lambda: resolver.plan_uninstall(selected_mods, installed_names), repeat)
+    return results
+
+
+def git_commit():
+    """当前提交和是否有未提交的修改"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True,
+                                check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT_DIR,
+                                    capture_output=True, text=True).stdout.strip())
+        return commit, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return "", False
+
+
+def resolve_commit(revision):
+    try:
+        return subprocess.run(["git", "rev-parse", revision], cwd=ROOT_DIR, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return revision
+
+
+def load_results(path):
+    records = []
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+    return records
+
+
+def find_baseline(records, record, revision=None):
+    """
+    同一台机器上基准提交的结果；未指定提交时取上一个不同的提交。
+    每个用例取该提交最近一次运行中的结果（不同运行可能只跑了部分用例组）
+
+    返回:
+        {"commit", "results"}，没有历史结果时返回 None
+    """
+    records = [previous for previous in records if previous["machine"] == record["machine"]]
+    if revision:
+        commit = resolve_commit(revision)
+    else:
+        commit = next((previous["commit"] for previous in reversed(records) if previous["commit"] != record["commit"]), None)
+    results = {}
+    for previous in reversed(records):
+        if previous["commit"] == commit:
+            for name, result in previous["results"].items():
+                results.setdefault(name, result)
+    return {"commit": commit, "results": results} if results else None
+
+
+def compare(baseline, record, threshold):
+    """
+    返回:
+        变慢超过阈值的用例列表
+    """
+    print(f"\n=== 与 {baseline['commit'][:10]} 比较 ===")
+    regressions = []
+    for name, result in record["results"].items():
+        previous = baseline["results"].get(name)
+        if previous is None:
+            continue
+        change = result["median"] / previous["median"] - 1
+        flag = change > threshold
+        if flag:
+            regressions.append(name)
+        print(f"   {name:<45} {previous['median'] * 1000:10.2f} ms -> {result['median'] * 1000:10.2f} ms "
+              f"{change * 100:+7.1f}%{'  <-- 回退' if flag else ''}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="帕鲁服务器管理工具基准测试")
+    parser.add_argument("--only", default="", help="只运行这些用例组，逗号分隔：" + ",".join(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="每个用例的重复次数")
+    parser.add_argument("--output", default=RESULTS_PATH, help="结果文件（每次运行追加一行）")
+    parser.add_argument("--no-save", action="store_true", help="不保存本次结果")
+    parser.add_argument("--compare", nargs="?", const="", metavar="提交",
+                        help="与指定提交的结果比较，不指定提交时与上一个不同提交比较")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="中位数变慢超过该比例视为回退")
+    args = parser.parse_args(argv)
+
+    names = [name for name in args.only.split(",") if name] or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"未知的用例组: {','.join(unknown)}")
+
+    commit, dirty = git_commit()
+    record = {"commit": commit, "dirty": dirty, "time": datetime.now().isoformat(timespec="seconds"),
+              "machine": socket.gethostname(), "platform": platform.platform(), "python": platform.python_version(),
+              "repeat": args.repeat, "results": {}}
+    print(f"=== 基准测试 {commit[:10]}{'（有未提交的修改）' if dirty else ''}，重复 {args.repeat} 次 ===")
+    for name in names:
+        work_dir = tempfile.mkdtemp(prefix=f"pal_benchmark_{name}_")
+        try:
+            for case, result in BENCHMARKS[name](work_dir, args.repeat).items():
+                record["results"][f"{name}.{case}"] = result
+                throughput = f"  {result['throughput']:10.1f} {result['unit']}" if "throughput" in result else ""
+                print(f"   {name + '.' + case:<45} 中位数 {result['median'] * 1000:10.2f} ms  "
+                      f"最小 {result['min'] * 1000:10.2f} ms{throughput}")
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    records = load_results(args.output)
+    if not args.no_save:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        print(f"\n结果已保存到 {args.output}")
+
+    if args.compare is not None:
+        baseline = find_baseline(records, record, args.compare or None)
+        if baseline is None:
+            print("\n没有可比较的历史结果")
+            return 0
+        regressions = compare(baseline, record, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} 个用例变慢超过 {args.threshold * 100:.0f}%")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
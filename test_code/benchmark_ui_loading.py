@@ -0,0 +1,57 @@
+import os
+import sys
+import time
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt5.QtWidgets import QApplication, QMainWindow
+from PyQt5.uic import loadUi
+
+from utils import ui_loader
+
+ROUNDS = 20
+
+
+class BenchWindow(QMainWindow):
+    """界面中的信号槽连接到窗口方法，这里只比较界面构建耗时，用空函数代替槽函数"""
+    def __getattr__(self, name):
+        return lambda *args: None
+
+
+def benchmark(name, build):
+    """重复构建界面并统计平均耗时"""
+    build()  # 预热
+    start_time = time.perf_counter()
+    for _ in range(ROUNDS):
+        window = build()
+        window.deleteLater()
+    elapsed = (time.perf_counter() - start_time) / ROUNDS * 1000
+    print(f"   {name}: {elapsed:.2f} ms")
+    return elapsed
+
+
+def compare_ui(ui_name):
+    print(f"\n{ui_name}.ui：")
+    ui_path = os.path.join(ui_loader.UI_DIR, f"{ui_name}.ui")
+    ui_loader.compile_ui(ui_name)
+
+    def build_runtime():
+        window = BenchWindow()
+        loadUi(ui_path, window)
+        return window
+
+    def build_compiled():
+        window = BenchWindow()
+        ui_loader.load_ui(ui_name, window)
+        return window
+
+    runtime_ms = benchmark("loadUi 运行时解析", build_runtime)
+    compiled_ms = benchmark("预编译界面类", build_compiled)
+    print(f"   加速比: {runtime_ms / compiled_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    app = QApplication(sys.argv)
+    for ui_name in ("main", "mod_manager"):
+        compare_ui(ui_name)
@@ -0,0 +1,360 @@
+import sys
+import json
+import time
+import uuid
+import random
+import base64
+import hmac
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+    模块功能：
+    本地模拟的 PalServer REST API（只依赖标准库），不需要真实服务端即可测试和压测客户端、玩家轮询和界面逻辑
+    1. 实现 /v1/api/info、players、metrics、settings（GET）和 announce、kick、ban、unban、save、shutdown、stop（POST），
+       使用 Basic 认证（用户名 admin），返回格式与真实服务端一致
+    2. 可配置响应延迟和抖动；按比例注入 500 错误、超时（挂起不响应）和断开连接，可限定只对部分接口注入
+    3. 生成指定数量的模拟玩家（可达数百人），可选每次查询时随机上下线
+    4. shutdown / stop 后停止监听（模拟关服），设置 --restart-after 时在指定秒数后重新监听（模拟重启）
+    5. 也可以在脚本中使用：FakePalServer(players=200, latency=0.05).start()，结束时调用 stop()
+
+    示例：
+    python test_code/fake_pal_server.py --port 8212 --password 123456 --players 300
+    python test_code/fake_pal_server.py --latency 0.2 --jitter 0.1 --error-rate 0.1 --error-endpoints players
+    python test_code/fake_pal_server.py --restart-after 15
+"""
+
+API_PREFIX = "/v1/api/"
+GET_ENDPOINTS = {"info", "players", "metrics", "settings"}
+POST_ENDPOINTS = {"announce", "kick", "ban", "unban", "save", "shutdown", "stop"}
+
+DEFAULT_SETTINGS = {
+    "Difficulty": "None",
+    "DayTimeSpeedRate": 1.0,
+    "NightTimeSpeedRate": 1.0,
+    "ExpRate": 1.0,
+    "PalCaptureRate": 1.0,
+    "DeathPenalty": "All",
+    "ServerPlayerMaxNum": 32,
+    "ServerName": "Fake Palworld Server",
+    "ServerDescription": "",
+    "PublicPort": 8211,
+    "RCONEnabled": False,
+    "RESTAPIEnabled": True,
+    "RESTAPIPort": 8212,
+}
+
+
+def make_players(count, seed=0):
+    """生成模拟玩家，字段与 /v1/api/players 一致"""
+    rng = random.Random(seed)
+    players = []
+    for index in range(count):
+        players.append(make_player(rng, index))
+    return players
+
+
+def make_player(rng, index):
+    return {
+        "name": f"玩家{index:04d}",
+        "accountName": f"account_{index:04d}",
+        "playerId": uuid.UUID(int=rng.getrandbits(128)).hex.upper(),
+        "userId": f"steam_{76561190000000000 + rng.randrange(10 ** 9)}",
+        "ip": f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}",
+        "ping": round(rng.uniform(10, 200), 3),
+        "location_x": round(rng.uniform(-500000, 500000), 3),
+        "location_y": round(rng.uniform(-500000, 500000), 3),
+        "level": rng.randint(1, 55),
+        "building_count": rng.randrange(300),
+    }
+
+
+class FakePalServer:
+    def __init__(self, host="127.0.0.1", port=0, username="admin", password="123456", players=10,
+                 latency=0.0, jitter=0.0, error_rate=0.0, timeout_rate=0.0, drop_rate=0.0, hang_time=15.0,
+                 error_endpoints=None, churn=0.0, restart_after=None, version="v0.3.11.58931", seed=0):
+        """
+        参数:
+            port: 监听端口，为 0 时随机分配（启动后从 self.port 读取）
+            players: 模拟玩家数量
+            latency / jitter: 每个请求的基础延迟和随机抖动(秒)
+            error_rate: 返回 500 的比例
+            timeout_rate: 挂起 hang_time 秒后再响应的比例（客户端超时）
+            drop_rate: 不响应直接断开连接的比例
+            error_endpoints: 只对这些接口（如 {"players"}）注入错误，为空时对所有接口注入
+            churn: 每次查询玩家列表时上下线的玩家比例
+            restart_after: shutdown/stop 后多少秒重新监听，为 None 时不重启
+            seed: 随机数种子，相同参数生成相同的玩家和错误序列
+        """
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.timeout_rate = timeout_rate
+        self.drop_rate = drop_rate
+        self.hang_time = hang_time
+        self.error_endpoints = set(error_endpoints or [])
+        self.churn = churn
+        self.restart_after = restart_after
+        self.version = version
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.players = make_players(players, seed)
+        self.next_player_index = players
+        self.banned = set()
+        self.announcements = []
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.settings["RESTAPIPort"] = port
+        self.request_counts = {}  # 接口 -> 请求次数
+        self.start_time = time.monotonic()
+        self.saved_count = 0
+        self.httpd = None
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def running(self):
+        return self.httpd is not None
+
+    def start(self):
+        """在后台线程中开始监听，返回自身"""
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self.settings["RESTAPIPort"] = self.port
+        self.start_time = time.monotonic()
+        threading.Thread(target=self.httpd.serve_forever, name="fake-pal-server", daemon=True).start()
+        return self
+
+    def stop(self):
+        """停止监听（已建立的连接直接关闭）"""
+        httpd, self.httpd = self.httpd, None
+        if httpd is not None:
+            httpd.shutdown()
+            httpd.server_close()
+
+    def _shutdown_later(self, wait_time):
+        """模拟关服：等待后停止监听，需要时再重新监听"""
+        def run():
+            time.sleep(wait_time)
+            self.stop()
+            if self.restart_after is not None:
+                time.sleep(self.restart_after)
+                self.start()
+        threading.Thread(target=run, name="fake-pal-shutdown", daemon=True).start()
+
+    def check_auth(self, header):
+        expected = "Basic " + base64.b64encode(f"{self.username}:{self.password}".encode("utf-8")).decode("ascii")
+        return hmac.compare_digest(header or "", expected)
+
+    def fault(self, endpoint):
+        """
+        本次请求注入的故障
+
+        返回:
+            "drop" / "timeout" / "error"，不注入时返回 None
+        """
+        if self.error_endpoints and endpoint not in self.error_endpoints:
+            return None
+        with self.lock:
+            value = self.rng.random()
+        for fault, rate in (("drop", self.drop_rate), ("timeout", self.timeout_rate), ("error", self.error_rate)):
+            if value < rate:
+                return fault
+            value -= rate
+        return None
+
+    def delay(self):
+        with self.lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def handle(self, method, endpoint, body):
+        """
+        处理一个已通过认证的请求
+
+        返回:
+            (HTTP状态码, 响应对象或文本)
+        """
+        with self.lock:
+            self.request_counts[endpoint] = self.request_counts.get(endpoint, 0) + 1
+        if method == "GET" and endpoint in GET_ENDPOINTS or method == "POST" and endpoint in POST_ENDPOINTS:
+            return getattr(self, "api_" + endpoint)(body)
+        if endpoint in GET_ENDPOINTS | POST_ENDPOINTS:
+            return 405, "Method Not Allowed"
+        return 404, "Not Found"
+
+    def api_info(self, body):
+        return 200, {"version": self.version, "servername": self.settings["ServerName"],
+                     "description": self.settings["ServerDescription"], "worldguid": "0" * 32}
+
+    def api_players(self, body):
+        with self.lock:
+            if self.churn and self.players:
+                # 部分玩家下线，同样数量的新玩家上线
+                for _ in range(max(1, int(len(self.players) * self.churn))):
+                    self.players.pop(self.rng.randrange(len(self.players)))
+                    self.players.append(make_player(self.rng, self.next_player_index))
+                    self.next_player_index += 1
+            return 200, {"players": [dict(player) for player in self.players]}
+
+    def api_metrics(self, body):
+        with self.lock:
+            player_count = len(self.players)
+        return 200, {"serverfps": 60, "currentplayernum": player_count, "serverframetime": 16.67,
+                     "maxplayernum": self.settings["ServerPlayerMaxNum"],
+                     "uptime": int(time.monotonic() - self.start_time), "days": 1}
+
+    def api_settings(self, body):
+        return 200, dict(self.settings)
+
+    def api_announce(self, body):
+        if not isinstance(body.get("message"), str):
+            return 400, "message is required"
+        with self.lock:
+            self.announcements.append(body["message"])
+        return 200, ""
+
+    @staticmethod
+    def _user_id(body):
+        # 官方文档为 userid，本工具发送 userId，两种都接受
+        return body.get("userid") or body.get("userId")
+
+    def api_kick(self, body):
+        user_id = self._user_id(body)
+        with self.lock:
+            remaining = [player for player in self.players if player["userId"] != user_id]
+            if not user_id or len(remaining) == len(self.players):
+                return 400, "Player not found"
+            self.players = remaining
+        return 200, ""
+
+    def api_ban(self, body):
+        user_id = self._user_id(body)
+        if not user_id:
+            return 400, "userid is required"
+        with self.lock:
+            self.banned.add(user_id)
+            self.players = [player for player in self.players if player["userId"] != user_id]
+        return 200, ""
+
+    def api_unban(self, body):
+        user_id = self._user_id(body)
+        with self.lock:
+            if not user_id or user_id not in self.banned:
+                return 400, "Player is not banned"
+            self.banned.discard(user_id)
+        return 200, ""
+
+    def api_save(self, body):
+        with self.lock:
+            self.saved_count += 1
+        return 200, ""
+
+    def api_shutdown(self, body):
+        wait_time = body.get("waittime")
+        if not isinstance(wait_time, int) or isinstance(wait_time, bool):
+            return 400, "waittime is required"
+        if isinstance(body.get("message"), str):
+            with self.lock:
+                self.announcements.append(body["message"])
+        self._shutdown_later(wait_time)
+        return 200, ""
+
+    def api_stop(self, body):
+        self._shutdown_later(0)
+        return 200, ""
+
+
+def _make_handler(server):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self, status, data):
+            payload = (json.dumps(data, ensure_ascii=False) if isinstance(data, (dict, list)) else data).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json" if isinstance(data, (dict, list)) else "text/plain")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _dispatch(self, method):
+            length = int(self.headers.get("Content-Length") or 0)
+            raw_body = self.rfile.read(length) if length else b""
+            path = self.path.split("?")[0]
+            endpoint = path[len(API_PREFIX):] if path.startswith(API_PREFIX) else ""
+
+            fault = server.fault(endpoint)
+            if fault == "drop":
+                self.close_connection = True
+                return
+            time.sleep(server.delay() + (server.hang_time if fault == "timeout" else 0))
+            if not server.check_auth(self.headers.get("Authorization")):
+                self._respond(401, "Unauthorized")
+                return
+            if fault == "error":
+                self._respond(500, "Internal Server Error")
+                return
+            body = {}
+            if raw_body.strip():
+                try:
+                    body = json.loads(raw_body.decode("utf-8"))
+                except ValueError:
+                    self._respond(400, "Invalid JSON")
+                    return
+                if not isinstance(body, dict):
+                    self._respond(400, "Invalid JSON")
+                    return
+            self._respond(*server.handle(method, endpoint, body))
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="模拟的 PalServer REST API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8212)
+    parser.add_argument("--password", default="123456", help="管理员密码（用户名为 admin）")
+    parser.add_argument("--players", type=int, default=10, help="模拟玩家数量")
+    parser.add_argument("--churn", type=float, default=0.0, help="每次查询玩家列表时上下线的比例")
+    parser.add_argument("--latency", type=float, default=0.0, help="响应延迟(秒)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="延迟抖动(秒)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="返回500的比例")
+    parser.add_argument("--timeout-rate", type=float, default=0.0, help="挂起不响应的比例")
+    parser.add_argument("--hang-time", type=float, default=15.0, help="挂起的时间(秒)")
+    parser.add_argument("--drop-rate", type=float, default=0.0, help="直接断开连接的比例")
+    parser.add_argument("--error-endpoints", default="", help="只对这些接口注入错误，逗号分隔，如 players,info")
+    parser.add_argument("--restart-after", type=float, help="shutdown/stop 后多少秒重新监听")
+    parser.add_argument("--seed", type=int, default=0, help="随机数种子")
+    args = parser.parse_args(argv)
+
+    server = FakePalServer(args.host, args.port, password=args.password, players=args.players, latency=args.latency,
+                           jitter=args.jitter, error_rate=args.error_rate, timeout_rate=args.timeout_rate,
+                           drop_rate=args.drop_rate, hang_time=args.hang_time,
+                           error_endpoints=[name for name in args.error_endpoints.split(",") if name],
+                           churn=args.churn, restart_after=args.restart_after, seed=args.seed).start()
+    print(f"模拟服务器已启动: {server.url}{API_PREFIX}info （admin / {args.password}，{args.players} 名玩家），Ctrl+C 退出")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,9 +5,9 @@ import json
 import time
 
 # Add the project root to Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.palrestapi import PalRestAPI
+from utils.pal_restapi import PalRestAPI
 
 def test_all_api_functions():
     """测试所有API功能"""
@@ -134,6 +134,12 @@ def test_api_endpoints_directly():
 
 if __name__ == "__main__":
     print("开始测试所有REST API功能...")
+
+    # --fake：使用本地模拟服务器（fake_pal_server.py），不需要真实服务端；关服后立即重新监听
+    fake_server = None
+    if "--fake" in sys.argv:
+        from fake_pal_server import FakePalServer
+        fake_server = FakePalServer(port=8212, password="123456", restart_after=0).start()
     
     try:
         # 先测试API类的功能
@@ -147,4 +153,7 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"\n❌ 测试过程中出现错误: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
\ No newline at end of file
@@ -0,0 +1,54 @@
+import os
+import sys
+import tempfile
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import player_moderation
+
+"""
+    模块功能：
+    player_moderation 的玩家ID解析和封禁列表导入/导出检查（不需要服务端）
+
+    示例：
+    python test_code/test_player_moderation.py
+"""
+
+
+def test_parse_user_ids():
+    """测试从粘贴的文本中解析玩家ID"""
+    cases = [
+        ("steam_76561198000000001\nsteam_76561198000000002", ["steam_76561198000000001", "steam_76561198000000002"]),
+        # 17位 SteamID64 自动补全前缀，重复的ID只保留一个
+        ("76561198000000001, steam_76561198000000001; gdk_2535ABCDEF",
+         ["steam_76561198000000001", "gdk_2535ABCDEF"]),
+        # 普通的 snake_case 单词不是ID
+        ("ban steam_76561198000000001, the griefer_kid and user_id field; see ban_list", ["steam_76561198000000001"]),
+        # 紧挨着中文的ID
+        ("玩家steam_76561198000000001作弊", ["steam_76561198000000001"]),
+        ("踢出gdk_2535412345678901。", ["gdk_2535412345678901"]),
+        ("封禁：76561198000000003（炸家）", ["steam_76561198000000003"]),
+        # 更长的数字或单词中的一部分不是ID
+        ("order 765611980000000012345 xsteam_123", []),
+    ]
+    for text, expected in cases:
+        result = player_moderation.parse_user_ids(text)
+        assert result == expected, f"{text!r}: {result} != {expected}"
+        print(f"✅ {text!r} -> {result}")
+
+
+def test_ban_list_round_trip():
+    """测试封禁列表导出后再导入，玩家名称不丢失"""
+    players = [("steam_76561198000000001", "甲"), ("gdk_2535412345678901", ""), ("steam_76561198000000003", "丙")]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = os.path.join(temp_dir, "banlist.txt")
+        player_moderation.save_ban_list(path, players, "测试服务器")
+        result = player_moderation.load_ban_list(path)
+    assert result == players, f"{result} != {players}"
+    print(f"✅ 封禁列表导出/导入: {result}")
+
+
+if __name__ == "__main__":
+    test_parse_user_ids()
+    test_ban_list_round_trip()
@@ -4,20 +4,14 @@ import requests
 import json
 
 # Add the project root to Python path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.palrestapi import PalRestAPI
+from utils.pal_restapi import PalRestAPI
 
-def test_shutdown_server():
+def test_shutdown_server(host="127.0.0.1", port=8212, username="admin", password="123456"):
     """测试关闭服务器方法"""
     print("=== 测试关闭服务器方法 ===")
     
-    # 服务器信息
-    host = "127.0.0.1"
-    port = 8212
-    username = "admin"
-    password = "123456"
-    
     # 直接使用requests测试不同的参数格式
     print("\n1. 使用requests直接测试shutdown API：")
     url = f"http://{host}:{port}/v1/api/shutdown"
@@ -63,11 +57,24 @@ def test_shutdown_server():
 
 if __name__ == "__main__":
     print("开始测试关闭服务器功能...")
+
+    # --fake：使用本地模拟服务器（fake_pal_server.py）和随机生成的管理员密码，不需要真实服务端；关服后立即重新监听
+    fake_server = None
+    server_options = {}
+    if "--fake" in sys.argv:
+        from fake_pal_server import FakePalServer
+        from utils.random_password import random_string
+        fake_server = FakePalServer(password=random_string(), restart_after=0).start()
+        server_options = {"host": fake_server.host, "port": fake_server.port,
+                          "username": fake_server.username, "password": fake_server.password}
     
     try:
-        test_shutdown_server()
+        test_shutdown_server(**server_options)
         print("\n=== 测试完成 ===")
     except Exception as e:
         print(f"\n❌ 测试过程中出现错误: {e}")
         import traceback
-        traceback.print_exc()
\ No newline at end of file
+        traceback.print_exc()
+    finally:
+        if fake_server is not None:
+            fake_server.stop()
\ No newline at end of file
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from datetime import datetime
+
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QTextCharFormat, QColor, QTextCursor
+
+"""
+    模块功能：
+    主界面控制台日志（QTextBrowser）
+    1. 文字格式在创建时一次性生成，追加消息时直接复用
+    2. 限制最大行数，超出后由 QTextDocument 自动裁剪最早的行
+    3. 同一帧内的消息合并为一次编辑批量写入，每条消息的耗时与历史消息数量无关
+"""
+
+MAX_LINES = 5000  # 控制台保留的最大行数
+FLUSH_INTERVAL = 16  # 合并写入的间隔(毫秒)，约一帧
+
+# 消息类型 -> 前缀片段 [(文本, 颜色名), ...]
+MESSAGE_PREFIXES = {
+    "client_success": [("  CLIENT: ", "sky_blue"), ("[SUCCESS] ", "green")],
+    "client_message": [("  CLIENT: ", "sky_blue"), ("[MESSAGE] ", "olive_drab")],
+    "client_error": [("  CLIENT: ", "sky_blue"), ("  [ERROR] ", "red")],
+    "client_command": [("  CLIENT: ", "sky_blue"), ("[COMMAND] ", "blue")],
+    "server_success": [("  SERVER: ", "grey"), ("[SUCCESS] ", "green")],
+}
+
+COLORS = {
+    "black": QColor("black"),
+    "red": QColor("red"),
+    "green": QColor("green"),
+    "blue": QColor("blue"),
+    "grey": QColor(190, 190, 190),
+    "sky_blue": QColor(135, 206, 235),
+    "dark_violet": QColor(148, 0, 211),
+    "olive_drab": QColor(105, 139, 34),
+}
+
+
+class ConsoleLog:
+    def __init__(self, text_browser, max_lines=MAX_LINES, flush_interval=FLUSH_INTERVAL):
+        """
+        参数:
+            text_browser: 显示日志的 QTextBrowser
+            max_lines: 保留的最大行数
+            flush_interval: 合并写入的间隔(毫秒)
+        """
+        self.text_browser = text_browser
+        self.document = text_browser.document()
+        # 只读控制台不需要撤销记录，否则每次写入都会累积内存
+        self.document.setUndoRedoEnabled(False)
+        self.document.setMaximumBlockCount(max_lines)
+
+        self.formats = {}
+        for name, color in COLORS.items():
+            text_format = QTextCharFormat()
+            text_format.setForeground(color)
+            self.formats[name] = text_format
+
+        self.pending = []
+        self.flush_timer = QTimer(text_browser)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(flush_interval)
+        self.flush_timer.timeout.connect(self.flush)
+
+    def append(self, message_type, message):
+        """追加一条消息，在下一帧统一写入"""
+        self.pending.append((datetime.now().strftime("%Y-%m-%d %H:%M:%S"), message_type, message))
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def flush(self):
+        """将待写入的消息一次性写入控制台"""
+        if not self.pending:
+            return
+        pending, self.pending = self.pending, []
+
+        cursor = QTextCursor(self.document)
+        cursor.movePosition(QTextCursor.End)
+        cursor.beginEditBlock()
+        first_block = self.document.isEmpty()
+        for timestamp, message_type, message in pending:
+            if first_block:
+                first_block = False
+            else:
+                cursor.insertBlock()
+            cursor.insertText(timestamp, self.formats["dark_violet"])
+            for text, color in MESSAGE_PREFIXES.get(message_type, []):
+                cursor.insertText(text, self.formats[color])
+            cursor.insertText(message, self.formats["black"])
+        cursor.endEditBlock()
+
+        scroll_bar = self.text_browser.verticalScrollBar()
+        scroll_bar.setValue(scroll_bar.maximum())
+
+    def clear(self):
+        """清空控制台"""
+        self.pending = []
+        self.text_browser.clear()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import hmac
+import json
+import uuid
+import logging
+import threading
+import collections
+from urllib.parse import urlparse, parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils import server_instance
+
+"""
+    模块功能：
+    后台服务的本地 HTTP/JSON 控制接口（只依赖标准库）
+    1. 请求需带 Authorization: Bearer <token>，token 保存在 config.json 的 daemon_token 中
+    2. GET  /api/ping                       -> 服务标识
+       GET  /api/state?since=序号           -> 系统资源、所有服务器状态、序号之后的事件（控制台消息、玩家列表变化等）
+       POST /api/servers {"name"}           -> 添加服务器
+       POST /api/servers/<名称>/<操作>       -> 对单个服务器执行操作，见 DaemonAPI.actions
+    3. 返回 {"ok": true/false, "result": ...}，与工具其他模块的 (flag, result) 约定一致
+    4. 事件保存在内存环形缓冲中，客户端按序号增量拉取，断线重连后不会重复收到；
+       序号在后台服务重启后从 0 开始，state 返回的 instance_id 每次启动不同，客户端据此重新同步
+"""
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = "pal_daemon"
+API_VERSION = 1
+DEFAULT_PORT = 8765
+MAX_EVENTS = 2000  # 事件缓冲的最大条数
+MAX_BODY_BYTES = 1024 * 1024
+
+# 允许通过控制接口调用的 REST API 方法
+REST_METHODS = {"get_server_info", "get_players", "announce_message", "kick_player", "ban_player",
+                "unban_player", "save_world", "shutdown_server", "stop_server"}
+
+
+class DaemonAPI:
+    def __init__(self, supervisor, token):
+        """
+        参数:
+            supervisor: server_supervisor.ServerSupervisor
+            token: 访问令牌
+        """
+        self.supervisor = supervisor
+        self.token = token
+        self.events = collections.deque(maxlen=MAX_EVENTS)
+        self.seq = 0
+        self.instance_id = uuid.uuid4().hex  # 本次启动的标识
+        self.lock = threading.Lock()
+        supervisor.add_listener(self._on_event)
+        self.actions = {
+            "config": self._action_config,
+            "rename": self._action_rename,
+            "remove": lambda instance, body: self.supervisor.remove_instance(instance),
+            "check_path": lambda instance, body: instance.check_palserver_path(),
+            "connect": self._action_connect,
+            "start": self._action_start,
+            "stop": lambda instance, body: instance.stop(),
+            "kill": lambda instance, body: instance.kill(),
+            "countdown": self._action_countdown,
+            "cancel_countdown": lambda instance, body: (True, instance.cancel_countdown()),
+            "api": self._action_api,
+            "refresh_players": lambda instance, body: (True, self.supervisor.poll_players(instance)),
+            "backup": lambda instance, body: (True, self.supervisor.backup(instance)),
+        }
+
+    def _on_event(self, instance, event, data):
+        with self.lock:
+            self.seq += 1
+            self.events.append({"seq": self.seq, "server": instance.name if instance else None, "event": event, "data": data})
+
+    def state(self, since=0):
+        with self.lock:
+            events = [event for event in self.events if event["seq"] > since]
+            seq = self.seq
+        return {
+            "instance_id": self.instance_id,
+            "seq": seq,
+            "system": self.supervisor.system_stats,
+            "servers": [instance.status() for instance in self.supervisor.instances],
+            "events": events,
+        }
+
+    def handle(self, method, path, query, body):
+        """
+        处理一个请求
+
+        返回:
+            (HTTP状态码, 响应对象)
+        """
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if parts[:1] != ["api"]:
+            return 404, {"ok": False, "result": "未知的接口"}
+        parts = parts[1:]
+        if method == "GET" and parts == ["ping"]:
+            return 200, {"ok": True, "result": {"service": SERVICE_NAME, "version": API_VERSION}}
+        if method == "GET" and parts == ["state"]:
+            since = int(query.get("since", ["0"])[0] or 0)
+            return 200, {"ok": True, "result": self.state(since)}
+        if method == "POST" and parts == ["servers"]:
+            flag, result = self.supervisor.add_instance(str(body.get("name", "")))
+            return 200, {"ok": flag, "result": result.name if flag else result}
+        if method == "POST" and len(parts) == 3 and parts[0] == "servers":
+            instance = self.supervisor.get(parts[1])
+            if instance is None:
+                return 404, {"ok": False, "result": f"服务器不存在: {parts[1]}"}
+            action = self.actions.get(parts[2])
+            if action is None:
+                return 404, {"ok": False, "result": f"未知的操作: {parts[2]}"}
+            flag, result = action(instance, body)
+            return 200, {"ok": flag, "result": result}
+        return 404, {"ok": False, "result": "未知的接口"}
+
+    def _action_config(self, instance, body):
+        """更新服务器配置（只更新提交的字段）"""
+        for key in server_instance.GLOBAL_CONFIG_KEYS | {"instance_name"}:
+            body.pop(key, None)
+        instance.config.update(body)
+        self.supervisor.save_config()
+        return True, instance.status()["config"]
+
+    def _action_rename(self, instance, body):
+        flag, result = self.supervisor.rename_instance(instance, str(body.get("name", "")))
+        return flag, result.name if flag else result
+
+    def _action_connect(self, instance, body):
+        """在线程池中连接，结果以 connected 事件返回"""
+        return True, self.supervisor.connect(instance, body.get("api_addr"), body.get("api_port"), body.get("api_password"))
+
+    def _action_start(self, instance, body):
+        return instance.start(body.get("game_port"), body.get("game_publicport"), body.get("game_player_limit"))
+
+    def _action_countdown(self, instance, body):
+        action = body.get("action", server_instance.COUNTDOWN_RESTART)
+        if action not in (server_instance.COUNTDOWN_RESTART, server_instance.COUNTDOWN_STOP):
+            return False, f"未知的倒计时动作: {action}"
+        return instance.begin_countdown(action, int(body.get("seconds", 10)))
+
+    def _action_api(self, instance, body):
+        method_name = body.get("method", "")
+        if method_name not in REST_METHODS:
+            return False, f"不允许调用的方法: {method_name}"
+        return instance.call_api(method_name, *body.get("args", []))
+
+
+def _make_handler(api):
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, status, data):
+            payload = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _dispatch(self, method):
+            if not hmac.compare_digest(self.headers.get("Authorization", ""), "Bearer " + api.token):
+                self._respond(401, {"ok": False, "result": "未授权"})
+                return
+            body = {}
+            length = int(self.headers.get("Content-Length") or 0)
+            if length > MAX_BODY_BYTES:
+                self._respond(413, {"ok": False, "result": "请求过大"})
+                return
+            if length:
+                try:
+                    body = json.loads(self.rfile.read(length).decode("utf-8"))
+                except ValueError:
+                    self._respond(400, {"ok": False, "result": "请求不是有效的JSON"})
+                    return
+                if not isinstance(body, dict):
+                    self._respond(400, {"ok": False, "result": "请求必须是JSON对象"})
+                    return
+            url = urlparse(self.path)
+            try:
+                status, data = api.handle(method, url.path, parse_qs(url.query), body)
+            except Exception as e:
+                logger.exception(f"控制接口处理失败: {self.path}")
+                status, data = 500, {"ok": False, "result": f"未知错误: {str(e)}"}
+            self._respond(status, data)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    return Handler
+
+
+def serve(supervisor, token, host="127.0.0.1", port=DEFAULT_PORT):
+    """
+    在后台线程中启动控制接口
+
+    返回:
+        ThreadingHTTPServer（调用 shutdown() 停止）
+    """
+    api = DaemonAPI(supervisor, token)
+    httpd = ThreadingHTTPServer((host, port), _make_handler(api))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="pal-daemon-api", daemon=True).start()
+    return httpd
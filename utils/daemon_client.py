@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import time
+import logging
+import threading
+from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from utils import daemon_api
+from utils.server_instance import ServerInstance
+from utils.server_supervisor import ServerSupervisor
+
+"""
+    模块功能：
+    后台服务（pal_daemon.py）控制接口的客户端
+    1. DaemonClient：发送请求，返回 (flag, result)
+    2. RemoteSupervisor / RemoteServerInstance：与 ServerSupervisor / ServerInstance 接口相同，
+       主窗口连接到后台服务时用它们代替本地实例，自身不做任何监控，只显示后台服务的状态并转发操作
+    3. tick() 在工作线程中增量拉取状态和事件；启动、停止、REST API 调用等操作由界面通过 supervisor.perform 提交到工作线程，
+       连接、刷新玩家、备份也在工作线程中转发，结果以监听器事件通知，界面线程不会等待网络
+    4. 界面每次修改配置（输入框每次按键）只做标记，停止修改 CONFIG_PUSH_DELAY 秒后由 tick() 在工作线程中提交一次；
+       提交之前拉取到的状态不覆盖本地的配置修改
+    5. 配置文件（PalWorldSettings.ini）的读写仍在本机进行，后台服务与界面运行在同一台机器上
+"""
+
+logger = logging.getLogger(__name__)
+
+REQUEST_TIMEOUT = 10  # 控制接口请求超时(秒)
+PING_TIMEOUT = 0.5  # 启动时探测后台服务的超时(秒)
+CLIENT_WORKERS = 4  # 转发操作的线程数，避免操作排在状态拉取之后
+CONFIG_PUSH_DELAY = 1.0  # 配置停止修改多少秒后提交给后台服务
+
+
+class DaemonClient:
+    def __init__(self, host="127.0.0.1", port=daemon_api.DEFAULT_PORT, token=""):
+        self.base_url = f"http://{host}:{port}/api"
+        self.headers = {"Authorization": "Bearer " + token}
+        self.session = requests.Session()
+
+    @classmethod
+    def from_config(cls, config):
+        """使用 config.json 中的 daemon_port / daemon_token"""
+        return cls("127.0.0.1", config.get("daemon_port", daemon_api.DEFAULT_PORT), config.get("daemon_token", ""))
+
+    def request(self, method, path, data=None, timeout=REQUEST_TIMEOUT):
+        """
+        返回:
+            (flag, result)
+        """
+        try:
+            response = self.session.request(method, self.base_url + path, json=data, headers=self.headers, timeout=timeout)
+            body = response.json()
+        except requests.exceptions.ConnectionError:
+            return False, "连接错误: 无法连接到后台服务"
+        except requests.exceptions.Timeout:
+            return False, "超时错误: 后台服务无响应"
+        except ValueError:
+            return False, "后台服务返回了无效的数据"
+        return bool(body.get("ok")), body.get("result")
+
+    def ping(self, timeout=PING_TIMEOUT):
+        """后台服务是否在运行（且令牌正确）"""
+        flag, result = self.request("GET", "/ping", timeout=timeout)
+        return flag and isinstance(result, dict) and result.get("service") == daemon_api.SERVICE_NAME
+
+    def state(self, since=0):
+        return self.request("GET", f"/state?since={since}")
+
+    def add_server(self, name):
+        return self.request("POST", "/servers", {"name": name})
+
+    def action(self, name, action, data=None):
+        return self.request("POST", f"/servers/{quote(name, safe='')}/{action}", data or {})
+
+
+class RemoteServerInstance(ServerInstance):
+    """后台服务中的一个服务器；状态由 RemoteSupervisor 定期更新，操作转发给后台服务"""
+
+    def __init__(self, status, supervisor):
+        super().__init__(dict(status["config"]), supervisor)
+        self.update(status)
+
+    @property
+    def client(self):
+        return self.supervisor.client
+
+    def update(self, status, update_config=True):
+        """
+        参数:
+            update_config: 是否用后台服务的配置覆盖本地配置（本地有未提交的修改时为 False）
+        """
+        if update_config:
+            self.config.update(status["config"])
+        self.server_run_flag = status["server_run_flag"]
+        self.rest_api_connect_flag = status["rest_api_connect_flag"]
+        self.rest_api_health = status.get("rest_api_health")
+        self.server_version = status["server_version"]
+        self.player_list = status["player_list"]
+        self.countdown = status["countdown"]
+        self.stats = status["stats"]
+
+    def check_palserver_path(self):
+        flag, result = self.client.action(self.name, "check_path")
+        if flag is False:
+            self.config.pop("palserver_path", None)
+            return False, result
+        # 配置文件在本机读取，用于界面显示和编辑
+        return super().check_palserver_path()
+
+    def api_health(self):
+        return self.rest_api_health
+
+    def call_api(self, method_name, *args):
+        return self.client.action(self.name, "api", {"method": method_name, "args": list(args)})
+
+    def start(self, game_port=None, game_publicport=None, game_player_limit=None):
+        # 启动参数（自定义启动项等）要在启动前提交
+        self.supervisor.save_config()
+        self.supervisor.push_config()
+        flag, result = self.client.action(self.name, "start", {
+            "game_port": game_port, "game_publicport": game_publicport, "game_player_limit": game_player_limit})
+        if flag:
+            self.server_run_flag = True
+        return flag, result
+
+    def stop(self):
+        flag, result = self.client.action(self.name, "stop")
+        if flag:
+            self.server_run_flag = False
+        return flag, result
+
+    def kill(self):
+        return self.client.action(self.name, "kill")
+
+    def begin_countdown(self, action, seconds, trigger="manual"):
+        return self.client.action(self.name, "countdown", {"action": action, "seconds": seconds})
+
+    def cancel_countdown(self):
+        self.client.action(self.name, "cancel_countdown")
+
+    def backup(self):
+        return self.client.action(self.name, "backup")
+
+    def refresh_players(self):
+        return self.client.action(self.name, "refresh_players")
+
+
+class RemoteSupervisor(ServerSupervisor):
+    """连接到后台服务的 supervisor，接口与 ServerSupervisor 相同"""
+
+    def __init__(self, client, state, log=None):
+        """
+        参数:
+            client: DaemonClient
+            state: 首次拉取的状态（client.state() 的结果）
+            log: event_log.EventLog，界面发起的操作在本机记录
+        """
+        self.client = client
+        self.event_log = log
+        self.config_path = None
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.running_tasks = set()
+        self.executor = ThreadPoolExecutor(max_workers=CLIENT_WORKERS, thread_name_prefix="pal-daemon-client")
+        self.config_changed_at = None  # 最近一次未提交的配置修改时间
+        self.config_pushes = 0  # 提交配置的次数，拉取状态期间有提交时不使用这次状态中的配置
+        self.seq = state["seq"]
+        self.instance_id = state.get("instance_id")  # 后台服务本次启动的标识，变化时重新同步消息
+        self.system_stats = state["system"]
+        self.instances = [RemoteServerInstance(status, self) for status in state["servers"]]
+        self.config = self.instances[0].config
+
+    @classmethod
+    def attach(cls, config, log=None):
+        """
+        后台服务在运行时连接它
+
+        返回:
+            RemoteSupervisor，后台服务未运行时返回 None
+        """
+        client = DaemonClient.from_config(config)
+        if not client.ping():
+            return None
+        flag, state = client.state()
+        if flag is False:
+            return None
+        supervisor = cls(client, state, log)
+        supervisor.seq = 0  # 第一次 tick 时取回后台服务缓冲中的历史消息
+        return supervisor
+
+    def save_config(self):
+        """记录配置已修改，由 tick() 在停止修改 CONFIG_PUSH_DELAY 秒后提交（界面每次按键都会调用）"""
+        with self.lock:
+            self.config_changed_at = time.monotonic()
+
+    @property
+    def config_pending(self):
+        """是否有还未提交完成的配置修改"""
+        with self.lock:
+            return self.config_changed_at is not None or (id(None), "config") in self.running_tasks
+
+    def push_config(self):
+        """把各服务器的配置提交给后台服务保存（在工作线程中调用）；失败时保留标记，稍后重试"""
+        with self.lock:
+            if self.config_changed_at is None:
+                return
+            self.config_changed_at = None
+            self.config_pushes += 1
+            instances = list(self.instances)
+        for instance in instances:
+            flag, result = self.client.action(instance.name, "config", dict(instance.config))
+            if flag is False:
+                logger.warning(f"[{instance.name}] 配置保存失败: {result}")
+                with self.lock:
+                    if self.config_changed_at is None:
+                        self.config_changed_at = time.monotonic()
+
+    def add_instance(self, name):
+        flag, result = self.client.add_server(name.strip())
+        if flag is False:
+            return False, result
+        self.refresh()
+        return True, self.get(result)
+
+    def rename_instance(self, instance, name):
+        flag, result = self.client.action(instance.name, "rename", {"name": name.strip()})
+        if flag is False:
+            return False, result
+        instance.config["instance_name"] = result
+        self.emit(None, "servers")
+        return True, instance
+
+    def remove_instance(self, instance):
+        flag, result = self.client.action(instance.name, "remove")
+        if flag is False:
+            return False, result
+        self.refresh()
+        return True, ""
+
+    def tick(self, now=None):
+        """在工作线程中拉取后台服务的状态、提交修改过的配置（上一次未完成时跳过）"""
+        self.submit(None, "state", self.refresh)
+        with self.lock:
+            push_due = self.config_changed_at is not None and time.monotonic() - self.config_changed_at >= CONFIG_PUSH_DELAY
+        if push_due:
+            self.submit(None, "config", self.push_config)
+
+    def refresh(self):
+        config_pushes = self.config_pushes
+        flag, state = self.client.state(self.seq)
+        if flag and (state["seq"] < self.seq or state.get("instance_id") != self.instance_id):
+            # 后台服务重启后序号从 0 重新开始，按旧序号查询会收不到新消息，从头重新获取
+            if self.instance_id is not None:
+                logger.info("后台服务已重启，重新同步消息")
+            self.instance_id = state.get("instance_id")
+            if self.seq:
+                self.seq = 0
+                flag, state = self.client.state(self.seq)
+        if flag is False:
+            logger.warning(f"获取后台服务状态失败: {state}")
+            return
+        self.system_stats = state["system"]
+        # 配置还未提交完，或拉取期间提交过，状态中的配置是旧的，不覆盖界面上的修改
+        update_config = not self.config_pending and self.config_pushes == config_pushes
+        with self.lock:
+            by_name = {instance.name: instance for instance in self.instances}
+            instances = []
+            for status in state["servers"]:
+                instance = by_name.get(status["name"])
+                if instance is None:
+                    instance = RemoteServerInstance(status, self)
+                else:
+                    instance.update(status, update_config)
+                instances.append(instance)
+            changed = [instance.name for instance in instances] != [instance.name for instance in self.instances]
+            self.instances = instances
+        if changed:
+            self.emit(None, "servers")
+        for event in state["events"]:
+            if event["event"] == "servers":
+                continue
+            instance = self.get(event["server"])
+            if instance is not None:
+                data = tuple(event["data"]) if isinstance(event["data"], list) and event["event"] != "players" else event["data"]
+                self.emit(instance, event["event"], data)
+        self.seq = state["seq"]
+
+    # 以下操作的结果（玩家列表、连接结果、备份结果）由后台服务以事件通知，这里只提示转发失败
+
+    def poll_players(self, instance):
+        return self.perform(instance, "players", lambda: self.client.action(instance.name, "refresh_players"))
+
+    def connect(self, instance, api_addr=None, api_port=None, api_password=None):
+        return self.perform(instance, "connect", lambda: self.client.action(instance.name, "connect", {
+            "api_addr": api_addr, "api_port": api_port, "api_password": api_password}))
+
+    def backup(self, instance):
+        return self.perform(instance, "backup", lambda: self.client.action(instance.name, "backup"))
+
+    def shutdown(self):
+        """退出前提交还未提交的配置修改"""
+        self.push_config()
+        super().shutdown()
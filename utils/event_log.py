@@ -0,0 +1,303 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+
+"""
+    模块功能：
+    持久化的结构化事件日志（SQLite）
+    1. 命令、踢人、封禁、启动、重启、崩溃、备份等操作按条追加写入，退出后不丢失
+    2. 按时间、事件类型建立索引，查询只读取命中的记录，不加载全部历史
+    3. 数据库超过大小上限后把记录移入归档文件，查询时自动包含归档；
+       界面、后台服务和命令行共用同一个 events.db，轮转在写事务中复制并删除记录，不重命名正在使用的文件
+    4. 命令行查询：python -m utils.event_log --type ban --days 30
+"""
+
+logger = logging.getLogger(__name__)
+
+# 事件类型
+EVENT_COMMAND = "command"
+EVENT_BROADCAST = "broadcast"
+EVENT_KICK = "kick"
+EVENT_BAN = "ban"
+EVENT_UNBAN = "unban"
+EVENT_START = "start"
+EVENT_STOP = "stop"
+EVENT_RESTART = "restart"
+EVENT_KILL = "kill"
+EVENT_CRASH = "crash"
+EVENT_BACKUP = "backup"
+EVENT_ERROR = "error"
+
+EVENT_TYPES = {
+    EVENT_COMMAND: "命令",
+    EVENT_BROADCAST: "广播",
+    EVENT_KICK: "踢出",
+    EVENT_BAN: "封禁",
+    EVENT_UNBAN: "解封",
+    EVENT_START: "启动",
+    EVENT_STOP: "停止",
+    EVENT_RESTART: "重启",
+    EVENT_KILL: "强制停止",
+    EVENT_CRASH: "崩溃",
+    EVENT_BACKUP: "备份",
+    EVENT_ERROR: "错误",
+}
+
+DB_NAME = "events.db"
+MAX_DB_BYTES = 20 * 1024 * 1024  # 单个数据库大小上限，超过后轮转
+MAX_ARCHIVES = 10  # 保留的归档数量
+ROTATE_CHECK_INTERVAL = 500  # 每写入多少条检查一次是否需要轮转
+ROTATE_CHECK_SECONDS = 600  # 写入量少时，距上次检查超过多少秒也检查一次
+ROTATE_BATCH_ROWS = 1000  # 轮转时每批复制的记录数
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts REAL NOT NULL,
+    event_type TEXT NOT NULL,
+    server TEXT NOT NULL DEFAULT '',
+    message TEXT NOT NULL DEFAULT '',
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_ts ON events (ts);
+CREATE INDEX IF NOT EXISTS idx_events_type_ts ON events (event_type, ts);
+"""
+
+
+def default_log_dir():
+    """默认事件日志目录 ~/.pal_server_manager/events"""
+    from utils.http_cache import get_cache_dir
+    return get_cache_dir("events")
+
+
+class EventLog:
+    def __init__(self, log_dir=None, max_bytes=MAX_DB_BYTES, max_archives=MAX_ARCHIVES, readonly=False):
+        """
+        参数:
+            log_dir: 日志目录
+            max_bytes: 单个数据库大小上限(字节)
+            max_archives: 保留的归档数量
+            readonly: 只读（命令行查询、查询对话框）：以 mode=ro 打开，不写入、不创建、不轮转
+        """
+        self.log_dir = log_dir or default_log_dir()
+        self.db_path = os.path.join(self.log_dir, DB_NAME)
+        self.max_bytes = max_bytes
+        self.max_archives = max_archives
+        self.readonly = readonly
+        self.lock = threading.Lock()
+        self.write_count = 0
+        if readonly:
+            # 查询使用各自的只读连接，这里不保持连接
+            self.connection = None
+            return
+        os.makedirs(self.log_dir, exist_ok=True)
+        self.connection = self._connect(self.db_path)
+        # 启动时检查一次：每次运行写入不多（少于 ROTATE_CHECK_INTERVAL 条）时，数据库也不会跨多次运行无限增长
+        with self.lock:
+            self._rotate_if_needed()
+
+    @staticmethod
+    def _connect(db_path):
+        connection = sqlite3.connect(db_path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(SCHEMA)
+        return connection
+
+    def record(self, event_type, message="", server="", **data):
+        """
+        追加一条事件
+
+        参数:
+            event_type: 事件类型，见 EVENT_TYPES
+            message: 事件描述
+            server: 服务器名称（多服务器时区分来源）
+            data: 附加字段，以JSON保存
+        """
+        if self.readonly:
+            raise sqlite3.OperationalError("事件日志以只读方式打开，不能写入")
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO events (ts, event_type, server, message, data) VALUES (?, ?, ?, ?, ?)",
+                (time.time(), event_type, server, message, json.dumps(data, ensure_ascii=False) if data else None))
+            self.connection.commit()
+            self.write_count += 1
+            if self.write_count % ROTATE_CHECK_INTERVAL == 0 or \
+                    time.monotonic() - self.last_rotate_check >= ROTATE_CHECK_SECONDS:
+                self._rotate_if_needed()
+
+    def _archive_paths(self):
+        """归档数据库路径，按时间从新到旧排列"""
+        if not os.path.isdir(self.log_dir):
+            return []
+        archives = [os.path.join(self.log_dir, name) for name in os.listdir(self.log_dir)
+                    if name.startswith("events-") and name.endswith(".db")]
+        return sorted(archives, key=os.path.getmtime, reverse=True)
+
+    def _data_bytes(self):
+        """数据库中记录实际占用的大小（删除记录后空出的页会被复用，不计入）"""
+        page_count = self.connection.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = self.connection.execute("PRAGMA freelist_count").fetchone()[0]
+        page_size = self.connection.execute("PRAGMA page_size").fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def _new_archive_path(self):
+        archive_name = datetime.now().strftime("events-%Y%m%d%H%M%S")
+        archive_path = os.path.join(self.log_dir, archive_name + ".db")
+        index = 1
+        while os.path.exists(archive_path):
+            archive_path = os.path.join(self.log_dir, f"{archive_name}-{index}.db")
+            index += 1
+        return archive_path
+
+    def _rotate_if_needed(self):
+        """
+        超过大小上限时把全部记录移入新的归档数据库
+
+        其他进程可能同时打开着 events.db，因此不重命名或删除它：在写事务（BEGIN IMMEDIATE，跨进程互斥）中
+        复制记录到归档并清空，其他进程的连接继续使用同一个文件，不需要重新连接
+        """
+        self.last_rotate_check = time.monotonic()
+        if self._data_bytes() < self.max_bytes:
+            return
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as e:
+            logger.warning(f"事件日志正被其他进程写入，稍后再轮转: {e}")
+            return
+        archive_path = None
+        try:
+            if self._data_bytes() < self.max_bytes:
+                self.connection.rollback()  # 其他进程已经轮转
+                return
+            archive_path = self._new_archive_path()
+            archive = sqlite3.connect(archive_path)
+            try:
+                archive.executescript(SCHEMA)
+                cursor = self.connection.execute("SELECT ts, event_type, server, message, data FROM events ORDER BY id")
+                while True:
+                    rows = cursor.fetchmany(ROTATE_BATCH_ROWS)
+                    if not rows:
+                        break
+                    archive.executemany(
+                        "INSERT INTO events (ts, event_type, server, message, data) VALUES (?, ?, ?, ?, ?)", rows)
+                archive.commit()
+            finally:
+                archive.close()
+            self.connection.execute("DELETE FROM events")
+            self.connection.commit()
+        except Exception:
+            self.connection.rollback()
+            if archive_path and os.path.exists(archive_path):
+                os.remove(archive_path)
+            raise
+        for old_archive in self._archive_paths()[self.max_archives:]:
+            try:
+                os.remove(old_archive)
+            except OSError as e:
+                # Windows 下其他进程正在查询该归档时无法删除，下次轮转时再删除
+                logger.warning(f"删除旧的事件日志归档失败: {e}")
+
+    def search(self, event_types=None, since=None, until=None, text=None, server=None, limit=1000):
+        """
+        查询事件（从新到旧），逐条返回，不会一次性读入全部历史
+
+        参数:
+            event_types: 事件类型列表，None 表示全部
+            since / until: 起止时间（datetime 或时间戳）
+            text: 描述中包含的关键字
+            server: 服务器名称
+            limit: 最多返回条数，None 表示不限制
+
+        返回:
+            迭代器，每项为 {"time", "event_type", "server", "message", "data"}
+        """
+        conditions = []
+        params = []
+        if event_types:
+            conditions.append("event_type IN (%s)" % ",".join("?" * len(event_types)))
+            params.extend(event_types)
+        if since is not None:
+            conditions.append("ts >= ?")
+            params.append(since.timestamp() if isinstance(since, datetime) else since)
+        if until is not None:
+            conditions.append("ts <= ?")
+            params.append(until.timestamp() if isinstance(until, datetime) else until)
+        if text:
+            conditions.append("message LIKE ?")
+            params.append(f"%{text}%")
+        if server is not None:
+            conditions.append("server = ?")
+            params.append(server)
+        sql = "SELECT ts, event_type, server, message, data FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY ts DESC"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        remaining = limit
+        for db_path in [self.db_path] + self._archive_paths():
+            if remaining is not None and remaining <= 0:
+                return
+            if not os.path.exists(db_path):
+                continue  # 只读打开时数据库可能还没有创建
+            # 每次查询使用独立的只读连接（WAL模式下不阻塞写入），游标逐行读取
+            connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            try:
+                for ts, event_type, server_name, message, data in connection.execute(sql, params):
+                    yield {
+                        "time": datetime.fromtimestamp(ts),
+                        "event_type": event_type,
+                        "server": server_name,
+                        "message": message,
+                        "data": json.loads(data) if data else {},
+                    }
+                    if remaining is not None:
+                        remaining -= 1
+                        if remaining <= 0:
+                            return
+            finally:
+                connection.close()
+
+    def close(self):
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+
+
+def main(argv=None):
+    """命令行查询事件日志"""
+    parser = argparse.ArgumentParser(description="查询帕鲁服务器管理工具事件日志")
+    parser.add_argument("--type", dest="event_types", action="append", choices=sorted(EVENT_TYPES), help="事件类型，可重复指定")
+    parser.add_argument("--days", type=float, help="最近多少天")
+    parser.add_argument("--text", help="描述中包含的关键字")
+    parser.add_argument("--server", help="服务器名称")
+    parser.add_argument("--limit", type=int, default=1000, help="最多返回条数，0 表示不限制")
+    parser.add_argument("--json", action="store_true", help="以JSON Lines格式输出")
+    parser.add_argument("--log-dir", help="事件日志目录")
+    args = parser.parse_args(argv)
+
+    # 只读打开：查询不会触发轮转，不影响正在写入的界面或后台服务
+    event_log = EventLog(args.log_dir, readonly=True)
+    since = datetime.now() - timedelta(days=args.days) if args.days else None
+    for event in event_log.search(args.event_types, since=since, text=args.text, server=args.server, limit=args.limit or None):
+        if args.json:
+            print(json.dumps(dict(event, time=event["time"].strftime("%Y-%m-%d %H:%M:%S")), ensure_ascii=False))
+        else:
+            print(f"{event['time']:%Y-%m-%d %H:%M:%S}  {EVENT_TYPES.get(event['event_type'], event['event_type']):<4}  "
+                  f"{event['server']}  {event['message']}")
+    event_log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
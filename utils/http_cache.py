@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import time
+import hashlib
+
+"""
+    模块功能：
+    带本地缓存的HTTP获取（更新检查、公告等）
+    1. 缓存有效期（TTL）内直接返回本地缓存，不发起网络请求
+    2. 缓存过期后使用 ETag / If-Modified-Since 条件请求，内容未变化时服务器返回304
+    3. 网络失败时返回旧缓存，并在一段时间内不再尝试联网（离线启动零等待）
+"""
+
+
+def get_cache_dir(*sub_dirs):
+    """获取本工具的缓存目录（~/.pal_server_manager/...），不存在时自动创建"""
+    cache_dir = os.path.join(os.path.expanduser("~"), ".pal_server_manager", *sub_dirs)
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+class CachedFetcher:
+    def __init__(self, ttl=3600, timeout=5, offline_backoff=600, cache_dir=None):
+        """
+        参数:
+            ttl: 缓存有效期(秒)，有效期内不联网
+            timeout: 网络请求超时(秒)
+            offline_backoff: 网络失败后多久内不再尝试联网(秒)
+            cache_dir: 缓存目录，默认 ~/.pal_server_manager/http
+        """
+        self.ttl = ttl
+        self.timeout = timeout
+        self.offline_backoff = offline_backoff
+        self.cache_dir = cache_dir or get_cache_dir("http")
+
+    def _cache_paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key + ".json"), os.path.join(self.cache_dir, key + ".body")
+
+    def _load_meta(self, url):
+        meta_path, body_path = self._cache_paths(url)
+        if not os.path.isfile(meta_path):
+            return {}
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        meta["has_body"] = os.path.isfile(body_path)
+        return meta
+
+    def _save_meta(self, url, meta):
+        meta_path, _ = self._cache_paths(url)
+        meta = {key: value for key, value in meta.items() if key != "has_body"}
+        meta["url"] = url
+        temp_path = meta_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(temp_path, meta_path)
+
+    def _read_body(self, url):
+        _, body_path = self._cache_paths(url)
+        with open(body_path, "rb") as f:
+            return f.read()
+
+    def _write_body(self, url, content):
+        _, body_path = self._cache_paths(url)
+        temp_path = body_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(content)
+        os.replace(temp_path, body_path)
+
+    def cached(self, url):
+        """
+        只读取本地缓存，不联网
+
+        返回:
+            (success, bytes 或错误信息)
+        """
+        meta = self._load_meta(url)
+        if not meta.get("has_body"):
+            return False, "没有本地缓存"
+        return True, self._read_body(url)
+
+    def info(self, url):
+        """
+        本地缓存的状态，不联网
+
+        返回:
+            {"has_body", "etag", "last_modified", "fetched_at", "failed_at"}
+        """
+        meta = self._load_meta(url)
+        info = {key: meta.get(key) for key in ("etag", "last_modified", "fetched_at", "failed_at")}
+        info["has_body"] = meta.get("has_body", False)
+        return info
+
+    def fetch(self, url, offline=False, force=False):
+        """
+        获取URL内容，优先使用缓存
+
+        参数:
+            url: 请求地址
+            offline: 离线模式，只使用本地缓存
+            force: 忽略TTL，强制发起（条件）请求
+
+        返回:
+            (success, bytes 或错误信息)
+        """
+        meta = self._load_meta(url)
+        now = time.time()
+        has_body = meta.get("has_body", False)
+
+        if offline:
+            return self.cached(url)
+        if has_body and not force and now - meta.get("fetched_at", 0) < self.ttl:
+            return True, self._read_body(url)
+        if not force and now - meta.get("failed_at", 0) < self.offline_backoff:
+            # 最近联网失败过，视为离线，直接使用旧缓存
+            return self.cached(url) if has_body else (False, "网络不可用")
+
+        import requests
+
+        headers = {}
+        if has_body and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if has_body and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        try:
+            response = requests.get(url, headers=headers, timeout=self.timeout)
+            if response.status_code == 304 and has_body:
+                meta["fetched_at"] = now
+                meta.pop("failed_at", None)
+                self._save_meta(url, meta)
+                return True, self._read_body(url)
+            response.raise_for_status()
+        except Exception as e:
+            meta["failed_at"] = now
+            self._save_meta(url, meta)
+            if has_body:
+                return True, self._read_body(url)
+            return False, f"网络请求失败: {str(e)}"
+
+        self._write_body(url, response.content)
+        self._save_meta(url, {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "fetched_at": now,
+        })
+        return True, response.content
+
+    def fetch_text(self, url, **kwargs):
+        """获取文本内容，返回 (success, str 或错误信息)"""
+        flag, result = self.fetch(url, **kwargs)
+        if flag is False:
+            return flag, result
+        return True, result.decode("utf-8", errors="replace")
+
+    def fetch_json(self, url, **kwargs):
+        """获取JSON内容，返回 (success, 对象 或错误信息)"""
+        flag, result = self.fetch(url, **kwargs)
+        if flag is False:
+            return flag, result
+        try:
+            return True, json.loads(result.decode("utf-8"))
+        except ValueError as e:
+            return False, f"JSON解析失败: {str(e)}"
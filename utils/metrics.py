@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import math
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+    模块功能：
+    Prometheus / OpenMetrics 指标（只依赖标准库）
+    1. Counter / Gauge / Histogram 保存在内存中，由已有的采集点（资源采集、玩家轮询、备份、REST API 请求、MOD安装）更新，
+       抓取时只把当前值格式化为文本，不做任何采集
+    2. 工具的全部指标在本模块末尾统一定义，按 server（服务器名称）等标签区分
+    3. serve() 在后台线程中提供 GET /metrics；请求头 Accept 包含 application/openmetrics-text 时返回 OpenMetrics 格式，
+       否则返回 Prometheus 文本格式 0.0.4
+    4. 后台服务使用 --metrics-port 或 config.json 的 metrics_port 开启，图形界面（未连接后台服务时）使用 metrics_port 开启
+
+    示例：
+    python pal_daemon.py --metrics-port 9877
+    curl http://127.0.0.1:9877/metrics
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 9877
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 耗时直方图的默认分桶(秒)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+# 备份、MOD安装等较慢操作的分桶(秒)
+SLOW_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if value == -math.inf:
+        return "-Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _format_bound(bound, openmetrics):
+    """直方图分桶上限 le：OpenMetrics 要求规范的浮点数形式（1.0、10.0、+Inf），Prometheus 文本格式保持原样（1、10）"""
+    if bound == math.inf:
+        return "+Inf"
+    return repr(float(bound)) if openmetrics else _format_value(float(bound))
+
+
+def _format_labels(labels, openmetrics=True):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_format_bound(value, openmetrics) if name == "le" else _escape(value)}"'
+                          for name, value in labels) + "}"
+
+
+class Registry:
+    """指标集合，负责格式化输出"""
+
+    def __init__(self):
+        self.metrics = []
+        self.lock = threading.Lock()
+
+    def register(self, metric):
+        with self.lock:
+            if any(existing.name == metric.name for existing in self.metrics):
+                raise ValueError(f"指标已存在: {metric.name}")
+            self.metrics.append(metric)
+
+    def remove_series(self, **labels):
+        """删除所有指标中带有这些标签值的序列（服务器被删除或改名时调用）"""
+        for metric in list(self.metrics):
+            metric.remove(**labels)
+
+    def render(self, openmetrics=True):
+        """
+        当前所有指标的文本
+
+        参数:
+            openmetrics: True 为 OpenMetrics 格式，False 为 Prometheus 文本格式 0.0.4
+        """
+        lines = []
+        for metric in list(self.metrics):
+            # Prometheus 文本格式中计数器的 TYPE 行使用带 _total 的名称
+            family = metric.name + "_total" if metric.kind == "counter" and not openmetrics else metric.name
+            lines.append(f"# HELP {family} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {family} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels, openmetrics)} {_format_value(value)}")
+        if openmetrics:
+            lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        """
+        参数:
+            name: 指标名称（计数器不带 _total 后缀）
+            documentation: 说明
+            labelnames: 标签名称
+            registry: 所属 Registry，默认为 REGISTRY
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}  # 标签值元组 -> 值
+        (registry if registry is not None else REGISTRY).register(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} 的标签应为 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def remove(self, **labels):
+        """删除与给定标签值匹配的序列；给定的标签不属于该指标时不做任何操作"""
+        if not labels or not set(labels) <= set(self.labelnames):
+            return
+        indexes = [(self.labelnames.index(name), str(value)) for name, value in labels.items()]
+        with self.lock:
+            for key in [key for key in self.values if all(key[index] == value for index, value in indexes)]:
+                del self.values[key]
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def get(self, **labels):
+        """当前值（主要用于界面显示和测试），序列不存在时返回 None"""
+        with self.lock:
+            return self.values.get(self._key(labels))
+
+    def samples(self):
+        """
+        返回:
+            [(名称后缀, [(标签名, 标签值), ...], 值), ...]
+        """
+        with self.lock:
+            items = sorted(self.values.items())
+        return [("", list(zip(self.labelnames, key)), value) for key, value in items]
+
+
+class Counter(_Metric):
+    """只增不减的计数器"""
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("计数器只能增加")
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        return [("_total", labels, value) for _, labels, value in super().samples()]
+
+
+class Gauge(_Metric):
+    """可增可减的当前值"""
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Histogram(_Metric):
+    """分桶统计（耗时、大小等）"""
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS, registry=None):
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            series = self.values.get(key)
+            if series is None:
+                # [各分桶计数（不累计）, 总数, 总和]
+                series = self.values[key] = [[0] * len(self.buckets), 0, 0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][index] += 1
+                    break
+            series[1] += 1
+            series[2] += value
+
+    def get(self, **labels):
+        """
+        返回:
+            {"count": 次数, "sum": 总和}，序列不存在时返回 None
+        """
+        with self.lock:
+            series = self.values.get(self._key(labels))
+            return None if series is None else {"count": series[1], "sum": series[2]}
+
+    def samples(self):
+        with self.lock:
+            items = sorted((key, ([*series[0]], series[1], series[2])) for key, series in self.values.items())
+        samples = []
+        for key, (bucket_counts, count, total) in items:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative += bucket_count
+                samples.append(("_bucket", labels + [("le", bound)], cumulative))
+            samples.append(("_count", labels, count))
+            samples.append(("_sum", labels, total))
+        return samples
+
+
+def _make_handler(registry):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            openmetrics = "application/openmetrics-text" in self.headers.get("Accept", "")
+            payload = registry.render(openmetrics).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    return Handler
+
+
+def serve(host="127.0.0.1", port=DEFAULT_PORT, registry=REGISTRY):
+    """
+    在后台线程中提供 /metrics
+
+    返回:
+        ThreadingHTTPServer（调用 shutdown() 停止）
+    """
+    httpd = ThreadingHTTPServer((host, port), _make_handler(registry))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, name="pal-metrics", daemon=True).start()
+    return httpd
+
+
+# 系统资源（所有服务器共用一次采集）
+SYSTEM_CPU = Gauge("pal_system_cpu_percent", "系统CPU使用率")
+SYSTEM_MEMORY_USED = Gauge("pal_system_memory_used_bytes", "系统已用内存")
+SYSTEM_MEMORY_TOTAL = Gauge("pal_system_memory_total_bytes", "系统总内存")
+
+# 服务端进程
+SERVER_UP = Gauge("pal_server_up", "服务端是否在运行（1/0）", ["server"])
+SERVER_REST_API_CONNECTED = Gauge("pal_server_rest_api_connected", "REST API 是否已连接（1/0）", ["server"])
+SERVER_MEMORY = Gauge("pal_server_memory_bytes", "服务端进程占用的内存", ["server"])
+SERVER_DISK_USED = Gauge("pal_server_disk_used_bytes", "服务端/备份目录所在磁盘的已用空间", ["server", "volume"])
+SERVER_DISK_TOTAL = Gauge("pal_server_disk_total_bytes", "服务端/备份目录所在磁盘的总空间", ["server", "volume"])
+SERVER_PLAYERS = Gauge("pal_server_players", "在线玩家数", ["server"])
+SERVER_STARTS = Counter("pal_server_starts", "服务端启动次数", ["server"])
+SERVER_RESTARTS = Counter("pal_server_restarts", "服务端重启次数（trigger 为 auto/manual）", ["server", "trigger"])
+SERVER_CRASHES = Counter("pal_server_crashes", "检测到的服务端崩溃次数", ["server"])
+
+# 存档备份
+BACKUP_DURATION = Histogram("pal_backup_duration_seconds", "存档备份耗时", ["server"], buckets=SLOW_BUCKETS)
+BACKUP_SIZE = Gauge("pal_backup_size_bytes", "最近一次备份的大小", ["server"])
+BACKUP_RESULTS = Counter("pal_backups", "存档备份次数（result 为 success/failure）", ["server", "result"])
+
+# REST API
+REST_API_REQUEST_DURATION = Histogram("pal_rest_api_request_duration_seconds", "REST API 请求耗时",
+                                      ["server", "endpoint"])
+REST_API_REQUESTS = Counter("pal_rest_api_requests", "REST API 请求次数（result 为 success 或错误分类：timeout/connection/"
+                            "unauthorized/bad_request/server_error/other/circuit_open）", ["server", "endpoint", "result"])
+REST_API_RETRIES = Counter("pal_rest_api_retries", "REST API 自动重试次数（只重试 GET）", ["server", "endpoint"])
+REST_API_CIRCUIT_OPEN = Gauge("pal_rest_api_circuit_open", "REST API 熔断器是否打开（1/0）", ["server"])
+REST_API_HEALTH = Gauge("pal_rest_api_health_score", "REST API 连接健康度（最近请求的成功率 0~100）", ["server"])
+
+# MOD安装
+MOD_OPERATION_DURATION = Histogram("pal_mod_operation_duration_seconds",
+                                   "MOD批量操作各阶段耗时（phase 为 download/apply）", ["phase"], buckets=SLOW_BUCKETS)
+MOD_OPERATIONS = Counter("pal_mod_operations", "MOD批量操作次数（result 为 success/failure）", ["result"])
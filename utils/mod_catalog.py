@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import hashlib
+from urllib.parse import urlparse
+from urllib.request import url2pathname
+
+from utils.http_cache import CachedFetcher, get_cache_dir
+
+"""
+    模块功能：
+    MOD列表（PalServer.json）获取
+    1. 列表缓存在本地，打开MOD管理器时先显示缓存，再在后台检查更新（stale-while-revalidate）
+    2. 检查更新使用 ETag / If-Modified-Since 条件请求，未变化时服务器返回304，不重新下载
+    3. 离线模式只使用本地缓存；网络不可用时自动使用旧缓存
+    4. 列表地址可配置：内部镜像（http/https）或本地文件（路径或 file:// 地址）
+"""
+
+DEFAULT_CATALOG_URL = "https://hs2049.cn/tools/Palword/PalServer.json"
+CATALOG_TTL = 300  # 自动刷新时，缓存有效期内不联网(秒)
+CATALOG_TIMEOUT = 10
+
+
+class ModCatalog:
+    def __init__(self, url=None, offline=False, ttl=CATALOG_TTL, fetcher=None):
+        """
+        参数:
+            url: MOD列表地址，支持 http/https、file:// 和本地路径，默认官方地址
+            offline: 离线模式，只使用本地缓存
+            ttl: 缓存有效期(秒)
+            fetcher: CachedFetcher，默认缓存到 ~/.pal_server_manager/catalog
+        """
+        self.url = url or DEFAULT_CATALOG_URL
+        self.offline = offline
+        self.fetcher = fetcher or CachedFetcher(ttl=ttl, timeout=CATALOG_TIMEOUT, cache_dir=get_cache_dir("catalog"))
+        self.loaded_hash = None  # 当前显示的列表内容的哈希，用于判断是否需要刷新界面
+
+    def local_path(self):
+        """本地文件地址对应的路径，网络地址返回 None"""
+        parsed = urlparse(self.url)
+        if parsed.scheme in ("http", "https"):
+            return None
+        if parsed.scheme == "file":
+            return url2pathname(parsed.path)
+        return self.url
+
+    def _parse(self, content, stale):
+        try:
+            catalog = json.loads(content.decode("utf-8"))
+        except ValueError as e:
+            return False, f"MOD列表解析失败: {str(e)}"
+        if not isinstance(catalog, dict) or not isinstance(catalog.get("Platform", []), list):
+            return False, "MOD列表格式错误"
+        content_hash = hashlib.sha1(content).hexdigest()
+        changed = content_hash != self.loaded_hash
+        self.loaded_hash = content_hash
+        return True, {"catalog": catalog, "changed": changed, "stale": stale}
+
+    def cached(self):
+        """
+        读取本地缓存的列表，不联网
+
+        返回:
+            (success, {"catalog", "changed", "stale"} 或错误信息)
+        """
+        if self.local_path() is not None:
+            return self.fetch()
+        flag, content = self.fetcher.cached(self.url)
+        if flag is False:
+            return flag, content
+        return self._parse(content, stale=True)
+
+    def fetch(self, force=False):
+        """
+        获取MOD列表，优先使用缓存
+
+        参数:
+            force: 忽略缓存有效期，向服务器确认列表是否有更新（手动刷新）
+
+        返回:
+            (success, {"catalog": 列表, "changed": 内容是否与当前显示的不同, "stale": 是否为未能确认的旧缓存} 或错误信息)
+        """
+        local_path = self.local_path()
+        if local_path is not None:
+            try:
+                with open(local_path, "rb") as f:
+                    content = f.read()
+            except OSError as e:
+                return False, f"读取本地MOD列表失败: {local_path}, 错误: {e}"
+            return self._parse(content, stale=False)
+
+        flag, content = self.fetcher.fetch(self.url, offline=self.offline, force=force)
+        if flag is False:
+            if self.offline:
+                return False, "离线模式下没有本地缓存的MOD列表"
+            return flag, content
+        info = self.fetcher.info(self.url)
+        # 离线或最近一次联网失败时返回的是旧缓存
+        stale = self.offline or (info.get("failed_at") or 0) > (info.get("fetched_at") or 0)
+        return self._parse(content, stale=stale)
+
+
+def describe_source(catalog):
+    """状态栏显示的列表来源"""
+    if catalog.local_path() is not None:
+        return f"本地文件 {os.path.basename(catalog.local_path())}"
+    if catalog.offline:
+        return "离线模式"
+    return urlparse(catalog.url).netloc
@@ -0,0 +1,330 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from utils.http_cache import get_cache_dir
+
+"""
+    模块功能：
+    MOD压缩包下载
+    1. ArtifactCache：本地MOD压缩包缓存，按内容哈希(SHA256)存储，按URL+ETag索引
+       - 缓存有效期内或清单提供的哈希一致时直接使用本地文件，不联网
+       - 过期后使用 ETag / If-Modified-Since 条件请求，未变化时不重新下载
+       - 下载中断后使用 HTTP Range 断点续传
+       - 清单（PalServer.json）提供 SHA256 时校验文件完整性
+    2. DownloadScheduler：一批下载任务并发执行，限制总连接数和单个主机的连接数
+    3. download_file：下载单个文件（不经过缓存），出错时抛出带中文说明的异常
+"""
+
+DEFAULT_MAX_WORKERS = 6  # 同时下载的最大连接数
+DEFAULT_PER_HOST = 4  # 同一主机的最大连接数
+CHUNK_SIZE = 1024 * 1024  # 下载写入块大小
+CACHE_TTL = 24 * 3600  # 缓存有效期(秒)，有效期内不重新校验
+CACHE_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 缓存总大小上限，超出后删除最久未使用的文件
+HASH_KEYS = ("SHA256", "Sha256", "sha256")  # 清单中可能出现的校验字段
+
+
+def get_expected_hash(mod):
+    """读取清单中提供的SHA256校验值，没有时返回 None"""
+    for key in HASH_KEYS:
+        if mod.get(key):
+            return str(mod[key]).lower()
+    return None
+
+
+def _raise_download_error(e, url, save_path):
+    """将下载过程中的异常转换为带中文说明的异常"""
+    if isinstance(e, requests.exceptions.Timeout):
+        raise Exception(f"下载超时: {url}")
+    if isinstance(e, requests.exceptions.HTTPError):
+        raise Exception(f"HTTP错误 {e.response.status_code}: {url}")
+    if isinstance(e, requests.exceptions.ConnectionError):
+        raise Exception(f"网络连接错误: {url}")
+    if isinstance(e, IOError):
+        raise Exception(f"文件写入错误: {save_path}, 错误: {e}")
+    raise Exception(f"下载失败: {url}, 错误: {str(e)}")
+
+
+def download_file(url, save_path, timeout=30):
+    """下载文件"""
+    try:
+        response = requests.get(url, stream=True, timeout=timeout)
+        response.raise_for_status()
+
+        # 确保目录存在
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+
+        with open(save_path, 'wb', buffering=CHUNK_SIZE) as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if chunk:
+                    f.write(chunk)
+    except Exception as e:
+        _raise_download_error(e, url, save_path)
+
+
+class ArtifactCache:
+    def __init__(self, cache_dir=None, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES, timeout=30, offline=False, prefer_cached=False):
+        """
+        参数:
+            cache_dir: 缓存目录，默认 ~/.pal_server_manager/mods
+            ttl: 缓存有效期(秒)
+            max_bytes: 缓存总大小上限(字节)
+            timeout: 网络请求超时(秒)
+            offline: 离线模式，只使用本地缓存
+            prefer_cached: 有本地缓存时直接使用（不论是否过期），没有缓存时才下载
+        """
+        self.cache_dir = cache_dir or get_cache_dir("mods")
+        self.blob_dir = os.path.join(self.cache_dir, "blobs")
+        self.partial_dir = os.path.join(self.cache_dir, "partial")
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.offline = offline
+        self.prefer_cached = prefer_cached
+        self.lock = threading.Lock()
+        self.url_locks = {}  # 同一URL同时只下载一次（多个服务端共用缓存时）
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self):
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self.index, f)
+        os.replace(temp_path, self.index_path)
+
+    def _update_entry(self, url, **fields):
+        with self.lock:
+            entry = self.index.setdefault(url, {})
+            entry.update(fields)
+            self._save_index()
+
+    def blob_path(self, sha256):
+        return os.path.join(self.blob_dir, sha256 + ".zip")
+
+    def lookup(self, url, expected_hash=None):
+        """
+        查找本地缓存，不联网
+
+        返回:
+            缓存文件路径，没有可用缓存时返回 None
+        """
+        with self.lock:
+            entry = dict(self.index.get(url, {}))
+        if expected_hash and os.path.isfile(self.blob_path(expected_hash)):
+            # 内容寻址：哈希一致即可使用，与URL无关
+            return self.blob_path(expected_hash)
+        sha256 = entry.get("sha256")
+        if sha256 and os.path.isfile(self.blob_path(sha256)):
+            if expected_hash and expected_hash != sha256:
+                return None
+            return self.blob_path(sha256)
+        return None
+
+    def fetch(self, url, expected_hash=None):
+        """
+        获取MOD压缩包，优先使用本地缓存
+
+        参数:
+            url: 下载地址
+            expected_hash: 清单提供的SHA256，提供时会校验下载内容
+
+        返回:
+            缓存文件路径，失败时抛出异常
+        """
+        with self.lock:
+            url_lock = self.url_locks.setdefault(url, threading.Lock())
+        with url_lock:
+            return self._fetch(url, expected_hash)
+
+    def _fetch(self, url, expected_hash):
+        cached_path = self.lookup(url, expected_hash)
+        with self.lock:
+            entry = dict(self.index.get(url, {}))
+        if cached_path:
+            fresh = time.time() - entry.get("fetched_at", 0) < self.ttl
+            if self.offline or self.prefer_cached or expected_hash or fresh:
+                self._update_entry(url, used_at=time.time())
+                return cached_path
+        elif self.offline:
+            raise Exception(f"离线模式下没有本地缓存: {url}")
+
+        try:
+            return self._download(url, expected_hash, entry if cached_path else {})
+        except Exception:
+            if cached_path:
+                # 网络不可用时使用旧缓存
+                return cached_path
+            raise
+
+    def _download(self, url, expected_hash, entry):
+        url_key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        part_path = os.path.join(self.partial_dir, url_key + ".part")
+        part_meta_path = part_path + ".json"
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        # 断点续传：上次下载未完成且服务器标识未变化时，从已下载的位置继续
+        resume_from = 0
+        part_meta = {}
+        if os.path.isfile(part_path) and os.path.isfile(part_meta_path):
+            try:
+                with open(part_meta_path, "r", encoding="utf-8") as f:
+                    part_meta = json.load(f)
+            except (OSError, ValueError):
+                part_meta = {}
+            validator = part_meta.get("etag") or part_meta.get("last_modified")
+            if validator:
+                resume_from = os.path.getsize(part_path)
+                headers["Range"] = f"bytes={resume_from}-"
+                headers["If-Range"] = validator
+
+        try:
+            response = requests.get(url, headers=headers, stream=True, timeout=self.timeout)
+            if response.status_code == 304 and entry.get("sha256"):
+                self._update_entry(url, fetched_at=time.time(), used_at=time.time())
+                return self.blob_path(entry["sha256"])
+            if response.status_code == 416:
+                # 请求范围无效，丢弃未完成的文件重新下载
+                response.close()
+                os.remove(part_path)
+                os.remove(part_meta_path)
+                return self._download(url, expected_hash, entry)
+            response.raise_for_status()
+
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+            hasher = hashlib.sha256()
+            if response.status_code == 206 and resume_from > 0:
+                # 先计算已下载部分的哈希，再追加剩余内容
+                with open(part_path, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        hasher.update(chunk)
+                mode = "ab"
+            else:
+                mode = "wb"
+            with open(part_meta_path, "w", encoding="utf-8") as f:
+                json.dump({"url": url, "etag": etag, "last_modified": last_modified}, f)
+
+            with open(part_path, mode, buffering=CHUNK_SIZE) as f:
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                    if chunk:
+                        f.write(chunk)
+                        hasher.update(chunk)
+        except Exception as e:
+            _raise_download_error(e, url, part_path)
+
+        sha256 = hasher.hexdigest()
+        if expected_hash and sha256 != expected_hash:
+            os.remove(part_path)
+            os.remove(part_meta_path)
+            raise Exception(f"文件校验失败: {url}，期望SHA256 {expected_hash}，实际 {sha256}")
+
+        os.replace(part_path, self.blob_path(sha256))
+        os.remove(part_meta_path)
+        now = time.time()
+        self._update_entry(url, sha256=sha256, etag=etag, last_modified=last_modified,
+                           size=os.path.getsize(self.blob_path(sha256)), fetched_at=now, used_at=now)
+        return self.blob_path(sha256)
+
+    def prune(self):
+        """缓存总大小超出上限时，删除最久未使用的文件"""
+        with self.lock:
+            blobs = {}
+            for url, entry in self.index.items():
+                sha256 = entry.get("sha256")
+                if sha256 and os.path.isfile(self.blob_path(sha256)):
+                    blobs[sha256] = max(blobs.get(sha256, 0), entry.get("used_at", 0))
+            total_size = sum(os.path.getsize(self.blob_path(sha256)) for sha256 in blobs)
+            for sha256, _ in sorted(blobs.items(), key=lambda item: item[1]):
+                if total_size <= self.max_bytes:
+                    break
+                total_size -= os.path.getsize(self.blob_path(sha256))
+                os.remove(self.blob_path(sha256))
+            self.index = {url: entry for url, entry in self.index.items()
+                          if not entry.get("sha256") or os.path.isfile(self.blob_path(entry["sha256"]))}
+            self._save_index()
+
+
+class DownloadScheduler:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, per_host=DEFAULT_PER_HOST, cache=None):
+        """
+        参数:
+            max_workers: 同时下载的最大连接数
+            per_host: 同一主机的最大连接数
+            cache: ArtifactCache，默认使用 ~/.pal_server_manager/mods
+        """
+        self.max_workers = max(1, int(max_workers))
+        self.per_host = max(1, int(per_host))
+        self.cache = cache or ArtifactCache()
+        self.host_limits = {}
+        self.host_lock = threading.Lock()
+
+    def _host_semaphore(self, url):
+        host = urlparse(url).netloc
+        with self.host_lock:
+            if host not in self.host_limits:
+                self.host_limits[host] = threading.Semaphore(self.per_host)
+            return self.host_limits[host]
+
+    def _download(self, url, expected_hash):
+        # 已缓存且无需联网的文件不占用连接数
+        cached_path = self.cache.lookup(url, expected_hash)
+        if cached_path and (self.cache.offline or self.cache.prefer_cached or expected_hash):
+            return self.cache.fetch(url, expected_hash)
+        with self._host_semaphore(url):
+            return self.cache.fetch(url, expected_hash)
+
+    def download_all(self, jobs, progress_callback=None):
+        """
+        并发下载一批文件
+
+        参数:
+            jobs: [(url, expected_sha256 或 None), ...]，相同URL只下载一次
+            progress_callback: 每完成一个下载调用一次，参数为 (已完成数, 总数)
+
+        返回:
+            {url: (success, 缓存文件路径 或错误信息)}
+        """
+        unique_jobs = {}
+        for url, expected_hash in jobs:
+            unique_jobs.setdefault(url, expected_hash)
+
+        results = {}
+        if not unique_jobs:
+            return results
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(unique_jobs))) as executor:
+            futures = {executor.submit(self._download, url, expected_hash): url for url, expected_hash in unique_jobs.items()}
+            for done_count, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                try:
+                    results[url] = (True, future.result())
+                except Exception as e:
+                    results[url] = (False, str(e))
+                if progress_callback:
+                    progress_callback(done_count, len(unique_jobs))
+        try:
+            self.cache.prune()
+        except OSError:
+            pass
+        return results
@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import shutil
+import hashlib
+import uuid
+import zipfile
+
+"""
+    模块功能：
+    MOD压缩包安装
+    1. 压缩包中的文件直接流式写入游戏目录下的暂存目录，不再先解压到系统临时目录再复制
+    2. 暂存目录与安装目录在同一磁盘，全部写完后用重命名移入（新目录整体移入，已有目录逐个替换文件），
+       安装过程不会留下一半的文件
+    3. InstallTransaction：一批安装/卸载作为一个事务，记录日志，失败时自动回滚
+    4. 拒绝包含绝对路径或 ../ 的压缩包成员，防止写到游戏目录之外
+"""
+
+STAGING_DIR_NAME = ".pal_mod_staging"  # 暂存目录（位于服务端根目录下）
+JOURNAL_NAME = "journal.jsonl"
+COPY_BUFFER_SIZE = 1024 * 1024
+
+
+def safe_member_path(root, member_name):
+    """
+    计算压缩包成员解压后的路径，路径越界时抛出异常
+
+    参数:
+        root: 解压目标目录
+        member_name: 压缩包内的文件名
+
+    返回:
+        解压后的绝对路径
+    """
+    name = member_name.replace("\\", "/")
+    parts = [part for part in name.split("/") if part not in ("", ".")]
+    if name.startswith("/") or (parts and ":" in parts[0]) or ".." in parts:
+        raise ValueError(f"压缩包包含非法路径: {member_name}")
+    root_abs = os.path.abspath(root)
+    target = os.path.abspath(os.path.join(root_abs, *parts))
+    if target != root_abs and not target.startswith(root_abs + os.sep):
+        raise ValueError(f"压缩包包含非法路径: {member_name}")
+    return target
+
+
+def get_staging_root(game_path):
+    """服务端根目录下的暂存目录"""
+    return os.path.join(os.path.abspath(game_path), STAGING_DIR_NAME)
+
+
+def _copy_with_hash(source, destination):
+    """复制文件内容，同时计算SHA256，返回 (大小, 哈希)"""
+    hasher = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: source.read(COPY_BUFFER_SIZE), b""):
+        destination.write(chunk)
+        hasher.update(chunk)
+        size += len(chunk)
+    return size, hasher.hexdigest()
+
+
+def archive_files(zip_path):
+    """读取压缩包中的文件路径（不解压，不含目录），用于安装前检查文件冲突"""
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        return ["/".join(part for part in info.filename.replace("\\", "/").split("/") if part not in ("", "."))
+                for info in zip_ref.infolist() if not info.is_dir()]
+
+
+def stage_archive(zip_path, staging_dir, files=None):
+    """
+    将压缩包内容流式写入暂存目录
+
+    参数:
+        files: 列表，传入时追加写入的每个文件 (相对路径, 大小, SHA256)
+
+    返回:
+        压缩包中的顶层文件/目录名列表
+    """
+    top_level = []
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for info in zip_ref.infolist():
+            target = safe_member_path(staging_dir, info.filename)
+            if target == os.path.abspath(staging_dir):
+                continue
+            top_name = os.path.relpath(target, staging_dir).split(os.sep)[0]
+            if top_name not in top_level:
+                top_level.append(top_name)
+            if info.is_dir():
+                os.makedirs(target, exist_ok=True)
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            with zip_ref.open(info) as source, open(target, "wb") as destination:
+                if files is None:
+                    shutil.copyfileobj(source, destination, COPY_BUFFER_SIZE)
+                    continue
+                size, sha256 = _copy_with_hash(source, destination)
+            files.append((os.path.relpath(target, staging_dir), size, sha256))
+    return top_level
+
+
+class InstallTransaction:
+    """
+    MOD安装事务：先暂存全部文件，再按顺序替换，失败时按日志回滚
+
+    提交时先将全部操作 {"target": 目标路径, "backup": 备份路径} 一次性写入日志（journal.jsonl）
+    并落盘，再执行重命名；旧文件只做重命名备份而不复制，每批操作只需两次落盘。
+    程序在替换过程中意外退出时，下次启动调用 recover() 即可恢复到安装前的状态。
+    """
+
+    def __init__(self, game_path, manifest=None):
+        """
+        参数:
+            game_path: 服务端根目录
+            manifest: 已安装MOD清单（mod_manifest.ModManifest），提交时与MOD文件一起替换
+        """
+        self.game_path = os.path.abspath(game_path)
+        self.manifest = manifest
+        self.staging_root = get_staging_root(game_path)
+        self.txn_dir = os.path.join(self.staging_root, uuid.uuid4().hex)
+        self.stage_dir = os.path.join(self.txn_dir, "stage")
+        self.backup_dir = os.path.join(self.txn_dir, "backup")
+        self.journal_path = os.path.join(self.txn_dir, JOURNAL_NAME)
+        os.makedirs(self.stage_dir)
+        os.makedirs(self.backup_dir)
+        self.operations = []  # [(目标路径, 暂存路径 或 None 表示删除)]
+        self.created_dirs = set()  # 本事务会新建的目录
+        self.removed_paths = []
+
+    def stage_archive(self, zip_path, install_dir, files=None):
+        """
+        暂存MOD压缩包，提交时替换到安装目录
+
+        参数:
+            files: 列表，传入时追加安装后的每个文件 (绝对路径, 大小, 修改时间(ns), SHA256)
+
+        返回:
+            压缩包中的顶层文件/目录名列表
+        """
+        staging_dir = os.path.join(self.stage_dir, str(len(self.operations)))
+        os.makedirs(staging_dir)
+        staged_files = [] if files is not None else None
+        top_level = stage_archive(zip_path, staging_dir, staged_files)
+        for name in top_level:
+            self._queue_merge(os.path.join(staging_dir, name), os.path.join(install_dir, name))
+        if files is not None:
+            # 重命名不会改变修改时间，暂存文件的状态即为安装后的状态
+            for relative_path, size, sha256 in staged_files:
+                stat = os.stat(os.path.join(staging_dir, relative_path))
+                files.append((os.path.join(install_dir, relative_path), size, stat.st_mtime_ns, sha256))
+        return top_level
+
+    def _queue_merge(self, staged_path, target):
+        """
+        目标目录不存在时整体移入；已存在时逐层合并，只替换同名文件，
+        不影响目录中其他MOD的文件（本MOD上次安装的旧文件由调用方先删除）
+        """
+        if os.path.isdir(staged_path) and (os.path.isdir(target) or target in self.created_dirs):
+            for name in os.listdir(staged_path):
+                self._queue_merge(os.path.join(staged_path, name), os.path.join(target, name))
+            return
+        if os.path.isdir(staged_path):
+            self.created_dirs.add(target)
+        self.operations.append((target, staged_path))
+
+    def stage_bytes(self, data, target):
+        """暂存一个文件的内容，提交时替换目标文件"""
+        staged_path = os.path.join(self.stage_dir, f"{len(self.operations)}.bin")
+        with open(staged_path, "wb") as f:
+            f.write(data)
+        self.operations.append((target, staged_path))
+
+    def remove(self, path):
+        """提交时删除文件或目录（先移入备份，事务完成后才真正删除）"""
+        self.operations.append((path, None))
+
+    @staticmethod
+    def _journal(journal_file, entries):
+        journal_file.write("".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries))
+        journal_file.flush()
+        os.fsync(journal_file.fileno())
+
+    def _plan(self):
+        """
+        按操作顺序推算每一步执行前目标是否存在（同一路径可能先卸载再安装）
+
+        返回:
+            [(目标路径, 暂存路径, 备份路径 或 None)]，跳过删除不存在文件的操作
+        """
+        exists = {}
+        plan = []
+        for index, (target, staged_path) in enumerate(self.operations):
+            target_exists = exists[target] if target in exists else os.path.lexists(target)
+            if staged_path is None and not target_exists:
+                continue  # 要删除的文件本来就不存在
+            backup = os.path.join(self.backup_dir, str(index)) if target_exists else None
+            plan.append((target, staged_path, backup))
+            exists[target] = staged_path is not None
+        return plan
+
+    def commit(self):
+        """按顺序执行替换，任何一步失败都会回滚已执行的步骤并抛出异常"""
+        if self.manifest is not None:
+            self.stage_bytes(self.manifest.to_bytes(), self.manifest.path)
+        try:
+            plan = self._plan()
+            with open(self.journal_path, "a", encoding="utf-8") as journal_file:
+                self._journal(journal_file, [{"target": target, "backup": backup} for target, _, backup in plan])
+                for target, staged_path, backup in plan:
+                    if staged_path is None and not os.path.lexists(target):
+                        continue  # 所在目录已被本事务中较早的操作替换
+                    if backup:
+                        os.replace(target, backup)
+                    if staged_path is None:
+                        self.removed_paths.append(target)
+                    else:
+                        os.makedirs(os.path.dirname(target), exist_ok=True)
+                        os.replace(staged_path, target)
+                self._journal(journal_file, [{"committed": True}])
+        except Exception:
+            rollback(self.txn_dir)
+            raise
+        shutil.rmtree(self.txn_dir, ignore_errors=True)
+        _remove_if_empty(self.staging_root)
+        # 删除操作后，清理留下的空目录（不超出服务端根目录）
+        for path in self.removed_paths:
+            _prune_empty_dirs(os.path.dirname(path), self.game_path)
+
+    def abort(self):
+        """放弃事务（尚未提交时只需删除暂存文件）"""
+        if os.path.isfile(self.journal_path):
+            rollback(self.txn_dir)
+        else:
+            shutil.rmtree(self.txn_dir, ignore_errors=True)
+            _remove_if_empty(self.staging_root)
+
+
+def _prune_empty_dirs(path, stop_dir):
+    """从 path 开始向上删除空目录，直到 stop_dir（不含）"""
+    path = os.path.abspath(path)
+    while path != stop_dir and path.startswith(stop_dir + os.sep):
+        try:
+            os.rmdir(path)
+        except OSError:
+            return
+        path = os.path.dirname(path)
+
+
+def _remove_if_empty(path):
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def _remove_path(path):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def rollback(txn_dir):
+    """按日志倒序恢复事务修改过的文件，并删除事务目录"""
+    journal_path = os.path.join(txn_dir, JOURNAL_NAME)
+    entries = []
+    if os.path.isfile(journal_path):
+        with open(journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entries.append(json.loads(line))
+                except ValueError:
+                    break  # 最后一行可能写了一半
+    if entries and entries[-1].get("committed"):
+        # 事务已完成，只需清理备份
+        shutil.rmtree(txn_dir, ignore_errors=True)
+        return
+
+    for entry in reversed(entries):
+        target = entry["target"]
+        backup = entry.get("backup")
+        if backup is None:
+            # 目标原本不存在，删除新写入的文件
+            _remove_path(target)
+        elif os.path.lexists(backup):
+            # 旧文件已移入备份，删除新文件后还原
+            _remove_path(target)
+            os.replace(backup, target)
+        # 备份不存在说明重命名尚未执行，目标仍是旧文件
+    shutil.rmtree(txn_dir, ignore_errors=True)
+    _remove_if_empty(os.path.dirname(txn_dir))
+
+
+def recover(game_path):
+    """
+    检查并恢复上次意外中断的安装事务
+
+    返回:
+        回滚的事务数量
+    """
+    staging_root = get_staging_root(game_path)
+    if not os.path.isdir(staging_root):
+        return 0
+    count = 0
+    for name in os.listdir(staging_root):
+        txn_dir = os.path.join(staging_root, name)
+        if os.path.isdir(txn_dir):
+            rollback(txn_dir)
+            count += 1
+    _remove_if_empty(staging_root)
+    return count
+
+
+def install_archive(zip_path, install_dir, game_path):
+    """
+    安装单个MOD压缩包：流式解压到暂存目录，再整体替换到安装目录
+
+    返回:
+        安装的顶层文件/目录名列表
+    """
+    transaction = InstallTransaction(game_path)
+    try:
+        top_level = transaction.stage_archive(zip_path, install_dir)
+    except Exception:
+        transaction.abort()
+        raise
+    transaction.commit()
+    return top_level
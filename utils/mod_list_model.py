@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+from PyQt5.QtCore import Qt, QAbstractTableModel, QSortFilterProxyModel, QModelIndex
+from PyQt5.QtGui import QColor
+
+"""
+    模块功能：
+    MOD列表的数据模型（QTableView + QAbstractTableModel）
+    1. 视图只绘制可见的行，列表条目再多也不会逐个创建控件
+    2. 加载列表时预先生成小写的搜索文本，输入搜索词时只做字符串包含判断
+    3. 选中状态保存在模型中（MOD信息的 "selected" 字段），同分组（Array）的MOD只能选中一个
+"""
+
+COLUMNS = ["选择", "MOD名称", "描述", "作者", "Nexus ID", "状态"]
+COLUMN_SELECT = 0
+COLUMN_STATUS = 5
+MOD_ROLE = Qt.UserRole  # 读取行对应的MOD信息
+
+SELECTED_MARK = "✅"
+UNSELECTED_MARK = "⚪"
+STATUS_COLORS = {
+    "已安装": QColor(Qt.green),
+    "已修改": QColor(255, 140, 0),
+    "未安装": QColor(Qt.red),
+}
+
+
+def mod_status(mod):
+    if not mod.get("installed", False):
+        return "未安装"
+    return "已修改" if mod.get("modified", False) else "已安装"
+
+
+class ModListModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.mods = []
+        self.search_index = []  # 每行的小写搜索文本（名称 + 描述）
+        self.array_rows = {}  # 分组(Array) -> 行号列表
+
+    def set_mods(self, mods):
+        """加载MOD列表，同时生成搜索文本和分组索引"""
+        self.beginResetModel()
+        self.mods = mods
+        self.search_index = [f"{mod.get('DisplayName', '')}\n{mod.get('Description', '')}".lower() for mod in mods]
+        self.array_rows = {}
+        for row, mod in enumerate(mods):
+            if "Array" in mod:
+                self.array_rows.setdefault(mod["Array"], []).append(row)
+        self.endResetModel()
+
+    def refresh(self):
+        """MOD的安装状态或选中状态在模型外被修改后，通知视图重绘"""
+        if self.mods:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.mods) - 1, len(COLUMNS) - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.mods)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        mod = self.mods[index.row()]
+        column = index.column()
+        if role == Qt.DisplayRole:
+            if column == COLUMN_SELECT:
+                return SELECTED_MARK if mod.get("selected", False) else UNSELECTED_MARK
+            if column == 1:
+                return mod.get("DisplayName", "")
+            if column == 2:
+                return mod.get("Description", "无描述")
+            if column == 3:
+                return mod.get("Author", "未知")
+            if column == 4:
+                return str(mod.get("NexusID", "/"))
+            if column == COLUMN_STATUS:
+                return mod_status(mod)
+        elif role == Qt.ForegroundRole and column == COLUMN_STATUS:
+            return STATUS_COLORS[mod_status(mod)]
+        elif role == Qt.ToolTipRole and column == 2:
+            return mod.get("Description", "")
+        elif role == MOD_ROLE:
+            return mod
+        return None
+
+    def _emit_select_changed(self, rows):
+        for row in rows:
+            index = self.index(row, COLUMN_SELECT)
+            self.dataChanged.emit(index, index)
+
+    def toggle(self, row):
+        """切换一行的选中状态；选中时取消同分组其他MOD的选中"""
+        mod = self.mods[row]
+        self.set_selected([row], not mod.get("selected", False))
+
+    def set_selected(self, rows, selected):
+        """设置多行的选中状态，同一分组只保留第一个被选中的MOD"""
+        changed_rows = set()
+        selected_arrays = set()
+        for row in rows:
+            mod = self.mods[row]
+            if selected and "Array" in mod:
+                if mod["Array"] in selected_arrays:
+                    continue
+                selected_arrays.add(mod["Array"])
+                for other_row in self.array_rows.get(mod["Array"], []):
+                    if other_row != row and self.mods[other_row].get("selected", False):
+                        self.mods[other_row]["selected"] = False
+                        changed_rows.add(other_row)
+            if mod.get("selected", False) != selected:
+                mod["selected"] = selected
+                changed_rows.add(row)
+        self._emit_select_changed(sorted(changed_rows))
+
+    def selected_mods(self):
+        return [mod for mod in self.mods if mod.get("selected", False)]
+
+    def has_selected(self):
+        return any(mod.get("selected", False) for mod in self.mods)
+
+
+class ModFilterProxyModel(QSortFilterProxyModel):
+    """
+    按搜索词和“只显示已安装”过滤MOD列表
+
+    输入搜索词时先用列表推导算出匹配的行（在上一次结果上继续输入时只检查上一次匹配的行），
+    filterAcceptsRow 只查表，不做字符串比较。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.search_text = ""
+        self.installed_only = False
+        self.matched_rows = None  # 匹配搜索词的源模型行号集合，None 表示不过滤
+        self.setSortCaseSensitivity(Qt.CaseInsensitive)
+        self.setDynamicSortFilter(False)
+
+    def setSourceModel(self, model):
+        super().setSourceModel(model)
+        model.modelReset.connect(self._reset_matches)
+
+    def _reset_matches(self):
+        self.matched_rows = self._match(self.search_text, None)
+
+    def _match(self, search_text, candidate_rows):
+        if not search_text:
+            return None
+        search_index = self.sourceModel().search_index
+        if candidate_rows is None:
+            return {row for row, text in enumerate(search_index) if search_text in text}
+        return {row for row in candidate_rows if search_text in search_index[row]}
+
+    def set_filter(self, search_text, installed_only):
+        search_text = search_text.lower()
+        if search_text == self.search_text and installed_only == self.installed_only:
+            return
+        if search_text != self.search_text:
+            # 在原搜索词后继续输入时，结果只会在上一次匹配的行中
+            narrowing = self.search_text and search_text.startswith(self.search_text) and self.matched_rows is not None
+            self.matched_rows = self._match(search_text, self.matched_rows if narrowing else None)
+        self.search_text = search_text
+        self.installed_only = installed_only
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        if self.matched_rows is not None and source_row not in self.matched_rows:
+            return False
+        if self.installed_only:
+            return self.sourceModel().mods[source_row].get("installed", False)
+        return True
+
+    def source_rows(self):
+        """当前显示的行在源模型中的行号（按显示顺序）"""
+        return [self.mapToSource(self.index(row, 0)).row() for row in range(self.rowCount())]
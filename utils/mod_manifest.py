@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import copy
+import hashlib
+
+"""
+    模块功能：
+    已安装MOD的文件清单
+    1. 记录每个MOD安装的全部文件（路径、大小、修改时间、SHA256），保存在服务端根目录下
+    2. 启动时读取一次，之后已安装状态、文件归属都在内存中查询，不再逐个检查磁盘
+    3. 卸载时按清单删除该MOD安装的全部文件（包括 data 子文件）
+    4. scan() 只比较文件大小和修改时间，快速发现被删除或修改的文件；verify() 重新计算哈希
+"""
+
+MANIFEST_NAME = ".pal_mod_manifest.json"
+MANIFEST_VERSION = 1
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class ModManifest:
+    def __init__(self, game_path, mods=None):
+        """
+        参数:
+            game_path: 服务端根目录
+            mods: 清单内容 {ModName: {"display_name", "install_location", "files": {相对路径: [大小, 修改时间(ns), SHA256]}}}
+        """
+        self.game_path = os.path.abspath(game_path)
+        self.path = os.path.join(self.game_path, MANIFEST_NAME)
+        self.mods = mods if mods is not None else {}
+        self.exists = False  # 清单文件是否已存在（不存在时需要登记之前安装的MOD）
+        # 文件归属索引：相对路径 -> ModName
+        self.owners = {}
+        for mod_name, entry in self.mods.items():
+            for relative_path in entry["files"]:
+                self.owners[relative_path] = mod_name
+
+    @classmethod
+    def load(cls, game_path):
+        """读取清单文件，不存在或损坏时返回空清单（exists 为 False）"""
+        manifest = cls(game_path)
+        try:
+            with open(manifest.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            manifest = cls(game_path, data.get("mods", {}))
+            manifest.exists = True
+        except (OSError, ValueError, KeyError):
+            pass
+        return manifest
+
+    def copy(self):
+        """复制一份清单，在安装事务中修改，提交成功后再替换原清单"""
+        manifest = ModManifest(self.game_path, copy.deepcopy(self.mods))
+        manifest.exists = self.exists
+        return manifest
+
+    def to_bytes(self):
+        return json.dumps({"version": MANIFEST_VERSION, "mods": self.mods}, ensure_ascii=False, indent=1).encode("utf-8")
+
+    def save(self):
+        """直接保存清单（不经过安装事务时使用）"""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.to_bytes())
+        os.replace(temp_path, self.path)
+        self.exists = True
+
+    def relative_path(self, path):
+        return os.path.relpath(os.path.abspath(path), self.game_path).replace(os.sep, "/")
+
+    def absolute_path(self, relative_path):
+        return os.path.join(self.game_path, *relative_path.split("/"))
+
+    def is_installed(self, mod_name):
+        return mod_name in self.mods
+
+    def owner(self, path):
+        """文件所属的MOD名称，不属于任何MOD时返回 None"""
+        return self.owners.get(self.relative_path(path))
+
+    def files(self, mod_name):
+        """MOD安装的全部文件的绝对路径"""
+        entry = self.mods.get(mod_name)
+        if not entry:
+            return []
+        return [self.absolute_path(relative_path) for relative_path in entry["files"]]
+
+    def mod_info(self, mod_name):
+        """清单中记录的MOD信息（MOD已不在MOD列表中时用于卸载）"""
+        entry = self.mods.get(mod_name, {})
+        return {"ModName": mod_name, "DisplayName": entry.get("display_name") or mod_name,
+                "InstallLocation": entry.get("install_location", "")}
+
+    def add(self, mod, files):
+        """
+        记录MOD安装的文件，覆盖该MOD原有的记录
+
+        参数:
+            mod: MOD信息
+            files: [(绝对路径, 大小, 修改时间(ns), SHA256)]
+        """
+        mod_name = mod.get("ModName", "")
+        self.remove(mod_name)
+        entry_files = {}
+        for path, size, mtime_ns, sha256 in files:
+            relative_path = self.relative_path(path)
+            entry_files[relative_path] = [size, mtime_ns, sha256]
+            self.owners[relative_path] = mod_name
+        self.mods[mod_name] = {
+            "display_name": mod.get("DisplayName", ""),
+            "install_location": mod.get("InstallLocation", ""),
+            "files": entry_files,
+        }
+
+    def remove(self, mod_name):
+        """删除MOD的记录，返回该MOD原有文件的绝对路径（仍属于该MOD的文件）"""
+        entry = self.mods.pop(mod_name, None)
+        if not entry:
+            return []
+        paths = []
+        for relative_path in entry["files"]:
+            if self.owners.get(relative_path) == mod_name:
+                del self.owners[relative_path]
+                paths.append(self.absolute_path(relative_path))
+        return paths
+
+    def adopt(self, mod, root_path):
+        """
+        记录清单出现之前安装的MOD：将 root_path（文件或目录）下的全部文件归属到该MOD
+
+        返回:
+            记录的文件数量
+        """
+        files = []
+        if os.path.isfile(root_path):
+            file_paths = [root_path]
+        else:
+            file_paths = [os.path.join(dir_path, name) for dir_path, _, names in os.walk(root_path) for name in names]
+        for path in file_paths:
+            stat = os.stat(path)
+            files.append((path, stat.st_size, stat.st_mtime_ns, file_sha256(path)))
+        self.add(mod, files)
+        return len(files)
+
+    def scan(self, mod_names=None):
+        """
+        按文件大小和修改时间快速检查清单与磁盘是否一致
+
+        返回:
+            {ModName: {"missing": [相对路径], "modified": [相对路径]}}，只包含有差异的MOD
+        """
+        drift = {}
+        for mod_name in mod_names if mod_names is not None else list(self.mods):
+            entry = self.mods.get(mod_name)
+            if not entry:
+                continue
+            missing = []
+            modified = []
+            for relative_path, (size, mtime_ns, _) in entry["files"].items():
+                try:
+                    stat = os.stat(self.absolute_path(relative_path))
+                except OSError:
+                    missing.append(relative_path)
+                    continue
+                if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+                    modified.append(relative_path)
+            if missing or modified:
+                drift[mod_name] = {"missing": missing, "modified": modified}
+        return drift
+
+    def verify(self, mod_name):
+        """
+        重新计算MOD文件的哈希，确认 scan() 发现的修改是否为内容变化
+
+        返回:
+            内容与清单不一致或已丢失的文件相对路径列表
+        """
+        changed = []
+        for relative_path, (_, _, sha256) in self.mods.get(mod_name, {}).get("files", {}).items():
+            try:
+                if file_sha256(self.absolute_path(relative_path)) != sha256:
+                    changed.append(relative_path)
+            except OSError:
+                changed.append(relative_path)
+        return changed
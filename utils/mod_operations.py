@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import time
+import logging
+
+from utils import mod_downloader, mod_installer, mod_manifest, mod_catalog, mod_resolver, mod_profiles, ue4ss_manager, platform_paths, metrics
+
+"""
+    模块功能：
+    MOD安装、卸载、校验的核心逻辑（不依赖界面）
+    1. 图形界面（pal_mod_manager.ModManagerQt）和命令行（pal_mod_cli.py）共用
+    2. 一个 ModOperations 对应一个服务端目录；多个服务端可以各用一个实例在不同线程中并行执行，
+       共享同一个 DownloadScheduler 时相同的压缩包只下载一次
+    3. 方法返回 (success, 结果或错误信息)，不弹窗
+"""
+
+logger = logging.getLogger(__name__)
+
+UE4SS_ZIP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "resource", "UE4SS.zip")
+
+
+class ModOperations:
+    def __init__(self, game_path="", catalog=None, download_settings=None, scheduler=None):
+        """
+        参数:
+            game_path: 服务端根目录
+            catalog: MOD列表来源（mod_catalog.ModCatalog），默认官方地址
+            download_settings: 下载并发设置 {"mod_download_workers", "mod_download_per_host"}
+            scheduler: 共享的下载调度器（mod_downloader.DownloadScheduler），为 None 时每批次单独创建
+        """
+        self.game_path = game_path
+        self.catalog = catalog or mod_catalog.ModCatalog()
+        self.download_settings = download_settings or {}
+        self.scheduler = scheduler
+        self.mods_list = []
+        self.installed_mods = []
+        # MOD依赖索引（mod_resolver.ModResolver），MOD列表变化时重新建立
+        self.resolver = None
+        self.resolver_mods = None
+        # 已安装MOD的文件清单（mod_manifest.ModManifest），每个游戏路径读取一次
+        self.manifest = None
+
+    def recover(self):
+        """回滚上次意外中断的MOD安装，返回回滚的事务数"""
+        if not self.game_path or not os.path.isdir(self.game_path):
+            return 0
+        return mod_installer.recover(self.game_path)
+
+    def load_catalog(self, force=False):
+        """
+        获取MOD列表
+
+        返回:
+            (success, catalog.fetch 的结果 或错误信息)
+        """
+        flag, result = self.catalog.fetch(force=force)
+        if flag is False:
+            return flag, result
+        if result["changed"] or not self.mods_list:
+            self.mods_list = result["catalog"].get("Platform", [])
+        return flag, result
+
+    def find_mods(self, mod_names):
+        """
+        按 ModName（或忽略大小写的 DisplayName）查找MOD
+
+        返回:
+            (找到的MOD列表, 找不到的名称列表)
+        """
+        by_name = {mod.get("ModName", ""): mod for mod in self.mods_list}
+        by_display_name = {mod.get("DisplayName", "").lower(): mod for mod in self.mods_list}
+        found, unknown = [], []
+        for mod_name in mod_names:
+            mod = by_name.get(mod_name) or by_display_name.get(mod_name.lower())
+            if mod is None and self.load_manifest().is_installed(mod_name):
+                # 已从MOD列表中移除、但仍安装着的MOD（只能卸载）
+                mod = self.manifest.mod_info(mod_name)
+            if mod is None:
+                unknown.append(mod_name)
+            elif mod not in found:
+                found.append(mod)
+        return found, unknown
+
+    def check_ue4ss_installed(self):
+        """检查UE4SS是否完整安装"""
+        if not self.game_path:
+            return False
+        installed = ue4ss_manager.UE4SSManager(self.game_path).is_installed()
+        logger.info(f"检查UE4SS: {self.game_path}, 已安装: {installed}")
+        return installed
+
+    def ue4ss_status(self, zip_path=UE4SS_ZIP_PATH):
+        """
+        UE4SS安装状态
+
+        返回:
+            {"installed", "managed", "version", "missing", "package_version": 程序自带的版本（没有压缩包时为 None）}
+        """
+        status = ue4ss_manager.UE4SSManager(self.game_path).status()
+        status["package_version"] = None
+        if os.path.exists(zip_path):
+            try:
+                status["package_version"] = ue4ss_manager.package_info(zip_path)[0]
+            except Exception as e:
+                logger.warning(f"读取UE4SS压缩包失败: {e}")
+        return status
+
+    def install_ue4ss(self, zip_path=UE4SS_ZIP_PATH):
+        """
+        安装或升级UE4SS（只写入有变化的文件，保留并合并用户修改的配置）
+
+        返回:
+            (success, 提示信息)
+        """
+        if platform_paths.server_platform(self.game_path) == platform_paths.PLATFORM_LINUX:
+            return False, "Linux 服务端不支持UE4SS（UE4SS只有Windows版本），只能安装不依赖UE4SS的MOD"
+        flag, result = ue4ss_manager.UE4SSManager(self.game_path).install(zip_path)
+        if flag is False:
+            logger.error(result)
+            return flag, result
+        logger.info(f"UE4SS安装成功: {result['version']}，写入 {len(result['written'])} 个文件")
+        return True, ue4ss_manager.describe_result(result)
+
+    def uninstall_ue4ss(self):
+        """
+        卸载UE4SS（保留用户修改过的配置文件，不影响已安装的MOD）
+
+        返回:
+            (success, 提示信息)
+        """
+        flag, result = ue4ss_manager.UE4SSManager(self.game_path).uninstall()
+        if flag is False:
+            logger.error(result)
+            return flag, result
+        logger.info(f"UE4SS已卸载，删除 {len(result['removed'])} 个文件")
+        return True, ue4ss_manager.describe_result(result)
+
+    def load_manifest(self):
+        """读取游戏目录下的已安装MOD清单（每个游戏路径只读取一次）"""
+        game_path_abs = os.path.abspath(self.game_path)
+        if self.manifest is None or self.manifest.game_path != game_path_abs:
+            self.manifest = mod_manifest.ModManifest.load(game_path_abs)
+        return self.manifest
+
+    def _adopt_legacy_mods(self):
+        """清单文件不存在时（旧版本安装的MOD），按原来的路径规则登记已安装的MOD"""
+        game_path_abs = os.path.abspath(self.game_path)
+        adopted_count = 0
+        for mod in self.mods_list:
+            mod_name = mod.get("ModName", "")
+            install_path = mod.get("InstallLocation", "")
+            if mod_name and install_path and not self.manifest.is_installed(mod_name):
+                full_path = os.path.join(game_path_abs, install_path, mod_name)
+                if os.path.exists(full_path):
+                    self.manifest.adopt(mod, full_path)
+                    adopted_count += 1
+        self.manifest.save()
+        logger.info(f"已将 {adopted_count} 个之前安装的MOD登记到清单")
+
+    def check_installed_mods(self):
+        """
+        检查已安装的MOD（查询内存中的清单，并按文件大小和修改时间检查是否被修改）
+
+        返回:
+            被修改的MOD {ModName: {"missing": [...], "modified": [...]}}
+        """
+        self.installed_mods = []
+
+        if not self.game_path:
+            for mod in self.mods_list:
+                mod["installed"] = False
+            return {}
+
+        manifest = self.load_manifest()
+        if not manifest.exists and self.mods_list and os.path.isdir(manifest.game_path):
+            self._adopt_legacy_mods()
+
+        for mod in self.mods_list:
+            mod["installed"] = manifest.is_installed(mod.get("ModName", ""))
+            if mod["installed"]:
+                self.installed_mods.append(mod)
+
+        # 文件被删除或修改的MOD
+        drift = manifest.scan([mod.get("ModName", "") for mod in self.installed_mods])
+        for mod in self.installed_mods:
+            mod["modified"] = mod.get("ModName", "") in drift
+        for mod_name, changes in drift.items():
+            logger.warning(f"MOD文件与安装时不一致 {mod_name}: 丢失 {len(changes['missing'])} 个，修改 {len(changes['modified'])} 个")
+        return drift
+
+    def installed_names(self):
+        return {mod.get("ModName", "") for mod in self.installed_mods}
+
+    def get_resolver(self):
+        """MOD依赖索引，MOD列表变化后重新建立"""
+        if self.resolver is None or self.resolver_mods is not self.mods_list:
+            self.resolver = mod_resolver.ModResolver(self.mods_list)
+            self.resolver_mods = self.mods_list
+        return self.resolver
+
+    def plan_install(self, selected_mods):
+        """根据依赖、冲突和分组规划安装步骤（UE4SS只对需要它的MOD检查）"""
+        return self.get_resolver().plan_install(selected_mods, self.installed_names(), self.check_ue4ss_installed())
+
+    def plan_uninstall(self, selected_mods):
+        """规划卸载步骤，依赖选中MOD的已安装MOD一并卸载"""
+        return self.get_resolver().plan_uninstall(selected_mods, self.installed_names())
+
+    def plan_switch(self, profile_mods):
+        """规划切换到MOD方案的步骤（只包含有变化的MOD）"""
+        return mod_profiles.plan_switch(profile_mods, self.load_manifest(), self.get_resolver(), self.check_ue4ss_installed())
+
+    @staticmethod
+    def plan_items(plan):
+        """把 InstallPlan 转换为 install_batch 的操作列表：先卸载，再安装"""
+        return [{"_uninstall": True, "mod": mod} for mod in plan.uninstalls] + plan.installs
+
+    def check_file_conflicts(self, items, downloaded):
+        """
+        检查本批次安装的文件是否与其他MOD重叠（读取压缩包目录，不修改游戏目录）
+
+        返回:
+            [(路径, MOD名称A, MOD名称B)]
+        """
+        game_path_abs = os.path.abspath(self.game_path)
+        planned_files = {}
+        removed_names = []
+        for item in items:
+            if "_uninstall" in item:
+                removed_names.append(item["mod"].get("ModName", ""))
+                continue
+            paths = planned_files.setdefault(item.get("ModName", ""), [])
+            try:
+                downloads = self.collect_downloads(item)
+            except ValueError:
+                continue  # MOD信息不完整，暂存时统一报错
+            for download in downloads:
+                flag, zip_path = downloaded.get(download["url"], (False, None))
+                if flag:
+                    install_dir = os.path.join(game_path_abs, download["install_path"])
+                    paths.extend(os.path.join(install_dir, *name.split("/")) for name in mod_installer.archive_files(zip_path))
+        return mod_resolver.check_file_conflicts(planned_files, self.load_manifest(), removed_names)
+
+    def create_download_scheduler(self, prefer_cached=False):
+        """
+        根据配置创建下载调度器（mod_download_workers / mod_download_per_host，离线模式只使用本地缓存）
+
+        参数:
+            prefer_cached: 已缓存的压缩包直接使用，不向服务器检查更新
+        """
+        if self.scheduler is not None:
+            return self.scheduler
+        return mod_downloader.DownloadScheduler(
+            self.download_settings.get("mod_download_workers", mod_downloader.DEFAULT_MAX_WORKERS),
+            self.download_settings.get("mod_download_per_host", mod_downloader.DEFAULT_PER_HOST),
+            mod_downloader.ArtifactCache(offline=self.catalog.offline, prefer_cached=prefer_cached))
+
+    @staticmethod
+    def collect_downloads(mod):
+        """
+        列出MOD需要下载的全部文件（主文件和data数组中的子文件）
+
+        返回:
+            [{"url", "mod_name", "install_path", "sha256"}, ...]
+        """
+        download_url = mod.get("DownloadUrl", "")
+        mod_name = mod.get("ModName", "")
+        install_path = mod.get("InstallLocation", "")
+
+        if not all([download_url, mod_name, install_path]):
+            raise ValueError("MOD信息不完整")
+
+        downloads = [{
+            "url": download_url,
+            "mod_name": mod_name,
+            "install_path": install_path,
+            "sha256": mod_downloader.get_expected_hash(mod),
+        }]
+        for sub_file in mod.get("data", []):
+            sub_download_url = sub_file.get("DownloadUrl", "")
+            sub_mod_name = sub_file.get("ModName", "")
+            sub_install_path = sub_file.get("InstallLocation", "")
+            if sub_download_url and sub_mod_name and sub_install_path:
+                downloads.append({
+                    "url": sub_download_url,
+                    "mod_name": sub_mod_name,
+                    "install_path": sub_install_path,
+                    "sha256": mod_downloader.get_expected_hash(sub_file),
+                })
+        return downloads
+
+    def begin_transaction(self):
+        """创建安装事务，已安装MOD清单随事务一起提交"""
+        return mod_installer.InstallTransaction(self.game_path, self.load_manifest().copy())
+
+    def commit_transaction(self, transaction):
+        """提交安装事务，成功后使用事务中更新的清单"""
+        transaction.commit()
+        self.manifest = transaction.manifest
+
+    def install_single_mod(self, mod, downloaded=None, transaction=None):
+        """
+        安装单个MOD
+
+        参数:
+            mod: MOD信息
+            downloaded: 预先下载好的文件 {url: (success, 缓存路径 或错误信息)}，为 None 时在此处下载
+            transaction: 所属的安装事务（mod_installer.InstallTransaction），
+                         为 None 时单独创建事务并立即提交
+        """
+        downloads = self.collect_downloads(mod)
+
+        # 确保路径是绝对路径
+        game_path_abs = os.path.abspath(self.game_path)
+
+        # 先确认所有文件都已下载成功，再修改游戏目录
+        if downloaded is None:
+            downloaded = self.create_download_scheduler().download_all([(item["url"], item["sha256"]) for item in downloads])
+        for item in downloads:
+            flag, result = downloaded.get(item["url"], (False, f"文件未下载: {item['url']}"))
+            if flag is False:
+                raise Exception(result)
+
+        own_transaction = transaction is None
+        if own_transaction:
+            transaction = self.begin_transaction()
+        try:
+            # 同分组、冲突的MOD由 mod_resolver 规划为卸载步骤，排在安装之前
+            # 重新安装时先删除上次安装的文件，避免新版本中已不存在的文件残留
+            for path in transaction.manifest.remove(mod.get("ModName", "")):
+                transaction.remove(path)
+
+            # 暂存主MOD文件和data数组中的子文件，并记录安装的每个文件
+            installed_files = []
+            for i, item in enumerate(downloads):
+                if i > 0:
+                    logger.info(f"安装子文件 {i}/{len(downloads) - 1}: {item['mod_name']}")
+                transaction.stage_archive(downloaded[item["url"]][1], os.path.join(game_path_abs, item["install_path"]), installed_files)
+            transaction.manifest.add(mod, installed_files)
+        except Exception:
+            if own_transaction:
+                transaction.abort()
+            raise
+        if own_transaction:
+            self.commit_transaction(transaction)
+
+    def uninstall_single_mod(self, mod, transaction=None):
+        """
+        卸载单个MOD：按清单删除该MOD安装的全部文件
+
+        参数:
+            mod: MOD信息
+            transaction: 所属的安装事务，为 None 时单独创建事务并立即提交
+        """
+        mod_name = mod.get("ModName", "")
+        install_path = mod.get("InstallLocation", "")
+
+        if not all([mod_name, install_path]):
+            raise ValueError("MOD信息不完整")
+
+        own_transaction = transaction is None
+        if own_transaction:
+            transaction = self.begin_transaction()
+
+        # 事务提交时删除，删除后留下的空目录也在提交后清理
+        if transaction.manifest.is_installed(mod_name):
+            for path in transaction.manifest.remove(mod_name):
+                transaction.remove(path)
+        else:
+            # 清单中没有记录的MOD，删除安装目录下的同名文件或目录
+            transaction.remove(os.path.join(os.path.abspath(self.game_path), install_path, mod_name))
+
+        if own_transaction:
+            self.commit_transaction(transaction)
+
+    def install_batch(self, items, prefer_cached=False, status_callback=None, progress_callback=None):
+        """
+        先并发下载本批次全部压缩包，再在一个事务中执行卸载和安装
+
+        参数:
+            items: 操作列表，卸载为 {"_uninstall": True, "mod": MOD信息}，安装为MOD信息
+            prefer_cached: 优先使用本地缓存的压缩包，不检查更新
+            status_callback: 状态文字回调
+            progress_callback: 进度(0-100)回调
+
+        返回:
+            (success, 提示信息)
+        """
+        status_callback = status_callback or (lambda message: None)
+        progress_callback = progress_callback or (lambda value: None)
+        success_count = 0
+        failed_mods = []
+        total_ops = len(items)
+
+        def download_progress(done_count, total_count):
+            status_callback(f"正在下载 {done_count}/{total_count} 个文件...")
+            # 下载阶段占总进度的前一半
+            progress_callback(int(done_count / total_count * 50))
+
+        # 1. 并发下载所有需要安装的MOD（含data子文件），已缓存的文件直接使用
+        download_jobs = []
+        for item in items:
+            if "_uninstall" not in item:
+                try:
+                    download_jobs.extend(self.collect_downloads(item))
+                except ValueError:
+                    continue  # MOD信息不完整，安装时统一报错
+        downloaded = {}
+        if download_jobs:
+            status_callback(f"正在下载 {len(download_jobs)} 个文件...")
+            start_time = time.monotonic()
+            downloaded = self.create_download_scheduler(prefer_cached).download_all(
+                [(job["url"], job["sha256"]) for job in download_jobs], download_progress)
+            metrics.MOD_OPERATION_DURATION.observe(time.monotonic() - start_time, phase="download")
+
+        # 2. 修改游戏目录之前，检查不同MOD是否会写入同一文件
+        conflicts = self.check_file_conflicts(items, downloaded)
+        if conflicts:
+            return False, (f"以下文件会被多个MOD使用，本批次 {total_ops} 个操作均未执行\n\n"
+                           f"{mod_resolver.describe_conflicts(conflicts, self.get_resolver())}")
+
+        # 3. 按原顺序暂存卸载和安装操作（同分组的卸载排在安装之前），此时游戏目录还未修改
+        start_time = time.monotonic()
+        transaction = self.begin_transaction()
+        for i, item in enumerate(items):
+            try:
+                if "_uninstall" in item:
+                    mod = item["mod"]
+                    status_callback(f"正在准备卸载 {i+1}/{total_ops} 个操作: {mod.get('DisplayName')}")
+                    self.uninstall_single_mod(mod, transaction)
+                else:
+                    mod = item
+                    status_callback(f"正在准备安装 {i+1}/{total_ops} 个操作: {mod.get('DisplayName')}")
+                    self.install_single_mod(mod, downloaded, transaction)
+                success_count += 1
+            except Exception as e:
+                mod_display_name = item["mod"].get('DisplayName', '未知MOD') if "_uninstall" in item else item.get('DisplayName', '未知MOD')
+                failed_mods.append((mod_display_name, str(e)))
+                logger.error(f"{'卸载' if '_uninstall' in item else '安装'}MOD失败 {mod_display_name}: {e}")
+
+            # 更新进度
+            progress = 50 + ((i + 1) / total_ops) * 45 if download_jobs else ((i + 1) / total_ops) * 95
+            progress_callback(int(progress))
+
+        # 4. 整批提交：有任何操作失败时不修改游戏目录；替换过程中出错时自动回滚到安装前的状态
+        if failed_mods:
+            transaction.abort()
+            metrics.MOD_OPERATIONS.inc(result="failure")
+            details = "\n".join([f"{name}: {error}" for name, error in failed_mods])
+            return False, f"操作失败，本批次 {total_ops} 个操作均未执行\n\n失败详情：\n{details}"
+        try:
+            status_callback("正在替换游戏目录中的文件...")
+            self.commit_transaction(transaction)
+            logger.info(f"成功处理 {success_count} 个MOD操作")
+        except Exception as e:
+            metrics.MOD_OPERATIONS.inc(result="failure")
+            logger.error(f"替换MOD文件失败，已回滚: {e}")
+            return False, f"替换MOD文件失败，已恢复到安装前的状态\n\n错误：{e}"
+        metrics.MOD_OPERATION_DURATION.observe(time.monotonic() - start_time, phase="apply")
+        metrics.MOD_OPERATIONS.inc(result="success")
+        progress_callback(100)
+        return True, f"成功处理 {success_count} 个操作"
+
+    def uninstall_batch(self, mods, status_callback=None):
+        """
+        在一个事务中卸载一批MOD，删除过程中出错时自动恢复已删除的文件
+
+        返回:
+            (success, 提示信息)
+        """
+        status_callback = status_callback or (lambda message: None)
+        failed_mods = []
+        total_mods = len(mods)
+
+        transaction = self.begin_transaction()
+        for i, mod in enumerate(mods):
+            try:
+                status_callback(f"正在卸载 {i+1}/{total_mods} 个MOD: {mod.get('DisplayName')}")
+                self.uninstall_single_mod(mod, transaction)
+            except Exception as e:
+                failed_mods.append((mod.get('DisplayName', '未知MOD'), str(e)))
+                logger.error(f"卸载MOD失败 {mod.get('DisplayName')}: {e}")
+
+        if failed_mods:
+            transaction.abort()
+            details = "\n".join([f"{name}: {error}" for name, error in failed_mods])
+            return False, f"卸载失败，本批次 {total_mods} 个MOD均未卸载\n\n失败详情：\n{details}"
+        try:
+            self.commit_transaction(transaction)
+            logger.info(f"成功卸载 {total_mods} 个MOD")
+        except Exception as e:
+            logger.error(f"卸载MOD失败，已回滚: {e}")
+            return False, f"卸载MOD失败，已恢复到卸载前的状态\n\n错误：{e}"
+        return True, f"成功卸载 {total_mods} 个MOD"
+
+    def verify(self, mod_names=None, full=False):
+        """
+        检查已安装MOD的文件是否被删除或修改
+
+        参数:
+            mod_names: 要检查的 ModName，为 None 时检查全部已安装的MOD
+            full: 重新计算哈希（较慢），否则只比较文件大小和修改时间
+
+        返回:
+            {ModName: {"missing": [...], "modified": [...]}}，只包含有变化的MOD
+        """
+        manifest = self.load_manifest()
+        if mod_names is None:
+            mod_names = list(manifest.mods)
+        if not full:
+            return manifest.scan(mod_names)
+        drift = {}
+        for mod_name in mod_names:
+            changed = manifest.verify(mod_name)
+            if changed:
+                missing = [path for path in changed if not os.path.exists(manifest.absolute_path(path))]
+                drift[mod_name] = {"missing": missing, "modified": [path for path in changed if path not in missing]}
+        return drift
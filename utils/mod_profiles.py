@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import json
+import time
+
+from utils import mod_resolver
+
+"""
+    模块功能：
+    MOD方案（例如“活动”“日常”使用不同的MOD组合）
+    1. 方案保存在服务端根目录下，只记录MOD名称
+    2. 切换方案时只计算当前已安装与目标方案的差异：多余的卸载，缺少的安装，两边都有的不做任何改动
+    3. 切换时优先使用本地缓存的MOD压缩包（不检查更新），缓存齐全时无需联网
+"""
+
+PROFILES_NAME = ".pal_mod_profiles.json"
+
+
+class ModProfiles:
+    def __init__(self, game_path):
+        """
+        参数:
+            game_path: 服务端根目录
+        """
+        self.path = os.path.join(os.path.abspath(game_path), PROFILES_NAME)
+        self.profiles = {}  # 方案名称 -> {"mods": [ModName], "saved_at": 时间戳}
+        self.active = None  # 最近一次保存或切换到的方案
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.profiles = data.get("profiles", {})
+            self.active = data.get("active")
+        except (OSError, ValueError):
+            pass
+
+    def _write(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"profiles": self.profiles, "active": self.active}, f, ensure_ascii=False, indent=1)
+        os.replace(temp_path, self.path)
+
+    def names(self):
+        return sorted(self.profiles)
+
+    def get(self, name):
+        """方案中的MOD名称列表，方案不存在时返回 None"""
+        profile = self.profiles.get(name)
+        return list(profile["mods"]) if profile else None
+
+    def save(self, name, mod_names):
+        """保存（覆盖）方案，并设为当前方案"""
+        self.profiles[name] = {"mods": sorted(mod_names), "saved_at": time.time()}
+        self.active = name
+        self._write()
+
+    def delete(self, name):
+        self.profiles.pop(name, None)
+        if self.active == name:
+            self.active = None
+        self._write()
+
+    def set_active(self, name):
+        self.active = name
+        self._write()
+
+
+def plan_switch(profile_mods, manifest, resolver, ue4ss_installed=True):
+    """
+    计算从当前已安装的MOD切换到目标方案需要的步骤
+
+    参数:
+        profile_mods: 目标方案中的 ModName 列表
+        manifest: 已安装MOD清单（mod_manifest.ModManifest）
+        resolver: MOD依赖索引（mod_resolver.ModResolver）
+        ue4ss_installed: UE4SS 是否已安装
+
+    返回:
+        mod_resolver.InstallPlan：只包含有变化的MOD；方案无法满足时 errors 不为空
+    """
+    plan = mod_resolver.InstallPlan()
+    target = set(profile_mods)
+    installed = set(manifest.mods)
+    removal = installed - target
+
+    missing = sorted(mod_name for mod_name in target - installed if mod_name not in resolver.mods)
+    if missing:
+        plan.errors.append(f"以下MOD已不在MOD列表中，无法安装: {', '.join(missing)}")
+        return plan
+
+    to_add = [resolver.mods[mod_name] for mod_name in profile_mods if mod_name not in installed]
+    install_plan = resolver.plan_install(to_add, installed - removal, ue4ss_installed)
+    if install_plan.errors:
+        plan.errors.extend(install_plan.errors)
+        return plan
+
+    reasons = {mod_name: "不在方案中" for mod_name in removal}
+    for action, mod, reason in install_plan.steps:
+        mod_name = mod.get("ModName", "")
+        if action == mod_resolver.ACTION_UNINSTALL and mod_name not in removal:
+            # 方案中保留的MOD与要安装的MOD冲突
+            plan.errors.append(f"方案中的 {resolver.display_name(mod_name)} {reason}")
+
+    # 保留的MOD依赖了被卸载的MOD
+    remaining = (installed - removal) | {mod.get("ModName", "") for mod in install_plan.installs}
+    for mod_name in resolver.collect_dependents(sorted(removal), remaining):
+        plan.errors.append(f"方案中的 {resolver.display_name(mod_name)} 依赖的MOD不在方案中")
+    if plan.errors:
+        return plan
+
+    for mod_name in resolver.uninstall_order(sorted(removal)):
+        plan.add(mod_resolver.ACTION_UNINSTALL, resolver.mods.get(mod_name) or manifest.mod_info(mod_name), reasons[mod_name])
+    for action, mod, reason in install_plan.steps:
+        if action == mod_resolver.ACTION_INSTALL:
+            plan.add(action, mod, reason)
+    return plan
@@ -0,0 +1,320 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import heapq
+from collections import deque
+
+"""
+    模块功能：
+    MOD依赖与冲突检查，生成最少的安装/卸载步骤
+    1. 加载MOD列表时建立一次索引（名称、提供的功能、分组、冲突关系、依赖的反向索引），之后每次规划只访问相关的MOD
+    2. 清单（PalServer.json）中可选的字段：
+       - Requires: 依赖的MOD名称或功能名称列表
+       - Conflicts: 不能同时安装的MOD名称列表（双向生效）
+       - Provides: 该MOD提供的功能名称列表（MOD名称本身总是被视为已提供）
+       - Array: 分组，同一分组只能安装一个MOD（已有字段）
+       - RequiresUE4SS: 是否需要UE4SS，未填写时安装到 UE4SS 的 Mods 目录的MOD视为需要
+    3. 安装时依赖排在被依赖者之前，卸载时依赖它的MOD一并卸载
+    4. check_file_conflicts：下载后、修改游戏目录前，检查不同MOD是否会写入同一文件
+"""
+
+UE4SS_MODS_LOCATION = "pal/binaries/win64/mods"
+
+ACTION_INSTALL = "install"
+ACTION_UNINSTALL = "uninstall"
+
+
+def _name_list(value):
+    """清单字段可以是列表或逗号分隔的字符串"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(item).strip() for item in value if str(item).strip()]
+
+
+def needs_ue4ss(mod):
+    """MOD是否依赖UE4SS"""
+    if "RequiresUE4SS" in mod:
+        return bool(mod["RequiresUE4SS"])
+    install_location = mod.get("InstallLocation", "").replace("\\", "/").strip("/").lower()
+    return install_location.startswith(UE4SS_MODS_LOCATION)
+
+
+class ResolveError(Exception):
+    """无法满足的依赖或冲突"""
+
+
+class InstallPlan:
+    def __init__(self):
+        self.steps = []  # [(ACTION_INSTALL/ACTION_UNINSTALL, MOD信息, 原因)]
+        self.errors = []
+
+    def add(self, action, mod, reason=""):
+        self.steps.append((action, mod, reason))
+
+    @property
+    def installs(self):
+        return [mod for action, mod, _ in self.steps if action == ACTION_INSTALL]
+
+    @property
+    def uninstalls(self):
+        return [mod for action, mod, _ in self.steps if action == ACTION_UNINSTALL]
+
+
+class ModResolver:
+    def __init__(self, mods):
+        """
+        参数:
+            mods: MOD列表（PalServer.json 的 Platform）
+        """
+        self.mods = {}  # ModName -> MOD信息
+        self.providers = {}  # 功能名称 -> [ModName]（按列表顺序）
+        self.arrays = {}  # 分组 -> [ModName]
+        self.conflicts = {}  # ModName -> {ModName}
+        self.requirements = {}  # ModName -> [依赖的MOD名称或功能名称]
+        self.dependents = {}  # 功能名称 -> [依赖该功能的 ModName]（反向索引，卸载时只访问受影响的MOD）
+        for mod in mods:
+            mod_name = mod.get("ModName", "")
+            if not mod_name or mod_name in self.mods:
+                continue
+            self.mods[mod_name] = mod
+            for capability in [mod_name] + _name_list(mod.get("Provides")):
+                self.providers.setdefault(capability, []).append(mod_name)
+            self.requirements[mod_name] = _name_list(mod.get("Requires"))
+            for capability in self.requirements[mod_name]:
+                self.dependents.setdefault(capability, []).append(mod_name)
+            if "Array" in mod:
+                self.arrays.setdefault(mod["Array"], []).append(mod_name)
+            for other_name in _name_list(mod.get("Conflicts")):
+                self.conflicts.setdefault(mod_name, set()).add(other_name)
+                self.conflicts.setdefault(other_name, set()).add(mod_name)
+
+    def requires(self, mod_name):
+        return self.requirements.get(mod_name, [])
+
+    def capabilities(self, mod_name):
+        """MOD提供的功能（包括MOD名称本身）"""
+        return [mod_name] + _name_list(self.mods.get(mod_name, {}).get("Provides"))
+
+    def display_name(self, mod_name):
+        return self.mods.get(mod_name, {}).get("DisplayName") or mod_name
+
+    def _provided_by(self, capability, *name_sets):
+        return any(mod_name in names for mod_name in self.providers.get(capability, []) for names in name_sets)
+
+    def _exclusive_with(self, mod_name):
+        """与该MOD不能同时安装的MOD（同分组 + 冲突）"""
+        mod = self.mods[mod_name]
+        others = set(self.conflicts.get(mod_name, ()))
+        if "Array" in mod:
+            others.update(self.arrays.get(mod["Array"], ()))
+        others.discard(mod_name)
+        return others
+
+    def plan_install(self, selected_mods, installed_names, ue4ss_installed=True):
+        """
+        规划安装选中的MOD
+
+        参数:
+            selected_mods: 用户选中的MOD（已安装的会重新安装）
+            installed_names: 已安装的 ModName 集合
+            ue4ss_installed: UE4SS 是否已安装
+
+        返回:
+            InstallPlan：先卸载（依赖它的排在前面），再安装（依赖排在前面）；无法满足时 errors 不为空
+        """
+        plan = InstallPlan()
+        installed_names = set(installed_names)
+        selected_names = [mod.get("ModName", "") for mod in selected_mods]
+        selected_set = set(selected_names)
+        install_order = []  # 按依赖排序的待安装 ModName
+        install_set = set()
+        reasons = {}
+        visiting = set()
+
+        def visit(mod_name, reason):
+            if mod_name in install_set:
+                return
+            if mod_name in visiting:
+                raise ResolveError(f"MOD之间存在循环依赖: {self.display_name(mod_name)}")
+            visiting.add(mod_name)
+            for capability in self.requires(mod_name):
+                if self._provided_by(capability, installed_names, install_set, selected_set):
+                    # 已安装或本次会安装的MOD已提供该功能；本次安装的要先安装
+                    for provider in self.providers[capability]:
+                        if provider in selected_set and provider not in installed_names:
+                            visit(provider, reasons.get(provider, ""))
+                    continue
+                providers = self.providers.get(capability)
+                if not providers:
+                    raise ResolveError(f"{self.display_name(mod_name)} 依赖的 {capability} 不在MOD列表中")
+                visit(providers[0], f"{self.display_name(mod_name)} 的依赖")
+            visiting.discard(mod_name)
+            install_order.append(mod_name)
+            install_set.add(mod_name)
+            reasons[mod_name] = reason
+
+        try:
+            for mod_name in selected_names:
+                if mod_name not in self.mods:
+                    raise ResolveError(f"MOD不在列表中: {mod_name}")
+                visit(mod_name, "")
+        except ResolveError as e:
+            plan.errors.append(str(e))
+            return plan
+
+        planned = install_set
+        uninstall_names = []
+        reported_pairs = set()
+        for mod_name in install_order:
+            if needs_ue4ss(self.mods[mod_name]) and not ue4ss_installed:
+                plan.errors.append(f"{self.display_name(mod_name)} 需要先安装UE4SS")
+            for other_name in sorted(self._exclusive_with(mod_name)):
+                if other_name in planned:
+                    if frozenset((mod_name, other_name)) not in reported_pairs:
+                        reported_pairs.add(frozenset((mod_name, other_name)))
+                        plan.errors.append(f"{self.display_name(mod_name)} 与 {self.display_name(other_name)} 不能同时安装")
+                elif other_name in installed_names and other_name not in uninstall_names:
+                    uninstall_names.append(other_name)
+                    reasons.setdefault("-" + other_name, f"与 {self.display_name(mod_name)} 不能同时安装")
+        if plan.errors:
+            return plan
+
+        # 被替换的MOD卸载后，依赖它且没有其他提供者的已安装MOD也要卸载
+        remaining = (installed_names - set(uninstall_names)) | planned
+        for mod_name in self.collect_dependents(uninstall_names, remaining):
+            if mod_name in planned:
+                plan.errors.append(f"{self.display_name(mod_name)} 依赖的MOD将被替换，无法安装")
+            else:
+                uninstall_names.append(mod_name)
+                reasons.setdefault("-" + mod_name, "依赖的MOD将被卸载")
+        if plan.errors:
+            return plan
+
+        for mod_name in self.uninstall_order(uninstall_names):
+            plan.add(ACTION_UNINSTALL, self.mods[mod_name], reasons.get("-" + mod_name, ""))
+        for mod_name in install_order:
+            if mod_name in installed_names and mod_name not in selected_set:
+                continue  # 依赖已安装，不需要重新安装
+            plan.add(ACTION_INSTALL, self.mods[mod_name], reasons.get(mod_name, ""))
+        return plan
+
+    def collect_dependents(self, removed_names, remaining):
+        """
+        找出卸载 removed_names 后依赖不再满足的MOD（会逐层传递）；
+        原本就缺少依赖的MOD不受影响。通过反向索引只访问依赖被卸载功能的MOD
+
+        参数:
+            remaining: 卸载后仍会安装的 ModName 集合（会被修改）
+        """
+        broken = []
+        queue = deque(removed_names)
+        while queue:
+            removed_name = queue.popleft()
+            for capability in self.capabilities(removed_name):
+                if self._provided_by(capability, remaining):
+                    continue  # 还有其他提供者
+                for mod_name in self.dependents.get(capability, ()):
+                    if mod_name in remaining:
+                        remaining.discard(mod_name)
+                        broken.append(mod_name)
+                        queue.append(mod_name)
+        return broken
+
+    def uninstall_order(self, mod_names):
+        """卸载顺序：依赖别人的MOD先卸载（拓扑排序，同一层按原顺序；循环依赖时按原顺序打断）"""
+        index = {}
+        for mod_name in mod_names:
+            index.setdefault(mod_name, len(index))
+        # 依赖者 -> 被依赖者：依赖者先卸载
+        edges = {mod_name: set() for mod_name in index}
+        blocking = dict.fromkeys(index, 0)  # 还有多少个待卸载的MOD依赖它
+        for mod_name in index:
+            for capability in self.requires(mod_name):
+                targets = set(self.providers.get(capability, ()))
+                if capability in index:
+                    targets.add(capability)  # 不在MOD列表中的已安装MOD
+                for target in targets:
+                    if target != mod_name and target in index and target not in edges[mod_name]:
+                        edges[mod_name].add(target)
+                        blocking[target] += 1
+
+        order = []
+        ready = [index[mod_name] for mod_name, count in blocking.items() if count == 0]
+        heapq.heapify(ready)
+        names = list(index)
+        done = set()
+        while len(order) < len(names):
+            if ready:
+                mod_name = names[heapq.heappop(ready)]
+                if mod_name in done:
+                    continue
+            else:
+                mod_name = next(name for name in names if name not in done)  # 循环依赖
+            done.add(mod_name)
+            order.append(mod_name)
+            for target in edges[mod_name]:
+                blocking[target] -= 1
+                if blocking[target] == 0 and target not in done:
+                    heapq.heappush(ready, index[target])
+        return order
+
+    def plan_uninstall(self, selected_mods, installed_names):
+        """
+        规划卸载选中的MOD，依赖它们且没有其他提供者的已安装MOD一并卸载
+
+        返回:
+            InstallPlan（只包含卸载步骤）
+        """
+        plan = InstallPlan()
+        installed_names = set(installed_names)
+        removed_names = [mod.get("ModName", "") for mod in selected_mods]
+        remaining = installed_names - set(removed_names)
+        dependents = self.collect_dependents(removed_names, remaining)
+        reasons = {mod_name: "依赖的MOD将被卸载" for mod_name in dependents}
+        by_name = {mod.get("ModName", ""): mod for mod in selected_mods}
+        for mod_name in self.uninstall_order(removed_names + dependents):
+            plan.add(ACTION_UNINSTALL, by_name.get(mod_name) or self.mods[mod_name], reasons.get(mod_name, ""))
+        return plan
+
+
+def check_file_conflicts(planned_files, manifest, removed_names=()):
+    """
+    检查本次安装的文件是否与其他MOD重叠（在修改游戏目录之前调用）
+
+    参数:
+        planned_files: {ModName: [安装后的文件绝对路径]}
+        manifest: 已安装MOD清单（mod_manifest.ModManifest）
+        removed_names: 本次会卸载的 ModName
+
+    返回:
+        [(路径, MOD名称A, MOD名称B)]，没有冲突时为空列表
+    """
+    conflicts = []
+    removed_names = set(removed_names)
+    claimed = {}  # 相对路径 -> ModName
+    for mod_name, paths in planned_files.items():
+        for path in paths:
+            relative_path = manifest.relative_path(path)
+            owner = claimed.get(relative_path)
+            if owner is None:
+                owner = manifest.owners.get(relative_path)
+                # 卸载或重新安装的MOD的旧文件会先删除
+                if owner in removed_names or owner == mod_name:
+                    owner = None
+            if owner and owner != mod_name:
+                conflicts.append((relative_path, owner, mod_name))
+            claimed[relative_path] = mod_name
+    return conflicts
+
+
+def describe_conflicts(conflicts, resolver=None, limit=10):
+    """冲突列表的说明文字"""
+    lines = []
+    for path, mod_a, mod_b in conflicts[:limit]:
+        if resolver:
+            mod_a, mod_b = resolver.display_name(mod_a), resolver.display_name(mod_b)
+        lines.append(f"{path}: {mod_a} / {mod_b}")
+    if len(conflicts) > limit:
+        lines.append(f"... 共 {len(conflicts)} 个文件冲突")
+    return "\n".join(lines)
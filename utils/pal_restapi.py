@@ -1,10 +1,208 @@
+import time
+import random
+import threading
+from collections import deque
+
 import requests
 import json
 from typing import Dict, Any, Optional, Tuple
 
+from utils import metrics
+
+# 请求失败的分类（用于统计和判断连接状态）
+ERROR_TIMEOUT = "timeout"
+ERROR_CONNECTION = "connection"
+ERROR_UNAUTHORIZED = "unauthorized"  # 401
+ERROR_BAD_REQUEST = "bad_request"  # 400
+ERROR_SERVER = "server_error"  # 5xx
+ERROR_OTHER = "other"
+ERROR_CIRCUIT_OPEN = "circuit_open"  # 熔断期间直接返回，未发送请求
+
+HEALTH_WINDOW = 20  # 健康度统计最近多少次请求
+DOWN_AFTER_FAILURES = 3  # 连续多少次失败后判定连接断开
+
+CONNECT_TIMEOUT = 3  # 建立连接的超时(秒)：服务器未启动时不需要等满读取超时
+READ_TIMEOUT = 10  # 等待响应的超时(秒)
+
+# 说明服务器不可用的错误：计入熔断
+UNAVAILABLE_ERRORS = {ERROR_TIMEOUT, ERROR_CONNECTION, ERROR_SERVER}
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, base_delay: float = 0.2, max_delay: float = 2.0,
+                 retry_on=(ERROR_CONNECTION, ERROR_SERVER)):
+        """
+        重试策略：只用于 GET（查询类请求，重复发送没有副作用）；踢出、封禁、关服等 POST 操作从不自动重试。
+
+        默认只重试连接失败（含连接超时）和 5xx；读取超时说明服务器已收到请求但没有响应，重试只会让调用方再等一次，不重试。
+        每次重试前等待 0 ~ min(max_delay, base_delay * 2^n) 秒的随机时间，避免多个调用同时重试。
+
+        参数:
+            max_attempts: 最多发送次数（含第一次），为 1 时不重试
+            base_delay: 退避基准(秒)
+            max_delay: 单次等待上限(秒)
+            retry_on: 需要重试的错误分类
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_on = set(retry_on)
+
+    def should_retry(self, method: str, error_class: Optional[str], attempt: int) -> bool:
+        """第 attempt 次（从1开始）请求失败后是否重试"""
+        return method.upper() == "GET" and error_class in self.retry_on and attempt < self.max_attempts
+
+    def delay(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DOWN_AFTER_FAILURES, reset_timeout: float = 10):
+        """
+        熔断器：连续 failure_threshold 次调用（重试后仍）服务器不可用（超时、连接失败、5xx）后打开，
+        打开期间所有请求立即失败，不再等待超时；reset_timeout 秒后进入半开状态，只放行一个探测请求，
+        成功则关闭熔断恢复正常，失败则重新打开。
+
+        参数:
+            failure_threshold: 连续失败多少次后打开
+            reset_timeout: 打开后多少秒允许探测
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.lock = threading.Lock()
+
+    def remaining(self) -> float:
+        """打开状态下距离允许探测还有多少秒，其他状态为 0"""
+        if self.state != self.OPEN:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def ready(self) -> bool:
+        """现在发送请求是否会被放行（不改变状态，用于判断是否需要探测）"""
+        with self.lock:
+            return self.state == self.CLOSED or (self.state == self.OPEN and self.remaining() == 0)
+
+    def allow(self) -> bool:
+        """请求发送前调用；打开时拒绝，到期后放行一个探测请求并进入半开状态"""
+        with self.lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and self.remaining() == 0:
+                self.state = self.HALF_OPEN
+                return True
+            return False
+
+    def record(self, available: bool):
+        """
+        记录一次请求结果。
+
+        参数:
+            available: 服务器是否可用（收到了响应，包括 400/401）
+        """
+        with self.lock:
+            if available:
+                self.state = self.CLOSED
+                self.consecutive_failures = 0
+                return
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ConnectionHealth:
+    def __init__(self, window: int = HEALTH_WINDOW, down_after: int = DOWN_AFTER_FAILURES):
+        """
+        REST API 连接的健康状况：最近若干次请求的成功率、平均耗时和各类错误次数。
+
+        单次超时或连接失败不认为连接断开（服务器繁忙、网络抖动），连续失败 down_after 次才判定断开；
+        400（请求参数错误，例如踢出已离线的玩家）说明服务器正常响应，不影响健康度；
+        401 表示密码错误，重试没有意义，立即判定断开。
+
+        参数:
+            window: 统计最近多少次请求
+            down_after: 连续失败多少次后判定断开
+        """
+        self.down_after = down_after
+        self.outcomes = deque(maxlen=window)  # (是否成功, 耗时)
+        self.consecutive_failures = 0
+        self.error_counts = {}  # 错误分类 -> 次数
+        self.last_error_class = None
+        self.last_error = ""
+        self.lock = threading.Lock()
+
+    def record(self, error_class: Optional[str], latency: float, message: str = ""):
+        """
+        记录一次请求结果。
+
+        参数:
+            error_class: 错误分类，成功时为 None
+            latency: 耗时(秒)
+            message: 错误信息
+        """
+        healthy = error_class is None or error_class == ERROR_BAD_REQUEST
+        with self.lock:
+            self.outcomes.append((healthy, latency))
+            if error_class is not None:
+                self.error_counts[error_class] = self.error_counts.get(error_class, 0) + 1
+                self.last_error_class = error_class
+                self.last_error = message
+            if healthy:
+                self.consecutive_failures = 0
+                self.last_error_class = None
+            else:
+                self.consecutive_failures += 1
+
+    @property
+    def score(self) -> int:
+        """健康度 0~100：最近请求的成功率，没有请求时为 100"""
+        with self.lock:
+            if not self.outcomes:
+                return 100
+            return round(sum(1 for healthy, _ in self.outcomes if healthy) * 100 / len(self.outcomes))
+
+    def is_down(self) -> bool:
+        """是否判定连接断开"""
+        with self.lock:
+            return self.consecutive_failures >= self.down_after or self.last_error_class == ERROR_UNAUTHORIZED
+
+    def auth_failed(self) -> bool:
+        """最近一次失败是否为密码错误（密码错误时不自动探测恢复）"""
+        with self.lock:
+            return self.last_error_class == ERROR_UNAUTHORIZED
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        当前状况（可直接转为JSON）。
+
+        返回:
+            {"score", "down", "consecutive_failures", "avg_latency", "errors", "last_error"}
+        """
+        score = self.score
+        down = self.is_down()
+        with self.lock:
+            latencies = [latency for _, latency in self.outcomes]
+            return {
+                "score": score,
+                "down": down,
+                "consecutive_failures": self.consecutive_failures,
+                "avg_latency": sum(latencies) / len(latencies) if latencies else 0.0,
+                "errors": dict(self.error_counts),
+                "last_error": self.last_error,
+            }
+
 
 class PalRestAPI:
-    def __init__(self, host: str = "127.0.0.1", port: int = 8080, username: str = "admin", password: str = ""):
+    def __init__(self, host: str = "127.0.0.1", port: int = 8080, username: str = "admin", password: str = "",
+                 name: str = "", retry_policy: Optional[RetryPolicy] = None,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         """
         初始化帕鲁服务器REST API客户端。
         
@@ -13,17 +211,24 @@ class PalRestAPI:
             port: 服务器端口
             username: 基本认证用户名
             password: 基本认证密码
+            name: 服务器名称，用作指标的 server 标签（为空时使用 主机:端口）
+            retry_policy: GET 请求的重试策略，默认 RetryPolicy()
+            circuit_breaker: 熔断器，默认 CircuitBreaker()
         """
+        self.name = name
         self.host = host
         self.port = port
         self.username = username
         self.password = password
         self.base_url = f"http://{host}:{port}"
         self.auth = (username, password) if username else None
+        self.health = ConnectionHealth()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
 
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Tuple[bool, Any]:
         """
-        向REST API发送HTTP请求。
+        向REST API发送HTTP请求，经过熔断器和重试策略，记录耗时、错误分类和连接健康度。
         
         参数:
             method: HTTP方法 (GET, POST, 等)
@@ -33,49 +238,83 @@ class PalRestAPI:
         返回:
             (success, response_data) 元组
         """
+        server = self.name or f"{self.host}:{self.port}"
+        if not self.circuit_breaker.allow():
+            # 熔断期间不发送请求，也不计入健康度
+            metrics.REST_API_REQUESTS.inc(server=server, endpoint=endpoint, result=ERROR_CIRCUIT_OPEN)
+            return False, f"服务器暂时不可用: 连续请求失败，{int(self.circuit_breaker.remaining()) + 1} 秒后自动重试"
+
+        attempt = 0
+        start_time = time.monotonic()
+        while True:
+            attempt += 1
+            attempt_start = time.monotonic()
+            flag, result, error_class = self._send_request(method, endpoint, data)
+            metrics.REST_API_REQUEST_DURATION.observe(time.monotonic() - attempt_start, server=server, endpoint=endpoint)
+            metrics.REST_API_REQUESTS.inc(server=server, endpoint=endpoint, result=error_class or "success")
+            if not self.retry_policy.should_retry(method, error_class, attempt):
+                break
+            metrics.REST_API_RETRIES.inc(server=server, endpoint=endpoint)
+            time.sleep(self.retry_policy.delay(attempt))
+
+        # 重试只是一次调用的内部过程：熔断器和健康度按调用（最终结果）记录一次，
+        # 否则一次失败的 GET 重试 3 次就会达到断开和熔断的阈值
+        self.circuit_breaker.record(error_class not in UNAVAILABLE_ERRORS)
+        self.health.record(error_class, time.monotonic() - start_time, "" if flag else str(result))
+        metrics.REST_API_HEALTH.set(self.health.score, server=server)
+        metrics.REST_API_CIRCUIT_OPEN.set(int(self.circuit_breaker.state != CircuitBreaker.CLOSED), server=server)
+        return flag, result
+
+    def _send_request(self, method: str, endpoint: str, data: Optional[Dict] = None) -> Tuple[bool, Any, Optional[str]]:
+        """
+        返回:
+            (success, response_data, 错误分类) 元组，成功时错误分类为 None
+        """
         url = f"{self.base_url}{endpoint}"
         headers = {"Content-Type": "application/json"}
         
         try:
             if method.upper() == "GET":
-                response = requests.get(url, auth=self.auth, headers=headers, timeout=10)
+                response = requests.get(url, auth=self.auth, headers=headers, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
             elif method.upper() == "POST":
                 response = requests.post(url, auth=self.auth, headers=headers, 
-                                       data=json.dumps(data) if data else None, timeout=10)
+                                       data=json.dumps(data) if data else None, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
             else:
-                return False, f"不支持的HTTP方法: {method}"
+                return False, f"不支持的HTTP方法: {method}", ERROR_OTHER
             
             # 检查请求是否成功
             if response.status_code == 200:
                 try:
                     if response.text.strip():
-                        return True, response.json()
+                        return True, response.json(), None
                     else:
                         # 处理空响应
-                        return True, {"status": "success", "message": "操作执行成功"}
+                        return True, {"status": "success", "message": "操作执行成功"}, None
                 except json.JSONDecodeError:
                     # 如果不是JSON响应，返回文本内容
                     if response.text.strip():
-                        return True, response.text
+                        return True, response.text, None
                     else:
-                        return True, {"status": "success", "message": "操作执行成功"}
+                        return True, {"status": "success", "message": "操作执行成功"}, None
             elif response.status_code == 401:
-                return False, "未授权: 请检查用户名和密码"
+                return False, "未授权: 请检查用户名和密码", ERROR_UNAUTHORIZED
             elif response.status_code == 400:
                 # 尝试获取详细的错误信息
                 if response.text.strip():
-                    return False, f"请求错误: {response.text}"
+                    return False, f"请求错误: {response.text}", ERROR_BAD_REQUEST
                 else:
-                    return False, "请求错误: 无效的请求数据"
+                    return False, "请求错误: 无效的请求数据", ERROR_BAD_REQUEST
             else:
-                return False, f"HTTP {response.status_code}: {response.text}"
+                error_class = ERROR_SERVER if response.status_code >= 500 else ERROR_OTHER
+                return False, f"HTTP {response.status_code}: {response.text}", error_class
                 
         except requests.exceptions.ConnectionError:
-            return False, "连接错误: 无法连接到服务器"
+            # 连接超时（ConnectTimeout）也属于 ConnectionError：请求未发出，可以安全重试
+            return False, "连接错误: 无法连接到服务器", ERROR_CONNECTION
         except requests.exceptions.Timeout:
-            return False, "超时错误: 请求超时"
+            return False, "超时错误: 请求超时", ERROR_TIMEOUT
         except Exception as e:
-            return False, f"未知错误: {str(e)}"
+            return False, f"未知错误: {str(e)}", ERROR_OTHER
 
     def get_server_info(self) -> Tuple[bool, Any]:
         """
@@ -0,0 +1,185 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import sys
+import shlex
+import signal
+import subprocess
+
+import psutil
+
+"""
+    模块功能：
+    服务端平台相关的路径和进程操作（Windows 版 PalServer.exe / Linux 版 PalServer.sh）
+    1. 根据选择的启动文件（或服务端目录中存在的启动文件）判断服务端平台，
+       配置文件目录分别为 Pal/Saved/Config/WindowsServer 和 Pal/Saved/Config/LinuxServer
+    2. Linux 下服务端在独立的进程组中启动，强制停止时结束整个进程组（PalServer.sh 及其启动的游戏进程）
+    3. 打开文件所在目录：Windows 使用 explorer /select，Linux 使用 xdg-open，macOS 使用 open -R
+    4. 路径计算不依赖当前运行的系统，可以在 Linux 上检查 Windows 服务端的目录结构，反之亦然
+"""
+
+PLATFORM_WINDOWS = "windows"
+PLATFORM_LINUX = "linux"
+
+LAUNCHER_NAMES = {PLATFORM_WINDOWS: "PalServer.exe", PLATFORM_LINUX: "PalServer.sh"}
+CONFIG_DIR_NAMES = {PLATFORM_WINDOWS: "WindowsServer", PLATFORM_LINUX: "LinuxServer"}
+BINARIES_DIR_NAMES = {PLATFORM_WINDOWS: "Win64", PLATFORM_LINUX: "Linux"}
+SETTINGS_NAME = "PalWorldSettings.ini"
+
+
+def host_platform():
+    """当前运行的系统对应的服务端平台"""
+    return PLATFORM_WINDOWS if os.name == "nt" else PLATFORM_LINUX
+
+
+def app_path(*names):
+    """程序所在目录下的路径（config.json 等），与当前工作目录无关"""
+    return os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), *names)
+
+
+def launcher_names():
+    """支持的启动文件名，当前系统的排在前面"""
+    native = host_platform()
+    return [LAUNCHER_NAMES[native]] + [name for platform, name in LAUNCHER_NAMES.items() if platform != native]
+
+
+def launcher_filter():
+    """文件选择对话框的过滤条件"""
+    return "PalServer (" + " ".join(launcher_names()) + ")"
+
+
+def is_launcher(path):
+    return os.path.isfile(path) and os.path.basename(path).lower() in (name.lower() for name in LAUNCHER_NAMES.values())
+
+
+def server_dir(path):
+    """配置中的服务端路径可以是启动文件或其所在目录"""
+    return os.path.dirname(path) if os.path.isfile(path) else path
+
+
+def find_launcher(game_dir):
+    """
+    服务端目录中的启动文件（优先当前系统的版本）
+
+    返回:
+        启动文件路径，不存在时返回 None
+    """
+    for name in launcher_names():
+        path = os.path.join(game_dir, name)
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+def server_platform(palserver_path):
+    """
+    服务端平台
+
+    参数:
+        palserver_path: 启动文件或服务端目录
+    """
+    if os.path.basename(palserver_path).lower() == LAUNCHER_NAMES[PLATFORM_LINUX].lower():
+        return PLATFORM_LINUX
+    if os.path.basename(palserver_path).lower() == LAUNCHER_NAMES[PLATFORM_WINDOWS].lower():
+        return PLATFORM_WINDOWS
+    launcher = find_launcher(palserver_path) if os.path.isdir(palserver_path) else None
+    if launcher:
+        return server_platform(launcher)
+    return host_platform()
+
+
+def settings_relative_path(palserver_path):
+    """配置文件相对服务端目录的路径（用于提示信息）"""
+    return "/Pal/Saved/Config/" + CONFIG_DIR_NAMES[server_platform(palserver_path)] + "/" + SETTINGS_NAME
+
+
+def settings_path(palserver_path):
+    """PalWorldSettings.ini 的绝对路径"""
+    return os.path.abspath(os.path.join(server_dir(palserver_path), "Pal", "Saved", "Config",
+                                        CONFIG_DIR_NAMES[server_platform(palserver_path)], SETTINGS_NAME))
+
+
+def saved_dir(palserver_path):
+    """存档目录 Pal/Saved"""
+    return os.path.abspath(os.path.join(server_dir(palserver_path), "Pal", "Saved"))
+
+
+def binaries_dir(palserver_path):
+    """游戏程序目录 Pal/Binaries/Win64 或 Pal/Binaries/Linux"""
+    return os.path.join(server_dir(palserver_path), "Pal", "Binaries", BINARIES_DIR_NAMES[server_platform(palserver_path)])
+
+
+def launch_command(palserver_path, arguments, launch_options=""):
+    """
+    启动命令
+
+    参数:
+        arguments: 启动参数列表
+        launch_options: 用户填写的自定义启动项（原样追加）
+
+    返回:
+        Windows 返回命令行字符串（与之前的行为一致，由 CreateProcess 解析）；Linux 返回参数列表
+    """
+    if host_platform() == PLATFORM_WINDOWS:
+        command = " ".join([palserver_path] + list(arguments))
+        if launch_options:
+            command += " " + launch_options
+        return command
+    command = [palserver_path] if os.access(palserver_path, os.X_OK) else ["sh", palserver_path]
+    return command + list(arguments) + shlex.split(launch_options)
+
+
+def popen_options(palserver_path):
+    """启动服务端时传给 subprocess.Popen 的参数"""
+    options = {"cwd": server_dir(palserver_path), "stdin": subprocess.DEVNULL,
+               "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if host_platform() != PLATFORM_WINDOWS:
+        # 独立的进程组：强制停止时可以结束 PalServer.sh 启动的所有进程
+        options["start_new_session"] = True
+    return options
+
+
+def process_alive(pid, process=None):
+    """
+    进程是否仍在运行
+
+    参数:
+        process: 本程序启动的 subprocess.Popen；Linux 下已退出但未回收的进程（僵尸进程）仍然存在，需要通过它回收
+    """
+    if process is not None and process.pid == pid:
+        return process.poll() is None
+    try:
+        return psutil.Process(pid).status() != psutil.STATUS_ZOMBIE
+    except psutil.Error:
+        return False
+
+
+def kill_tree(pid):
+    """
+    强制结束服务端
+
+    Linux：结束整个进程组；Windows：结束 PalServer.exe 启动的子进程（PalServer.exe 随之退出）
+    """
+    if host_platform() != PLATFORM_WINDOWS:
+        try:
+            # 只结束服务端自己的进程组（popen_options 启动时创建），避免误杀同组的其他进程
+            if os.getpgid(pid) == pid:
+                os.killpg(pid, signal.SIGKILL)
+                return
+        except (ProcessLookupError, PermissionError):
+            pass
+    psu_proc = psutil.Process(pid)
+    for proc in psu_proc.children(recursive=True):
+        os.kill(proc.pid, 9)
+    if host_platform() != PLATFORM_WINDOWS:
+        os.kill(pid, 9)
+
+
+def open_in_file_manager(path):
+    """在文件管理器中显示文件"""
+    if sys.platform.startswith("win"):
+        subprocess.Popen("explorer /select,\"" + os.path.abspath(path) + "\"")
+    elif sys.platform == "darwin":
+        subprocess.Popen(["open", "-R", os.path.abspath(path)])
+    else:
+        subprocess.Popen(["xdg-open", os.path.dirname(os.path.abspath(path))])
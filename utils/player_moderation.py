@@ -0,0 +1,164 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import re
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from utils import event_log
+
+"""
+    模块功能：
+    批量踢出 / 封禁 / 解封玩家
+    1. 以有限的并发（默认4个）同时调用 REST API，返回每名玩家的结果；不刷新玩家列表，由调用方在全部完成后刷新一次
+    2. 从粘贴的文本中解析玩家ID（steam_xxx / gdk_xxx；17位纯数字的 SteamID64 自动补全 steam_ 前缀），去重并保持顺序
+    3. 封禁列表导入/导出：每行一个玩家ID，与服务端 banlist.txt 格式相同；# 开头为注释，
+       玩家名称写在ID上一行的注释中（导入时也接受写在ID之后或同一行注释中的名称）
+    4. 导出的封禁列表来自事件日志：本工具对该服务器封禁过、之后没有解封的玩家
+"""
+
+logger = logging.getLogger(__name__)
+
+ACTION_KICK = "kick"
+ACTION_BAN = "ban"
+ACTION_UNBAN = "unban"
+
+# 操作 -> (REST API 方法, 事件类型, 显示名称)
+ACTIONS = {
+    ACTION_KICK: ("kick_player", event_log.EVENT_KICK, "踢出"),
+    ACTION_BAN: ("ban_player", event_log.EVENT_BAN, "封禁"),
+    ACTION_UNBAN: ("unban_player", event_log.EVENT_UNBAN, "解封"),
+}
+
+MAX_WORKERS = 4  # 同时进行的 REST API 请求数，避免压垮正在被攻击的服务器
+
+# 玩家ID的平台前缀：Steam 和 Xbox/微软商店（GDK）
+PLATFORM_PREFIXES = ("steam", "gdk")
+# 平台前缀_数字或十六进制ID（steam_7656...、gdk_2535...），或17位 SteamID64；普通的 snake_case 单词不会被当作ID。
+# 边界只排除 ASCII 字母数字（\w 包含中文，紧挨着中文的ID会被漏掉，例如 "玩家steam_7656...作弊"）
+USER_ID_PATTERN = re.compile(r"(?<![A-Za-z0-9_])(?:(?:%s)_[0-9A-Fa-f]+|\d{17})(?![A-Za-z0-9_])" % "|".join(PLATFORM_PREFIXES))
+
+
+def normalize_user_id(user_id):
+    return "steam_" + user_id if user_id.isdigit() else user_id
+
+
+def parse_user_ids(text):
+    """
+    从文本中解析玩家ID（可以是每行一个，也可以是聊天记录、表格等任意文本）
+
+    返回:
+        去重后的玩家ID列表，保持出现顺序
+    """
+    user_ids = []
+    for match in USER_ID_PATTERN.finditer(text):
+        user_id = normalize_user_id(match.group(0))
+        if user_id not in user_ids:
+            user_ids.append(user_id)
+    return user_ids
+
+
+def run_batch(instance, action, players, max_workers=MAX_WORKERS, callback=None):
+    """
+    批量执行操作，成功的操作写入事件日志
+
+    参数:
+        instance: server_instance.ServerInstance（或 daemon_client.RemoteServerInstance）
+        action: ACTION_KICK / ACTION_BAN / ACTION_UNBAN
+        players: [(玩家ID, 名称), ...]
+        max_workers: 最大并发数
+        callback: callback(玩家ID, flag, 结果信息)，每名玩家完成时在工作线程中调用
+
+    返回:
+        [(玩家ID, 名称, flag, 结果信息), ...]，顺序与 players 相同
+    """
+    method_name, event_type, title = ACTIONS[action]
+
+    def run(player):
+        user_id, name = player
+        try:
+            flag, result = instance.call_api(method_name, user_id)
+        except Exception as e:
+            logger.exception(f"{title}玩家失败: {user_id}")
+            flag, result = False, f"未知错误: {str(e)}"
+        if flag:
+            instance.record_event(event_type, f"{title}玩家: {user_id}", user_id=user_id, name=name)
+        if callback is not None:
+            callback(user_id, flag, result)
+        return user_id, name, flag, result
+
+    if not players:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(players))), thread_name_prefix="pal-moderation") as executor:
+        return list(executor.map(run, players))
+
+
+def summarize(action, results):
+    """结果汇总文字，例如：封禁 10 名玩家：成功 9，失败 1"""
+    title = ACTIONS[action][2]
+    success_count = sum(1 for _, _, flag, _ in results if flag)
+    return f"{title} {len(results)} 名玩家：成功 {success_count}，失败 {len(results) - success_count}"
+
+
+def banned_players(log, server=None):
+    """
+    事件日志中当前处于封禁状态的玩家（最近一次操作为封禁）
+
+    参数:
+        log: event_log.EventLog
+        server: 服务器名称，None 表示所有服务器
+
+    返回:
+        [(玩家ID, 名称), ...]，按封禁时间从新到旧
+    """
+    seen = set()
+    players = []
+    for event in log.search(event_types=[event_log.EVENT_BAN, event_log.EVENT_UNBAN], server=server, limit=None):
+        user_id = event["data"].get("user_id")
+        if not user_id or user_id in seen:
+            continue
+        seen.add(user_id)
+        if event["event_type"] == event_log.EVENT_BAN:
+            players.append((user_id, event["data"].get("name", "")))
+    return players
+
+
+def load_ban_list(path):
+    """
+    读取封禁列表（导出的文件或服务端的 banlist.txt）
+
+    返回:
+        [(玩家ID, 名称), ...]
+    """
+    players = []
+    seen = set()
+    comment = ""  # 上一行注释（save_ban_list 把玩家名称写在ID上一行）
+    with open(path, "r", encoding="utf-8-sig") as f:
+        for line in f:
+            content, _, line_comment = line.partition("#")
+            content = content.strip()
+            match = USER_ID_PATTERN.search(content)
+            if match is None:
+                comment = line_comment.strip() if not content else ""
+                continue
+            name = content[match.end():].strip(" \t,;") or line_comment.strip() or comment
+            comment = ""
+            user_id = normalize_user_id(match.group(0))
+            if user_id in seen:
+                continue
+            seen.add(user_id)
+            players.append((user_id, name))
+    return players
+
+
+def save_ban_list(path, players, server=""):
+    """
+    导出封禁列表：每行一个玩家ID，玩家名称写在上一行的注释中，文件可直接作为服务端的 banlist.txt 使用
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        # 标题后空一行，避免被当作第一个玩家的名称
+        f.write(f"# 帕鲁服务器封禁列表 {server} 导出时间 {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
+        for user_id, name in players:
+            if name:
+                f.write(f"# {name}\n")
+            f.write(user_id + "\n")
@@ -0,0 +1,530 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import time
+import shutil
+import logging
+import subprocess
+from datetime import datetime, timedelta
+
+import psutil
+
+from utils import settings_file_operation, event_log, platform_paths, metrics
+
+"""
+    模块功能：
+    单个游戏服务端实例：进程、REST API 连接、配置文件、存档备份和定时任务（崩溃重启、定时重启、定时备份、倒计时）
+    1. 与界面无关，主窗口和后台服务都可以在同一进程中创建多个实例，由 server_supervisor 统一调度
+    2. 实例的配置是 config.json 中的一节：第一个实例使用顶层配置（兼容旧版本），其余保存在 servers 列表中
+    3. 提示信息和状态变化通过 supervisor 的监听器通知，可能在工作线程中回调
+    4. 路径、启动命令和强制停止通过 platform_paths 区分 Windows（PalServer.exe）和 Linux（PalServer.sh）服务端
+    5. 资源采集、玩家列表、启动/重启、备份的结果同时更新 metrics 中的指标（标签 server 为服务器名称）
+"""
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = "默认服务器"
+
+# 新服务器（以及旧配置缺少的字段）使用的默认配置
+DEFAULT_CONFIG = {
+    "game_port": 8211,  # 游戏端口
+    "game_publicport": 25575,  # 游戏查询端口
+    "game_player_limit": 32,  # 游戏玩家数上限
+    "api_addr": "127.0.0.1",  # API 服务器地址
+    "api_port": 8212,  # REST API 服务器端口
+    "api_password": "",  # 管理员密码
+    "crash_detection_flag": False,  # 是否开启崩溃检测
+    "auto_restart_flag": False,  # 是否开启自动重启
+    "auto_restart_time_limit": 7200,  # 自动重启时间间隔(秒)
+    "auto_restart_player_flag": False,  # 自动重启是否判断玩家数
+    "auto_restart_player_limit": 0,  # 仅在玩家数小于该值时自动重启
+    "launch_options_flag": False,  # 是否开启自定义启动项
+    "launch_options_info": "",  # 自定义启动项信息
+    "auto_backup_flag": False,  # 是否开启自动备份
+    "auto_backup_time_limit": 3600,  # 自动备份时间间隔(秒)
+    "api_retry_attempts": 3,  # REST API 查询请求（GET）失败时最多发送几次
+    "api_circuit_reset_time": 10  # REST API 连续失败熔断后，多少秒后探测是否恢复
+}
+
+# 顶层配置中属于整个程序、不属于第一个服务器的字段
+GLOBAL_CONFIG_KEYS = {"servers", "daemon_token", "daemon_port", "metrics_port"}
+
+# 倒计时动作
+COUNTDOWN_RESTART = "restart"
+COUNTDOWN_STOP = "stop"
+RESTART_START_DELAY = 10  # 重启时发送关服命令后等待多少秒再启动
+RESTART_CONNECT_DELAY = 20  # 重启时发送关服命令后等待多少秒再重新连接 REST API
+
+# 测试连接失败（未授权）时尝试的常见默认密码
+DEFAULT_PASSWORDS = ["123456", "admin", "password"]
+
+
+def validate_launch(game_port, game_publicport, game_player_limit):
+    """
+    检查启动参数
+
+    返回:
+        (flag, 错误信息)
+    """
+    checks = [
+        (game_port, "游戏 连接端口", 1000, 65534),
+        (game_publicport, "游戏 查询端口", 1000, 65534),
+        (game_player_limit, "游戏 人数上限", 2, 128),
+    ]
+    for value, title, minimum, maximum in checks:
+        if str(value).isdigit() is False:
+            return False, f"{title}只能为数字，请重新输入！"
+        if int(value) < minimum or int(value) > maximum:
+            return False, f"{title}需在{minimum}~{maximum}范围，请重新输入！"
+    return True, ""
+
+
+class ServerInstance:
+    def __init__(self, config, supervisor=None):
+        """
+        参数:
+            config: 该服务器的配置（config.json 中的一节，直接修改）
+            supervisor: 所属的 server_supervisor.ServerSupervisor，负责保存配置、线程池和通知
+        """
+        self.config = config
+        for key, value in DEFAULT_CONFIG.items():
+            self.config.setdefault(key, value)
+        self.supervisor = supervisor
+        self.process = None
+        self.pal_rest_api = None
+        self.rest_api_connect_flag = False
+        self.server_version = ""
+        self.server_run_flag = False
+        self.server_run_time = datetime.now()
+        self.last_auto_backup_time = datetime.now()
+        self.player_list = []
+        self.palserver_settings_path = None
+        self.option_settings_dict = {}
+        self.countdown = None  # 正在进行的倒计时 {"action": COUNTDOWN_*, "remaining": 秒}
+        self.stats = {"memory": 0, "disk": None, "backup_disk": None}  # 磁盘为 [已用, 总量]
+        self.next_stats_time = 0
+        self.next_players_time = 0
+        self.next_probe_time = 0
+
+    @property
+    def name(self):
+        return self.config.get("instance_name") or DEFAULT_NAME
+
+    @property
+    def palserver_path(self):
+        return self.config.get("palserver_path")
+
+    @property
+    def pid(self):
+        return self.config.get("palserver_pid")
+
+    def notice(self, message_type, message):
+        """输出一条提示（界面显示在控制台，后台服务写入日志）"""
+        if self.supervisor:
+            self.supervisor.emit(self, "notice", (message_type, message))
+        else:
+            logger.info(f"[{self.name}] {message}")
+
+    def record_event(self, event_type, message, **data):
+        """写入持久化事件日志，写入失败不影响操作"""
+        if self.supervisor:
+            self.supervisor.record_event(self, event_type, message, **data)
+
+    def save_config(self):
+        if self.supervisor:
+            self.supervisor.save_config()
+
+    def check_palserver_path(self):
+        """
+        检查服务端启动文件（PalServer.exe / PalServer.sh）和配置文件，并读取配置文件；路径无效时从配置中移除
+
+        返回:
+            (flag, 错误信息)
+        """
+        if "palserver_path" not in self.config:
+            return False, "请先设置好游戏路径"
+
+        palserver_path = self.config["palserver_path"]
+        if platform_paths.is_launcher(palserver_path) is False:
+            self.config.pop("palserver_path")
+            self.save_config()
+            return False, "检测到 PalServer.exe / PalServer.sh 文件不存在，请重新选择！"
+
+        launcher_name = os.path.basename(palserver_path)
+        relative_path = platform_paths.settings_relative_path(palserver_path)
+        self.palserver_settings_path = platform_paths.settings_path(palserver_path)
+        if os.path.isfile(self.palserver_settings_path) is False:
+            self.config.pop("palserver_path")
+            self.save_config()
+            return False, f"服务端路径下的 {relative_path} 配置文件不存在，请启动一次{launcher_name}，或检查服务端完整性！"
+
+        if os.stat(self.palserver_settings_path).st_size < 10:
+            self.notice("client_success", f"检测到 服务端路径下的 {relative_path} 配置文件大小不正确，正在重新初始化。")
+            settings_file_operation.default_setting(self.palserver_settings_path)
+
+        self.save_config()
+        try:
+            self.load_settings()
+        except Exception as e:
+            self.notice("client_error", f"配置文件解析出错: {str(e)}，使用空配置继续")
+            self.option_settings_dict = {}
+        return True, ""
+
+    def load_settings(self):
+        """重新读取 PalWorldSettings.ini"""
+        self.option_settings_dict = settings_file_operation.load_setting(self.palserver_settings_path)
+        return self.option_settings_dict
+
+    def save_settings(self):
+        """把 option_settings_dict 写回 PalWorldSettings.ini"""
+        new_option_settings = ','.join(f"{key}={value}" for key, value in self.option_settings_dict.items())
+        settings_file_operation.save_setting(self.palserver_settings_path, new_option_settings)
+
+    def connect(self, api_addr=None, api_port=None, api_password=None):
+        """
+        连接 REST API，密码未授权时尝试常见默认密码；成功后保存连接信息
+
+        返回:
+            (flag, 服务器信息或错误信息)
+        """
+        api_addr = api_addr if api_addr is not None else self.config["api_addr"]
+        api_port = int(api_port if api_port is not None else self.config["api_port"])
+        api_password = api_password if api_password is not None else self.config["api_password"]
+
+        # 尝试使用用户提供的密码进行认证
+        pal_rest_api = self._create_api(api_addr, api_port, api_password)
+        flag, api_result = pal_rest_api.get_server_info()
+
+        # 如果认证失败，尝试常见的默认密码
+        if flag is False and "未授权" in str(api_result):
+            self.notice("client_message", "尝试使用默认密码...")
+            for pwd in DEFAULT_PASSWORDS:
+                # 跳过用户已经尝试过的密码
+                if pwd == api_password:
+                    continue
+                pal_rest_api = self._create_api(api_addr, api_port, pwd)
+                flag, api_result = pal_rest_api.get_server_info()
+                if flag is True:
+                    api_password = pwd
+                    self.notice("client_message", f"使用默认密码 {pwd} 认证成功！")
+                    break
+
+        if flag is False:
+            self.rest_api_connect_flag = False
+            return False, api_result
+
+        self.pal_rest_api = pal_rest_api
+        self.server_version = api_result["version"] if isinstance(api_result, dict) and "version" in api_result else "Unknown"
+        self.config["api_addr"] = api_addr
+        self.config["api_port"] = api_port
+        self.config["api_password"] = api_password
+        self.save_config()
+        self.rest_api_connect_flag = True
+        return True, api_result
+
+    def _create_api(self, api_addr, api_port, api_password):
+        """按配置中的重试次数和熔断时间创建 REST API 客户端"""
+        from utils.pal_restapi import PalRestAPI, RetryPolicy, CircuitBreaker
+
+        return PalRestAPI(api_addr, api_port, "admin", api_password, name=self.name,
+                          retry_policy=RetryPolicy(int(self.config["api_retry_attempts"])),
+                          circuit_breaker=CircuitBreaker(reset_timeout=float(self.config["api_circuit_reset_time"])))
+
+    def reconnect_due(self, monotonic_now):
+        """
+        REST API 因连续失败被标记为未连接后，是否需要探测恢复
+        （熔断器允许探测时进行；从未连接过、倒计时重启中或密码错误时不探测）
+        """
+        pal_rest_api = self.pal_rest_api
+        if pal_rest_api is None or self.rest_api_connect_flag or self.countdown is not None:
+            return False
+        if pal_rest_api.health.auth_failed() or monotonic_now < self.next_probe_time:
+            return False
+        if not pal_rest_api.circuit_breaker.ready():
+            return False
+        self.next_probe_time = monotonic_now + float(self.config["api_circuit_reset_time"])
+        return True
+
+    def probe(self):
+        """
+        探测断开的 REST API，恢复后自动标记为已连接，不需要重新点击测试连接
+
+        返回:
+            (flag, 服务器信息或错误信息)
+        """
+        flag, api_result = self.pal_rest_api.get_server_info()
+        if flag:
+            self.server_version = api_result["version"] if isinstance(api_result, dict) and "version" in api_result else "Unknown"
+            self.rest_api_connect_flag = True
+        return flag, api_result
+
+    def call_api(self, method_name, *args):
+        """
+        调用 REST API；单次失败不影响连接状态，连接健康度判定断开（连续失败或密码错误）时才标记为未连接
+
+        返回:
+            (flag, 结果或错误信息)
+        """
+        if self.rest_api_connect_flag is False or self.pal_rest_api is None:
+            return False, "请先连接 REST API ！"
+        flag, api_result = getattr(self.pal_rest_api, method_name)(*args)
+        if flag is False:
+            api_result = str(api_result).replace("\n", "")
+            if self.rest_api_connect_flag and self.pal_rest_api.health.is_down():
+                self.rest_api_connect_flag = False
+                self.notice("client_error", "REST API 连续请求失败，已标记为未连接")
+        return flag, api_result
+
+    def api_health(self):
+        """
+        REST API 连接健康度（pal_restapi.ConnectionHealth.snapshot()，另含熔断器状态 circuit 和
+        距离下次探测的秒数 circuit_remaining），未连接过时返回 None
+        """
+        if self.pal_rest_api is None:
+            return None
+        health = self.pal_rest_api.health.snapshot()
+        health["circuit"] = self.pal_rest_api.circuit_breaker.state
+        health["circuit_remaining"] = self.pal_rest_api.circuit_breaker.remaining()
+        return health
+
+    def start(self, game_port=None, game_publicport=None, game_player_limit=None):
+        """
+        启动服务端，参数为空时使用配置中的值
+
+        返回:
+            (flag, 进程PID或错误信息)
+        """
+        if "palserver_path" not in self.config:
+            return False, "请先选择PalServer.exe / PalServer.sh服务端文件！"
+        game_port = game_port if game_port is not None else self.config["game_port"]
+        game_publicport = game_publicport if game_publicport is not None else self.config["game_publicport"]
+        game_player_limit = game_player_limit if game_player_limit is not None else self.config["game_player_limit"]
+        flag, message = validate_launch(game_port, game_publicport, game_player_limit)
+        if flag is False:
+            return False, message
+
+        palserver_path = self.config["palserver_path"]
+        arguments = ["-port=" + str(game_port), "-players=" + str(game_player_limit), "-publicip", "0.0.0.0", "-publicport", str(game_publicport)]
+        launch_options = self.config["launch_options_info"] if self.config["launch_options_flag"] else ""
+        try:
+            self.process = subprocess.Popen(platform_paths.launch_command(palserver_path, arguments, launch_options),
+                                            shell=False, **platform_paths.popen_options(palserver_path))
+        except (OSError, ValueError) as e:
+            return False, f"服务端启动失败: {str(e)}"
+        self.config["game_port"] = int(game_port)
+        self.config["game_publicport"] = int(game_publicport)
+        self.config["game_player_limit"] = int(game_player_limit)
+        self.config["palserver_pid"] = self.process.pid
+        self.save_config()
+        self.record_event(event_log.EVENT_START, "PalServer 服务器已启动", pid=self.process.pid)
+        metrics.SERVER_STARTS.inc(server=self.name)
+        self.server_run_flag = True
+        self.server_run_time = datetime.now()
+        return True, self.process.pid
+
+    def stop(self):
+        """通过 REST API 关闭服务端"""
+        flag, api_result = self.call_api("shutdown_server", 1, "服务器将在1秒后停止!!!")
+        if flag:
+            self.record_event(event_log.EVENT_STOP, "服务器关闭命令发送成功")
+            self.server_run_flag = False
+        return flag, api_result
+
+    def kill(self):
+        """强制结束服务端进程"""
+        self.server_run_flag = False
+        self.cancel_countdown()
+        try:
+            platform_paths.kill_tree(self.pid)
+        except (psutil.Error, OSError, TypeError) as e:
+            return False, f"强制停止失败: {str(e)}"
+        self.record_event(event_log.EVENT_KILL, "已强制停止服务端", pid=self.pid)
+        return True, ""
+
+    def begin_countdown(self, action, seconds, trigger="manual"):
+        """
+        开始倒计时广播，结束后关服（COUNTDOWN_STOP）或重启（COUNTDOWN_RESTART）；
+        由 supervisor 每秒调用 step_countdown 推进
+
+        参数:
+            trigger: 重启的触发方式，manual（手动）或 auto（定时重启），用于统计
+
+        返回:
+            (flag, 错误信息)
+        """
+        if self.rest_api_connect_flag is False:
+            return False, "请先连接 REST API ！"
+        if self.countdown is not None:
+            return False, "已有正在进行的倒计时"
+        if action == COUNTDOWN_RESTART:
+            self.server_run_flag = False
+            # 只在倒计时确实开始时记录一次（连接失败等无法重启的情况不记录）
+            self.record_event(event_log.EVENT_RESTART, "自动重启" if trigger == "auto" else "开始重启服务器",
+                              trigger=trigger, players=len(self.player_list))
+            metrics.SERVER_RESTARTS.inc(server=self.name, trigger=trigger)
+        self.countdown = {"action": action, "remaining": seconds + 1}
+        return True, ""
+
+    def cancel_countdown(self):
+        self.countdown = None
+
+    def step_countdown(self):
+        """
+        倒计时前进一秒
+
+        返回:
+            本秒需要在工作线程中执行的操作 (任务名称, 控制台显示的命令, 可调用对象, 成功提示)，无操作时返回 None
+        """
+        if self.countdown is None:
+            return None
+        self.countdown["remaining"] -= 1
+        remaining = self.countdown["remaining"]
+        action = self.countdown["action"]
+        if remaining > 0:
+            message = "服务器将在 " + str(int(remaining)) + " 秒后" + ("重启" if action == COUNTDOWN_RESTART else "关闭") + "!!!"
+            return "countdown", "广播 " + message, lambda: self._countdown_broadcast(message), "消息广播成功"
+        if action == COUNTDOWN_STOP:
+            self.countdown = None
+            return "countdown_stop", "停止 游戏服务器", self.stop, "服务器关闭命令发送成功"
+        if remaining == 0:
+            return "countdown_shutdown", "停止游戏服务器", self._countdown_shutdown, "服务器关闭命令发送成功"
+        if remaining == -RESTART_START_DELAY:
+            return "start", None, self.start, None
+        if remaining == -RESTART_CONNECT_DELAY:
+            self.countdown = None
+            return "connect", None, self.connect, None
+        return None
+
+    def _countdown_broadcast(self, message):
+        flag, api_result = self.call_api("announce_message", message)
+        if flag is False:
+            self.countdown = None
+        return flag, api_result
+
+    def _countdown_shutdown(self):
+        flag, api_result = self.call_api("shutdown_server", 1, "服务器将在0秒后重启!!!")
+        if flag is False:
+            self.countdown = None
+            return flag, api_result
+        self.server_run_flag = False
+        return flag, api_result
+
+    def check_process(self):
+        """
+        检查进程是否存活
+
+        返回:
+            True 表示检测到崩溃（之前在运行，现在进程已不存在）
+        """
+        if self.pid is None:
+            return False
+        alive = platform_paths.process_alive(self.pid, self.process)
+        if self.server_run_flag and not alive:
+            self.server_run_flag = False
+            return True
+        if not self.server_run_flag and alive and self.countdown is None:
+            self.server_run_flag = True
+        return False
+
+    def restart_due(self, now):
+        """是否满足定时重启条件"""
+        if not self.config["auto_restart_flag"] or not self.server_run_flag or self.countdown is not None:
+            return False
+        if self.server_run_time + timedelta(seconds=self.config["auto_restart_time_limit"]) >= now:
+            return False
+        if self.config["auto_restart_player_flag"]:
+            return len(self.player_list) <= self.config["auto_restart_player_limit"]
+        return True
+
+    def backup_due(self, now):
+        """是否满足定时备份条件"""
+        if not self.config["auto_backup_flag"] or "backup_dir_path" not in self.config:
+            return False
+        return self.last_auto_backup_time + timedelta(seconds=self.config["auto_backup_time_limit"]) < now
+
+    def backup(self):
+        """
+        复制存档到备份目录
+
+        返回:
+            (flag, 备份路径或错误信息)
+        """
+        if "palserver_path" not in self.config or "backup_dir_path" not in self.config:
+            return False, "请先设置服务端路径和备份目录"
+        old_dir_path = platform_paths.saved_dir(self.config["palserver_path"])
+        new_dir_path = os.path.join(self.config["backup_dir_path"], datetime.now().strftime("%Y%m%d %H-%M-%S"))
+        copied_bytes = [0]
+
+        def copy_file(src, dst):
+            # 复制时累计大小，不需要备份后再遍历一次目录
+            copied_bytes[0] += os.path.getsize(src)
+            return shutil.copy2(src, dst)
+
+        start_time = time.monotonic()
+        try:
+            shutil.copytree(old_dir_path, new_dir_path, copy_function=copy_file)
+        except (OSError, shutil.Error) as e:
+            metrics.BACKUP_RESULTS.inc(server=self.name, result="failure")
+            return False, f"存档备份失败: {str(e)}"
+        metrics.BACKUP_DURATION.observe(time.monotonic() - start_time, server=self.name)
+        metrics.BACKUP_SIZE.set(copied_bytes[0], server=self.name)
+        metrics.BACKUP_RESULTS.inc(server=self.name, result="success")
+        self.record_event(event_log.EVENT_BACKUP, "存档自动备份完成", path=os.path.abspath(new_dir_path))
+        return True, os.path.abspath(new_dir_path)
+
+    def refresh_players(self):
+        """
+        获取在线玩家列表
+
+        返回:
+            (flag, 玩家列表或错误信息)
+        """
+        flag, api_result = self.call_api("get_players")
+        if flag is False:
+            return False, api_result
+        players = api_result.get("players", []) if isinstance(api_result, dict) else []
+        self.player_list = [player for player in players if player != ""]
+        metrics.SERVER_PLAYERS.set(len(self.player_list), server=self.name)
+        return True, self.player_list
+
+    def sample_stats(self):
+        """采集进程内存和磁盘占用，结果保存在 stats 中"""
+        memory = 0
+        if self.server_run_flag and self.pid:
+            try:
+                for proc in psutil.Process(self.pid).children(recursive=True):
+                    memory += proc.memory_full_info().rss
+            except psutil.Error:
+                pass
+        stats = {"memory": memory, "disk": None, "backup_disk": None}
+        for key, path_key in (("disk", "palserver_path"), ("backup_disk", "backup_dir_path")):
+            if path_key in self.config:
+                try:
+                    disk_usage = shutil.disk_usage(platform_paths.server_dir(self.config[path_key]))
+                    stats[key] = [disk_usage.used, disk_usage.total]
+                except OSError:
+                    pass
+        self.stats = stats
+        metrics.SERVER_UP.set(int(self.server_run_flag), server=self.name)
+        metrics.SERVER_REST_API_CONNECTED.set(int(self.rest_api_connect_flag), server=self.name)
+        metrics.SERVER_MEMORY.set(memory, server=self.name)
+        for key, volume in (("disk", "server"), ("backup_disk", "backup")):
+            if stats[key] is not None:
+                metrics.SERVER_DISK_USED.set(stats[key][0], server=self.name, volume=volume)
+                metrics.SERVER_DISK_TOTAL.set(stats[key][1], server=self.name, volume=volume)
+        return stats
+
+    def status(self):
+        """实例状态（可直接转为JSON，供后台服务的控制接口使用）"""
+        return {
+            "name": self.name,
+            "config": {key: value for key, value in self.config.items() if key not in GLOBAL_CONFIG_KEYS},
+            "pid": self.pid,
+            "server_run_flag": self.server_run_flag,
+            "rest_api_connect_flag": self.rest_api_connect_flag,
+            "rest_api_health": self.api_health(),
+            "server_version": self.server_version,
+            "player_list": self.player_list,
+            "countdown": self.countdown,
+            "stats": self.stats,
+        }
@@ -0,0 +1,348 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import time
+import logging
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+from utils import json_operation, event_log, metrics, player_moderation
+from utils.server_instance import ServerInstance, DEFAULT_NAME, COUNTDOWN_RESTART
+
+"""
+    模块功能：
+    在同一进程中管理多个游戏服务端（ServerInstance）
+    1. 所有实例共用一个线程池和一个调度入口 tick()（由界面的1秒定时器或后台服务的循环调用），
+       不为每个服务器单独创建定时器和线程，12个服务器的开销与1个服务器接近
+    2. tick() 本身只做进程存活检查和时间判断；REST API 调用、备份、资源采集都提交到线程池，
+       同一实例的同类任务未完成时不会重复提交
+    3. 各实例的玩家列表轮询时间错开，避免同一秒集中请求
+    4. 系统 CPU/内存每个周期只采集一次，所有实例共用；采集结果同时写入 metrics，/metrics 抓取时不再采集
+    5. 结果通过监听器 listener(instance, event, data) 通知，在工作线程中回调；event 为：
+       notice（data=(消息类型, 消息)）、players（玩家列表）、connected（连接结果 (flag, 结果)）、
+       servers（服务器增删或改名，instance 为 None）
+    6. REST API 因连续失败断开后，熔断器允许探测时自动探测，恢复后重新标记为已连接
+"""
+
+logger = logging.getLogger(__name__)
+
+STATS_INTERVAL = 5  # 资源采集间隔(秒)
+PLAYERS_INTERVAL = 60  # 玩家列表轮询间隔(秒)
+DEFAULT_WORKERS = 4  # 共用线程池大小
+
+
+class ServerSupervisor:
+    def __init__(self, config, config_path=None, max_workers=DEFAULT_WORKERS, log=None):
+        """
+        参数:
+            config: config.json 的内容；顶层为第一个服务器，servers 列表为其余服务器
+            config_path: 保存配置的路径，为空时不保存
+            max_workers: 共用线程池大小
+            log: event_log.EventLog，为空时不记录事件
+        """
+        self.config = config
+        self.config_path = config_path
+        self.event_log = log
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pal-server")
+        self.lock = threading.RLock()
+        self.listeners = []
+        self.running_tasks = set()  # (id(实例), 任务名称)
+        self.system_stats = {"cpu": 0.0, "memory_used": 0, "memory_total": 0}
+        self.next_system_stats_time = 0
+        self.instances = [ServerInstance(config, self)]
+        for server_config in config.setdefault("servers", []):
+            self.instances.append(ServerInstance(server_config, self))
+        self._stagger_polls()
+
+    def _stagger_polls(self):
+        """错开各实例的玩家列表轮询时间"""
+        now = time.monotonic()
+        count = len(self.instances)
+        for index, instance in enumerate(self.instances):
+            instance.next_players_time = now + PLAYERS_INTERVAL * index / count
+            instance.next_stats_time = now
+
+    def get(self, name):
+        for instance in self.instances:
+            if instance.name == name:
+                return instance
+        return None
+
+    def add_instance(self, name):
+        """
+        新增一个服务器（使用默认配置）
+
+        返回:
+            (flag, ServerInstance 或错误信息)
+        """
+        name = name.strip()
+        if not name:
+            return False, "服务器名称不能为空"
+        if self.get(name) or name == DEFAULT_NAME:
+            return False, f"服务器名称已存在: {name}"
+        server_config = {"instance_name": name}
+        with self.lock:
+            self.config["servers"].append(server_config)
+            instance = ServerInstance(server_config, self)
+            self.instances.append(instance)
+        self._stagger_polls()
+        self.save_config()
+        self.emit(None, "servers")
+        return True, instance
+
+    def rename_instance(self, instance, name):
+        name = name.strip()
+        if not name:
+            return False, "服务器名称不能为空"
+        other = self.get(name)
+        if other is not None and other is not instance:
+            return False, f"服务器名称已存在: {name}"
+        metrics.REGISTRY.remove_series(server=instance.name)
+        instance.config["instance_name"] = name
+        if instance.pal_rest_api is not None:
+            instance.pal_rest_api.name = name
+        self.save_config()
+        self.emit(None, "servers")
+        return True, instance
+
+    def remove_instance(self, instance):
+        """移除服务器（第一个服务器使用顶层配置，不能移除）"""
+        if instance is self.instances[0]:
+            return False, "不能删除第一个服务器"
+        with self.lock:
+            self.instances.remove(instance)
+            self.config["servers"].remove(instance.config)
+        metrics.REGISTRY.remove_series(server=instance.name)
+        self.save_config()
+        self.emit(None, "servers")
+        return True, ""
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def emit(self, instance, event, data=None):
+        for listener in list(self.listeners):
+            try:
+                listener(instance, event, data)
+            except Exception as e:
+                logger.error(f"服务器事件处理失败: {e}")
+
+    def record_event(self, instance, event_type, message, **data):
+        if self.event_log is None:
+            return
+        try:
+            self.event_log.record(event_type, message, server=instance.name, **data)
+        except Exception as e:
+            logger.warning(f"事件日志写入失败: {e}")
+
+    def save_config(self):
+        if not self.config_path:
+            return
+        with self.lock:
+            json_operation.save_json(self.config_path, self.config)
+
+    def submit(self, instance, task_name, function, callback=None):
+        """
+        在共用线程池中执行任务；同一实例的同名任务还在执行时不重复提交
+
+        参数:
+            instance: 所属实例，全局任务为 None
+            function: 无参数的可调用对象
+            callback: callback(结果)，在工作线程中调用
+
+        返回:
+            是否已提交
+        """
+        key = (id(instance), task_name)
+        with self.lock:
+            if key in self.running_tasks:
+                return False
+            self.running_tasks.add(key)
+
+        def run():
+            try:
+                result = function()
+                if callback:
+                    callback(result)
+            except Exception as e:
+                logger.exception(f"任务 {task_name} 执行失败")
+                if instance is not None:
+                    instance.notice("client_error", f"{task_name} 执行失败: {str(e)}")
+            finally:
+                with self.lock:
+                    self.running_tasks.discard(key)
+
+        self.executor.submit(run)
+        return True
+
+    def tick(self, now=None):
+        """调度入口，每秒调用一次"""
+        now = now or datetime.now()
+        monotonic_now = time.monotonic()
+        if monotonic_now >= self.next_system_stats_time:
+            self.next_system_stats_time = monotonic_now + STATS_INTERVAL
+            self.submit(None, "system_stats", self.sample_system_stats)
+        for instance in list(self.instances):
+            self._tick_instance(instance, now, monotonic_now)
+
+    def _tick_instance(self, instance, now, monotonic_now):
+        if instance.check_process() and instance.config["crash_detection_flag"]:
+            instance.notice("client_error", "检测到服务端崩溃，开始重启 ！")
+            instance.record_event(event_log.EVENT_CRASH, "检测到服务端崩溃，开始重启", pid=instance.pid)
+            metrics.SERVER_CRASHES.inc(server=instance.name)
+            self.submit(instance, "start", instance.start, lambda result: self._report_start(instance, result))
+
+        step = instance.step_countdown()
+        if step is not None:
+            task_name, command, function, success_message = step
+            if command:
+                instance.notice("client_command", command)
+            self.submit(instance, task_name, function,
+                        lambda result: self._report_countdown(instance, function, success_message, result))
+
+        if instance.restart_due(now):
+            instance.notice("client_message", "检测到符合服务器自动重启条件，开始重启！")
+            flag, message = instance.begin_countdown(COUNTDOWN_RESTART, 10, trigger="auto")
+            if flag is False:
+                # 未连接 REST API 时推迟到下一个周期，避免每秒重复提示
+                instance.server_run_time = now
+                instance.notice("client_error", message)
+
+        if instance.backup_due(now):
+            instance.last_auto_backup_time = now
+            instance.notice("client_message", "检测到符合服务器自动备份标准，开始备份！")
+            self.backup(instance)
+
+        if monotonic_now >= instance.next_stats_time:
+            instance.next_stats_time = monotonic_now + STATS_INTERVAL
+            self.submit(instance, "stats", instance.sample_stats)
+
+        if instance.reconnect_due(monotonic_now):
+            self.submit(instance, "probe", instance.probe, lambda result: self._report_probe(instance, result))
+
+        if monotonic_now >= instance.next_players_time:
+            instance.next_players_time = monotonic_now + PLAYERS_INTERVAL
+            if instance.rest_api_connect_flag:
+                self.poll_players(instance)
+
+    def perform(self, instance, task_name, function, success_message=None, callback=None, message_type="server_success"):
+        """
+        在工作线程中执行一次界面发起的操作（启动、停止、REST API 调用等），界面线程不等待；
+        失败时以 client_error 提示，成功时提示 success_message
+
+        参数:
+            function: 无参数的可调用对象，返回 (flag, 结果)
+            success_message: 成功提示，可以是字符串或 success_message(结果)；为 None 时不提示
+            callback: callback(结果)，成功时在工作线程中调用（例如写入事件日志）
+            message_type: 成功提示的消息类型
+
+        返回:
+            是否已提交（同一实例的同名操作还未完成时不重复提交）
+        """
+        def report(result):
+            flag, message = result
+            if flag is False:
+                instance.notice("client_error", str(message))
+                return
+            if success_message is not None:
+                instance.notice(message_type, success_message(message) if callable(success_message) else success_message)
+            if callback is not None:
+                callback(message)
+        return self.submit(instance, task_name, function, report)
+
+    def poll_players(self, instance):
+        """立即刷新一次玩家列表"""
+        return self.submit(instance, "players", instance.refresh_players, lambda result: self._report_players(instance, result))
+
+    def backup(self, instance):
+        """在工作线程中备份存档，结果以控制台消息通知"""
+        return self.submit(instance, "backup", instance.backup, lambda result: self._report_backup(instance, result))
+
+    def connect(self, instance, api_addr=None, api_port=None, api_password=None):
+        """在工作线程中连接 REST API，结果以 connected 事件通知"""
+        def connect():
+            return instance.connect(api_addr, api_port, api_password)
+        return self.submit(instance, "connect", connect, lambda result: self._report_connect(instance, result))
+
+    def moderate(self, instance, action, players):
+        """
+        在工作线程中批量踢出/封禁/解封（有限并发），全部完成后只刷新一次玩家列表
+
+        参数:
+            action: player_moderation.ACTION_KICK / ACTION_BAN / ACTION_UNBAN
+            players: [(玩家ID, 名称), ...]
+        """
+        def moderate():
+            return player_moderation.run_batch(instance, action, players)
+        return self.submit(instance, "moderation", moderate, lambda result: self._report_moderation(instance, action, result))
+
+    def _report_start(self, instance, result):
+        flag, pid = result
+        if flag:
+            instance.notice("client_success", "PalServer 服务器已启动，获取到进程PID：" + str(pid))
+        else:
+            instance.notice("client_error", pid)
+
+    def _report_countdown(self, instance, function, success_message, result):
+        if function == instance.start:
+            self._report_start(instance, result)
+        elif function == instance.connect:
+            self._report_connect(instance, result)
+        elif result[0] is False:
+            instance.notice("client_error", str(result[1]))
+        else:
+            instance.notice("server_success", success_message)
+
+    def _report_backup(self, instance, result):
+        flag, path = result
+        if flag:
+            instance.notice("client_success", "存档自动备份完成！备份路径：" + str(path))
+        else:
+            instance.notice("client_error", path)
+
+    def _report_moderation(self, instance, action, results):
+        title = player_moderation.ACTIONS[action][2]
+        for user_id, name, flag, message in results:
+            if flag is False:
+                label = f"{user_id}（{name}）" if name else user_id
+                instance.notice("client_error", f"{title}玩家 {label} 失败: {message}")
+        summary = player_moderation.summarize(action, results)
+        instance.notice("server_success" if all(flag for _, _, flag, _ in results) else "client_error", summary)
+        self.poll_players(instance)
+
+    def _report_players(self, instance, result):
+        flag, api_result = result
+        if flag is False:
+            instance.notice("client_error", api_result)
+        self.emit(instance, "players", instance.player_list)
+
+    def _report_connect(self, instance, result):
+        flag, api_result = result
+        if flag is False:
+            instance.notice("client_error", str(api_result).replace("\n", ""))
+        else:
+            instance.notice("client_success", "REST API 服务器连接成功")
+            self.poll_players(instance)
+        self.emit(instance, "connected", result)
+
+    def _report_probe(self, instance, result):
+        """探测失败时不提示（熔断期间每隔一段时间探测一次），恢复时与连接成功相同处理"""
+        flag, api_result = result
+        if flag:
+            instance.notice("client_success", "REST API 已自动恢复连接")
+            self.poll_players(instance)
+            self.emit(instance, "connected", result)
+
+    def sample_system_stats(self):
+        """系统 CPU/内存，所有实例共用一次采集"""
+        memory = psutil.virtual_memory()
+        self.system_stats = {"cpu": psutil.cpu_percent(interval=0), "memory_used": memory.used, "memory_total": memory.total}
+        metrics.SYSTEM_CPU.set(self.system_stats["cpu"])
+        metrics.SYSTEM_MEMORY_USED.set(memory.used)
+        metrics.SYSTEM_MEMORY_TOTAL.set(memory.total)
+        return self.system_stats
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
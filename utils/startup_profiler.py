@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import sys
+import json
+import time
+import subprocess
+from datetime import datetime
+
+"""
+    模块功能：
+    启动耗时分析（python main.py --profile-startup）
+    1. 以 -X importtime 重新启动一次主程序，统计每个模块的导入耗时
+    2. 子进程在主窗口第一次绘制时输出首帧耗时并立即退出
+    3. 首帧耗时追加记录到 startup_profile.json，便于发现启动时间回退
+"""
+
+PROFILE_FLAG = "--profile-startup"
+CHILD_ENV = "PAL_STARTUP_PROFILE_CHILD"
+FIRST_PAINT_PREFIX = "STARTUP_FIRST_PAINT_MS="
+TOP_MODULES = 25  # 报告中显示的模块数量
+
+
+def is_child():
+    """当前进程是否为分析子进程"""
+    return os.environ.get(CHILD_ENV) == "1"
+
+
+def watch_first_paint(widget, start_time, callback):
+    """
+    监听窗口的第一次绘制事件
+
+    参数:
+        widget: 需要监听的窗口
+        start_time: 进程启动时记录的 time.perf_counter()
+        callback: 首次绘制时调用，参数为耗时(毫秒)
+    """
+    from PyQt5.QtCore import QObject, QEvent
+
+    class _FirstPaintFilter(QObject):
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Paint:
+                obj.removeEventFilter(self)
+                callback((time.perf_counter() - start_time) * 1000)
+            return False
+
+    paint_filter = _FirstPaintFilter(widget)
+    widget.installEventFilter(paint_filter)
+    return paint_filter
+
+
+def report_first_paint(elapsed_ms):
+    """子进程输出首帧耗时，供父进程解析"""
+    print(f"{FIRST_PAINT_PREFIX}{elapsed_ms:.1f}", flush=True)
+
+
+def parse_importtime(stderr_text):
+    """
+    解析 -X importtime 的输出
+
+    返回:
+        [(模块名, 自身耗时us, 累计耗时us, 嵌套深度), ...]，深度 0 为顶层导入（不是被其他模块导入的）
+    """
+    results = []
+    for line in stderr_text.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # 表头行
+        # 模块名前的缩进表示被哪个模块导入：每层两个空格（分隔符后固定有一个空格）
+        depth = (len(parts[2]) - len(parts[2].lstrip(" ")) - 1) // 2
+        results.append((parts[2].strip(), int(parts[0]), int(parts[1]), depth))
+    return results
+
+
+def run_profile(script_path, record_path):
+    """
+    以分析模式启动子进程并输出报告
+
+    参数:
+        script_path: 主程序入口 main.py 的路径
+        record_path: 首帧耗时记录文件路径
+
+    返回:
+        子进程退出码
+    """
+    env = dict(os.environ, **{CHILD_ENV: "1"})
+    if getattr(sys, "frozen", False):
+        # 打包后的程序无法使用 -X importtime，只统计首帧耗时
+        command = [sys.executable]
+    else:
+        command = [sys.executable, "-X", "importtime", script_path]
+    process = subprocess.run(command, env=env, capture_output=True, text=True, encoding="utf-8", errors="replace")
+
+    first_paint_ms = None
+    for line in process.stdout.splitlines():
+        if line.startswith(FIRST_PAINT_PREFIX):
+            first_paint_ms = float(line[len(FIRST_PAINT_PREFIX):])
+
+    imports = parse_importtime(process.stderr)
+    # 只统计顶层导入的累计耗时：被其他模块导入的模块（包括 requests、psutil 等不带点的模块）已计入上层的累计耗时
+    total_import_us = sum(item[2] for item in imports if item[3] == 0)
+
+    print("模块导入耗时（按累计耗时排序）：")
+    print(f"{'self(ms)':>10} {'cumulative(ms)':>15}  module")
+    for name, self_us, cumulative_us, _ in sorted(imports, key=lambda item: item[2], reverse=True)[:TOP_MODULES]:
+        print(f"{self_us / 1000:>10.1f} {cumulative_us / 1000:>15.1f}  {name}")
+    print(f"\n导入总耗时: {total_import_us / 1000:.1f} ms")
+
+    if first_paint_ms is None:
+        print("未获取到首帧耗时，子进程输出：")
+        print(process.stderr[-2000:])
+        return process.returncode or 1
+
+    history = load_records(record_path)
+    print(f"首帧耗时: {first_paint_ms:.1f} ms")
+    if history:
+        recent = sorted(record["first_paint_ms"] for record in history[-10:])
+        median = recent[len(recent) // 2]
+        print(f"最近 {len(recent)} 次首帧耗时中位数: {median:.1f} ms，本次变化: {first_paint_ms - median:+.1f} ms")
+
+    save_record(record_path, {
+        "time": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "first_paint_ms": round(first_paint_ms, 1),
+        "import_ms": round(total_import_us / 1000, 1),
+    })
+    return 0
+
+
+def load_records(record_path):
+    """读取历史首帧耗时记录"""
+    records = []
+    if not os.path.isfile(record_path):
+        return records
+    with open(record_path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+    return records
+
+
+def save_record(record_path, record):
+    """追加一条首帧耗时记录（JSON Lines）"""
+    with open(record_path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record, ensure_ascii=False) + "\n")
@@ -0,0 +1,379 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import re
+import json
+import time
+import hashlib
+import zipfile
+
+from utils import mod_installer
+
+"""
+    模块功能：
+    UE4SS组件管理（安装、升级、卸载）
+    1. 安装时在服务端根目录记录UE4SS的版本和每个文件的SHA256（.pal_ue4ss.json）
+    2. 升级时只写入内容有变化的文件；新版本中已不存在的文件，未被修改时删除
+    3. 用户修改过的配置文件（UE4SS-settings.ini、mods.txt 等）做三方合并：
+       以安装时的版本为基准，保留用户修改的配置项，同时加入新版本的配置项；双方都修改的配置项保留用户的值
+    4. 卸载时只删除记录中且未被修改的文件，用户修改过的配置文件保留
+    5. 全部修改通过 mod_installer.InstallTransaction 一次提交，失败时回滚
+"""
+
+STATE_NAME = ".pal_ue4ss.json"
+INSTALL_LOCATION = os.path.join("Pal", "Binaries", "Win64")
+PROXY_DLLS = ("dwmapi.dll", "xinput1_3.dll")  # UE4SS的加载入口
+CORE_DLL_PATHS = ("UE4SS.dll", "ue4ss/UE4SS.dll")  # 旧版本在 Win64 下，3.x 在 Win64/ue4ss 下
+CONFIG_EXTENSIONS = (".ini", ".txt", ".json", ".cfg", ".toml")  # 用户可能修改、需要合并的配置文件
+VERSION_FILES = ("version.txt", "VERSION")
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def _sha256_bytes(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def is_config_file(relative_path):
+    return relative_path.lower().endswith(CONFIG_EXTENSIONS)
+
+
+def _parse_config(text):
+    """
+    按行解析 ini / mods.txt 格式的配置
+
+    返回:
+        [(键 或 None, 原始行)]，键为 (所在节, 配置项名称)，节标题的键为 (节, None)
+    """
+    entries = []
+    section = ""
+    for line in text.splitlines(keepends=True):
+        stripped = line.strip()
+        if stripped.startswith("[") and stripped.endswith("]"):
+            section = stripped
+            entries.append(((section, None), line))
+            continue
+        if not stripped or stripped[0] in ";#" or stripped.startswith("//"):
+            entries.append((None, line))
+            continue
+        # ini 使用 "键 = 值"，mods.txt 使用 "MOD名称 : 1"
+        positions = [position for position in (stripped.find("="), stripped.find(":")) if position > 0]
+        if not positions:
+            entries.append((None, line))
+            continue
+        entries.append(((section, stripped[:min(positions)].strip()), line))
+    return entries
+
+
+def merge_config(base, ours, theirs):
+    """
+    三方合并配置文件（按配置项合并，注释和顺序以新版本为准）
+
+    参数:
+        base: 上次安装的版本
+        ours: 磁盘上的文件（可能被用户修改）
+        theirs: 新版本
+
+    返回:
+        (合并后的文本, 双方都修改的配置项列表)
+    """
+    base_values = {key: line.strip() for key, line in _parse_config(base) if key and key[1]}
+    ours_entries = _parse_config(ours)
+    ours_lines = {key: line for key, line in ours_entries if key and key[1]}
+    theirs_keys = {key for key, _ in _parse_config(theirs) if key}
+
+    merged = []
+    conflicts = []
+    section_end = {}  # 节 -> 合并结果中该节最后一行的位置
+    section = ""
+    for key, line in _parse_config(theirs):
+        if key and key[1] is None:
+            section = key[0]
+        elif key:
+            base_value = base_values.get(key)
+            ours_line = ours_lines.get(key)
+            if ours_line is None:
+                if base_value is not None and base_value == line.strip():
+                    continue  # 用户删除了未变化的配置项
+                if base_value is not None:
+                    conflicts.append(key[1])  # 用户删除、新版本修改：使用新版本
+            elif ours_line.strip() != base_value and ours_line.strip() != line.strip():
+                if base_value is not None and base_value != line.strip():
+                    conflicts.append(key[1])  # 双方都修改：保留用户的值
+                line = ours_line if ours_line.endswith(("\n", "\r")) or not line.endswith(("\n", "\r")) else ours_line + "\n"
+        merged.append(line)
+        section_end[section] = len(merged)
+
+    # 用户新增的配置项（基准和新版本中都没有），放到所在节的末尾
+    added = {}
+    section = ""
+    for key, line in ours_entries:
+        if key and key[1] is None:
+            section = key[0]
+        elif key and key not in base_values and key not in theirs_keys:
+            added.setdefault(section, []).append(line if line.endswith(("\n", "\r")) else line + "\n")
+    for section in sorted(added, key=lambda name: -section_end.get(name, len(merged) + 1)):
+        if section in section_end:
+            position = section_end[section]
+            merged[position:position] = added[section]
+        else:
+            if merged and not merged[-1].endswith(("\n", "\r")):
+                merged[-1] += "\n"
+            merged.extend(([section + "\n"] if section else []) + added[section])
+    return "".join(merged), conflicts
+
+
+def package_info(zip_path):
+    """
+    读取UE4SS压缩包的版本和文件
+
+    返回:
+        (版本, 压缩包SHA256)；压缩包中没有版本文件、文件名中也没有版本号时，版本为SHA256前12位
+    """
+    package_sha256 = _file_sha256(zip_path)
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for info in zip_ref.infolist():
+            if os.path.basename(info.filename) in VERSION_FILES:
+                version = zip_ref.read(info).decode("utf-8", "ignore").strip().splitlines()
+                if version:
+                    return version[0].strip(), package_sha256
+    match = re.search(r"v?(\d+(?:\.\d+)+)", os.path.basename(zip_path))
+    return (match.group(1) if match else package_sha256[:12]), package_sha256
+
+
+class UE4SSManager:
+    def __init__(self, game_path):
+        """
+        参数:
+            game_path: 服务端根目录
+        """
+        self.game_path = os.path.abspath(game_path)
+        self.install_dir = os.path.join(self.game_path, INSTALL_LOCATION)
+        self.state_path = os.path.join(self.game_path, STATE_NAME)
+        # {"version", "package_sha256", "installed_at",
+        #  "files": {相对路径: [大小, SHA256]}, "base": {配置文件相对路径: 安装时的内容}}
+        self.state = None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _path(self, relative_path):
+        return os.path.join(self.install_dir, *relative_path.split("/"))
+
+    @property
+    def version(self):
+        return self.state.get("version") if self.state else None
+
+    def is_installed(self):
+        """
+        UE4SS是否完整安装：有安装记录时记录中的文件都存在；
+        没有记录（旧版本直接解压安装）时，加载入口和 UE4SS.dll 都存在
+        """
+        if self.state:
+            return all(os.path.exists(self._path(relative_path)) for relative_path in self.state["files"])
+        return (any(os.path.exists(os.path.join(self.install_dir, name)) for name in PROXY_DLLS) and
+                any(os.path.exists(self._path(relative_path)) for relative_path in CORE_DLL_PATHS))
+
+    def status(self):
+        """
+        返回:
+            {"installed", "managed": 是否有安装记录, "version", "missing": [丢失的文件]}
+        """
+        missing = []
+        if self.state:
+            missing = [relative_path for relative_path in self.state["files"] if not os.path.exists(self._path(relative_path))]
+        return {"installed": self.is_installed(), "managed": self.state is not None,
+                "version": self.version, "missing": missing}
+
+    def _modified(self, relative_path, recorded):
+        """磁盘上的文件是否与记录不同（大小不同时不计算哈希）；文件不存在时返回 None"""
+        path = self._path(relative_path)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return None
+        return size != recorded[0] or _file_sha256(path) != recorded[1]
+
+    def verify(self):
+        """
+        检查记录中的文件
+
+        返回:
+            {"missing": [...], "modified": [...]}
+        """
+        result = {"missing": [], "modified": []}
+        for relative_path, recorded in (self.state or {}).get("files", {}).items():
+            modified = self._modified(relative_path, recorded)
+            if modified is None:
+                result["missing"].append(relative_path)
+            elif modified:
+                result["modified"].append(relative_path)
+        return result
+
+    def _write_state(self, transaction, state):
+        transaction.stage_bytes(json.dumps(state, ensure_ascii=False, indent=1).encode("utf-8"), self.state_path)
+
+    def install(self, zip_path):
+        """
+        安装或升级UE4SS，只写入内容有变化的文件
+
+        返回:
+            (success, 结果 {"version", "previous_version", "written", "merged", "conflicts", "kept", "removed", "unchanged"} 或错误信息)
+        """
+        if not os.path.exists(zip_path):
+            return False, "未找到UE4SS.zip文件，请确保Resource目录下存在该文件"
+        try:
+            version, package_sha256 = package_info(zip_path)
+        except (OSError, zipfile.BadZipFile) as e:
+            return False, f"读取UE4SS压缩包失败: {e}"
+
+        old_files = (self.state or {}).get("files", {})
+        old_base = (self.state or {}).get("base", {})
+        result = {"version": version, "previous_version": self.version, "written": [], "merged": [],
+                  "conflicts": {}, "kept": [], "removed": [], "unchanged": 0}
+        state = {"version": version, "package_sha256": package_sha256, "installed_at": time.time(), "files": {}, "base": {}}
+
+        transaction = mod_installer.InstallTransaction(self.game_path)
+        try:
+            with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                for info in zip_ref.infolist():
+                    if info.is_dir():
+                        continue
+                    target = mod_installer.safe_member_path(self.install_dir, info.filename)
+                    relative_path = os.path.relpath(target, self.install_dir).replace(os.sep, "/")
+                    if os.path.basename(relative_path) in VERSION_FILES:
+                        continue
+                    data = zip_ref.read(info)
+                    new_hash = _sha256_bytes(data)
+                    state["files"][relative_path] = [len(data), new_hash]
+                    if is_config_file(relative_path):
+                        state["base"][relative_path] = data.decode("utf-8", "replace")
+                    self._plan_file(transaction, relative_path, data, new_hash, old_files.get(relative_path),
+                                    old_base.get(relative_path), state, result)
+
+            # 新版本中已不存在的文件：未被修改时删除
+            for relative_path, recorded in old_files.items():
+                if relative_path in state["files"]:
+                    continue
+                modified = self._modified(relative_path, recorded)
+                if modified is None:
+                    continue
+                if modified and is_config_file(relative_path):
+                    result["kept"].append(relative_path)
+                else:
+                    transaction.remove(self._path(relative_path))
+                    result["removed"].append(relative_path)
+
+            self._write_state(transaction, state)
+            transaction.commit()
+        except Exception as e:
+            if os.path.isdir(transaction.txn_dir):
+                transaction.abort()
+            return False, f"UE4SS安装失败，已恢复到安装前的状态: {e}"
+        self.state = state
+        return True, result
+
+    def _plan_file(self, transaction, relative_path, data, new_hash, recorded, base_text, state, result):
+        """比较新版本、安装记录和磁盘上的文件，决定是否写入、合并或保留"""
+        path = self._path(relative_path)
+        try:
+            with open(path, "rb") as f:
+                disk_data = f.read()
+        except OSError:
+            disk_data = None
+        if disk_data is not None and _sha256_bytes(disk_data) == new_hash:
+            result["unchanged"] += 1
+            return
+        user_modified = disk_data is not None and (recorded is None or _sha256_bytes(disk_data) != recorded[1])
+        if disk_data is None or not user_modified:
+            transaction.stage_bytes(data, path)
+            result["written"].append(relative_path)
+            return
+
+        if not is_config_file(relative_path):
+            # 程序文件以新版本为准
+            transaction.stage_bytes(data, path)
+            result["written"].append(relative_path)
+            return
+        if recorded is not None and recorded[1] == new_hash:
+            # 新版本没有修改该配置文件，保留用户的修改
+            result["kept"].append(relative_path)
+            return
+        if base_text is None:
+            # 没有安装记录（旧版本直接解压安装）：无法区分用户修改，保留磁盘上的文件
+            result["kept"].append(relative_path)
+            return
+        try:
+            ours = disk_data.decode("utf-8")
+            theirs = data.decode("utf-8")
+        except UnicodeDecodeError:
+            result["kept"].append(relative_path)
+            return
+        merged, conflicts = merge_config(base_text, ours, theirs)
+        if merged != ours:
+            transaction.stage_bytes(merged.encode("utf-8"), path)
+        result["merged"].append(relative_path)
+        if conflicts:
+            result["conflicts"][relative_path] = conflicts
+
+    def uninstall(self):
+        """
+        卸载UE4SS：删除记录中未被修改的文件，用户修改过的配置文件保留
+
+        返回:
+            (success, {"removed", "kept"} 或错误信息)
+        """
+        if not self.state:
+            return False, "没有UE4SS的安装记录，无法安全卸载"
+        result = {"removed": [], "kept": []}
+        transaction = mod_installer.InstallTransaction(self.game_path)
+        try:
+            for relative_path, recorded in self.state["files"].items():
+                modified = self._modified(relative_path, recorded)
+                if modified is None:
+                    continue
+                if modified and is_config_file(relative_path):
+                    result["kept"].append(relative_path)
+                else:
+                    transaction.remove(self._path(relative_path))
+                    result["removed"].append(relative_path)
+            transaction.remove(self.state_path)
+            transaction.commit()
+        except Exception as e:
+            if os.path.isdir(transaction.txn_dir):
+                transaction.abort()
+            return False, f"UE4SS卸载失败，已恢复到卸载前的状态: {e}"
+        self.state = None
+        return True, result
+
+
+def describe_result(result):
+    """安装/卸载结果的说明文字"""
+    lines = []
+    if "version" in result:
+        if result["previous_version"] and result["previous_version"] != result["version"]:
+            lines.append(f"UE4SS {result['previous_version']} 已升级到 {result['version']}")
+        else:
+            lines.append(f"UE4SS {result['version']}")
+        if not result["written"] and not result["removed"] and not result["merged"]:
+            lines.append("所有文件均为最新，无需修改")
+        else:
+            lines.append(f"写入 {len(result['written'])} 个文件，{result['unchanged']} 个文件未变化")
+    if result["removed"]:
+        lines.append(f"删除 {len(result['removed'])} 个文件")
+    if result.get("merged"):
+        lines.append(f"合并配置文件: {', '.join(result['merged'])}")
+    for relative_path, keys in result.get("conflicts", {}).items():
+        lines.append(f"{relative_path} 中以下配置项与新版本都有修改，已保留当前的值: {', '.join(keys)}")
+    if result["kept"]:
+        lines.append(f"保留已修改的文件: {', '.join(result['kept'])}")
+    return "\n".join(lines)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+# -*- coding:utf-8 -*-
+import os
+import sys
+import hashlib
+import importlib.util
+
+"""
+    模块功能：
+    加载界面文件（.ui）
+    1. 优先使用预编译的界面类（ui/generated/ui_<名称>.py），免去运行时解析XML
+    2. 预编译文件不存在或与 .ui 内容不一致时，回退到 loadUi，并尝试重新生成缓存
+    3. python -m utils.ui_loader 可一次性生成全部界面类（打包发布前执行）
+"""
+
+UI_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "ui")
+GENERATED_DIR = os.path.join(UI_DIR, "generated")
+HASH_HEADER = "# UI_SOURCE_HASH: "
+
+# 已加载的界面类，同一进程内重复打开窗口（如MOD管理器）时无需再次读取
+_ui_classes = {}
+
+
+def source_hash(ui_path):
+    """计算 .ui 文件内容的哈希值，用于判断预编译文件是否过期"""
+    with open(ui_path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def generated_path(ui_name):
+    """预编译界面类的文件路径"""
+    return os.path.join(GENERATED_DIR, f"ui_{ui_name}.py")
+
+
+def compile_ui(ui_name):
+    """
+    将 ui/<名称>.ui 编译为 Python 界面类
+
+    返回:
+        生成文件的路径
+    """
+    from PyQt5 import uic
+
+    ui_path = os.path.join(UI_DIR, f"{ui_name}.ui")
+    target_path = generated_path(ui_name)
+    os.makedirs(GENERATED_DIR, exist_ok=True)
+    temp_path = target_path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(HASH_HEADER + source_hash(ui_path) + "\n")
+        uic.compileUi(ui_path, f)
+    os.replace(temp_path, target_path)
+    return target_path
+
+
+def compile_all():
+    """编译 ui 目录下的全部界面文件"""
+    compiled = []
+    for file_name in sorted(os.listdir(UI_DIR)):
+        if file_name.endswith(".ui"):
+            compiled.append(compile_ui(file_name[:-3]))
+    return compiled
+
+
+def _load_generated(ui_name, ui_path):
+    """读取预编译界面类，过期或不存在时返回 None"""
+    target_path = generated_path(ui_name)
+    if not os.path.isfile(target_path):
+        return None
+    with open(target_path, "r", encoding="utf-8") as f:
+        header = f.readline().strip()
+    if header != HASH_HEADER + source_hash(ui_path):
+        return None
+
+    spec = importlib.util.spec_from_file_location(f"ui_generated_{ui_name}", target_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    for name, value in vars(module).items():
+        if name.startswith("Ui_") and isinstance(value, type):
+            return value
+    return None
+
+
+def load_ui(ui_name, widget):
+    """
+    将界面加载到窗口对象上，效果与 loadUi(ui_path, widget) 相同
+
+    参数:
+        ui_name: ui 目录下的文件名（不含扩展名），如 "main"
+        widget: 需要构建界面的窗口对象
+    """
+    ui_path = os.path.join(UI_DIR, f"{ui_name}.ui")
+    ui_class = _ui_classes.get(ui_name)
+    if ui_class is None:
+        try:
+            ui_class = _load_generated(ui_name, ui_path)
+        except Exception:
+            ui_class = None
+        if ui_class is not None:
+            _ui_classes[ui_name] = ui_class
+
+    if ui_class is None:
+        from PyQt5.uic import loadUi
+        loadUi(ui_path, widget)
+        # 生成缓存，下次启动直接使用预编译界面类（打包后目录可能不可写，失败时忽略）
+        if not getattr(sys, "frozen", False):
+            try:
+                compile_ui(ui_name)
+            except Exception:
+                pass
+        return widget
+
+    ui = ui_class()
+    ui.setupUi(widget)
+    # loadUi 会把控件设置为窗口的属性，这里保持一致
+    for name, value in vars(ui).items():
+        setattr(widget, name, value)
+    return widget
+
+
+if __name__ == "__main__":
+    for path in compile_all():
+        print(f"已生成: {path}")
@@ -1,17 +1,57 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 __author__ = "Huaisha2049"
-import requests
 import webbrowser
+from concurrent.futures import ThreadPoolExecutor
 from packaging import version
+from PyQt5.QtCore import QThread, pyqtSignal
 from PyQt5.QtWidgets import QMessageBox
 
+from utils.http_cache import CachedFetcher
+
+UPDATE_CACHE_TTL = 6 * 3600  # 版本信息缓存有效期(秒)
+ANNOUNCEMENT_CACHE_TTL = 3600  # 公告缓存有效期(秒)
+
+
+def get_update_info(tool_name, local_version, fetcher=None):
+    """
+    获取版本信息并与本地版本比较（不涉及界面，可在后台线程调用）
+
+    参数:
+        tool_name (str): 工具名称
+        local_version (str): 当前本地版本号
+        fetcher (CachedFetcher): 带缓存的获取器，默认新建
+
+    返回值:
+        (success, {"has_update": bool, "version": str, "download_url": str} 或错误信息)
+    """
+    fetcher = fetcher or CachedFetcher(ttl=UPDATE_CACHE_TTL)
+    url = f'https://api.hs2049.cn/tools/{tool_name}'
+    flag, data = fetcher.fetch_json(url)
+    if flag is False:
+        return False, data
+    try:
+        server_version = data.get("Version")
+        # 使用packaging库进行版本号比对
+        has_update = version.parse(local_version) < version.parse(server_version)
+    except Exception as e:
+        return False, f"版本信息解析失败: {str(e)}"
+    return True, {"has_update": has_update, "version": server_version, "download_url": data.get("DownloadUrl")}
+
+
+def show_update_prompt(update_info):
+    """发现新版本时弹出提示并打开下载链接（需在界面线程调用）"""
+    if update_info.get("has_update"):
+        QMessageBox.information(None, "发现新版本", "检测到新版本，点击确定后将自动打开下载链接")
+        webbrowser.open(update_info.get("download_url"))
+
+
 def check_updates(tool_name, local_version):
     """
-    检查汉化工具的新版本并提示更新
+    检查汉化工具的新版本并提示更新（同步执行，界面线程中请使用 UpdateCheckThread）
     
     本函数执行以下操作：
-    1. 向版本服务器发送GET请求获取版本信息
+    1. 向版本服务器发送GET请求获取版本信息（带本地缓存）
     2. 解析服务器返回的JSON数据
     3. 比较服务器版本与本地版本号
     4. 若发现新版本则弹出提示框并打开浏览器下载
@@ -27,19 +67,37 @@ def check_updates(tool_name, local_version):
     异常:
         当网络请求失败或数据解析出错时，弹出错误提示框
     """
-    try:
-        # 发送网络请求获取版本信息
-        url = f'https://api.hs2049.cn/tools/{tool_name}'
-        response = requests.get(url, timeout=10)
-        data = response.json()
-
-        # 解析服务器版本信息
-        server_version = data.get("Version")
-        # 使用packaging库进行版本号比对
-        if version.parse(local_version) < version.parse(server_version):
-            # 发现新版本时执行提示流程
-            QMessageBox.information(None, "发现新版本", "检测到新版本，点击确定后将自动打开下载链接")
-            webbrowser.open(data.get("DownloadUrl"))
-    except Exception as e:
+    flag, result = get_update_info(tool_name, local_version)
+    if flag is False:
         # 异常处理：显示错误详情
-        QMessageBox.critical(None, "更新检查失败", f"无法检查更新：{e}")
\ No newline at end of file
+        QMessageBox.critical(None, "更新检查失败", f"无法检查更新：{result}")
+        return
+    show_update_prompt(result)
+
+
+class UpdateCheckThread(QThread):
+    """后台更新检查线程：版本检查和公告获取并发执行，不阻塞界面"""
+    update_signal = pyqtSignal(bool, object)  # (success, 版本信息 或错误信息)
+    announcement_signal = pyqtSignal(str)
+
+    def __init__(self, tool_name, local_version, announcement_url=None):
+        super().__init__()
+        self.tool_name = tool_name
+        self.local_version = local_version
+        self.announcement_url = announcement_url
+
+    def _fetch_announcement(self):
+        fetcher = CachedFetcher(ttl=ANNOUNCEMENT_CACHE_TTL)
+        return fetcher.fetch_text(self.announcement_url)
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            update_future = executor.submit(get_update_info, self.tool_name, self.local_version)
+            announcement_future = executor.submit(self._fetch_announcement) if self.announcement_url else None
+
+            flag, result = update_future.result()
+            self.update_signal.emit(flag, result)
+            if announcement_future is not None:
+                flag, result = announcement_future.result()
+                if flag and result.strip():
+                    self.announcement_signal.emit(result.strip())